@@ -14,7 +14,7 @@ from ...database.connection import get_db_context
 from ...database.models import User, UserRole, DocumentType
 from ...security.auth import (
     AuthService, SessionManager, TokenBlacklist, RateLimiter,
-    get_current_user, get_current_active_user, require_roles
+    get_current_user, require_roles
 )
 from ...security.audit import audit_system, AuditEventType
 from ...security.encryption import data_sanitizer, token_security
@@ -352,7 +352,7 @@ async def login_user(
 async def logout_user(
     request: Request,
     response: Response,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Logout user and invalidate session"""
     
@@ -388,7 +388,7 @@ async def logout_user(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Get current user information"""
     
@@ -412,7 +412,7 @@ async def get_current_user_info(
 async def update_user_profile(
     profile_data: UserProfile,
     request: Request,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Update user profile"""
     
@@ -494,7 +494,7 @@ async def update_user_profile(
 async def change_password(
     password_data: PasswordChange,
     request: Request,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Change user password"""
     
@@ -555,7 +555,7 @@ async def change_password(
 
 @router.get("/sessions")
 async def get_user_sessions(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Get user's active sessions"""
     
@@ -585,7 +585,7 @@ async def get_user_sessions(
 async def revoke_session(
     session_id: str,
     request: Request,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Revoke a specific session"""
     
@@ -625,7 +625,7 @@ async def revoke_session(
 @router.delete("/sessions")
 async def revoke_all_sessions(
     request: Request,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Revoke all user sessions"""
     
@@ -657,7 +657,7 @@ async def revoke_all_sessions(
 async def list_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """List all users (admin only)"""
     
@@ -704,7 +704,7 @@ async def update_user_role(
     user_id: int,
     new_role: UserRole,
     request: Request,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Update user role (admin only)"""
     
@@ -29,6 +29,7 @@ class Settings(BaseSettings):
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 100  # Use unix:///path/to/redis.sock for co-located Redis
     
     # Celery Configuration
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
@@ -37,7 +38,15 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-3.5-turbo"
+    OPENAI_ANALYSIS_MODEL: str = "gpt-4o-mini"  # Structured extraction only; generation keeps OPENAI_MODEL
     WHISPER_MODEL: str = "whisper-1"
+    OPENAI_MAX_REQUESTS_PER_MINUTE: int = 3500
+    OPENAI_MAX_TOKENS_PER_MINUTE: int = 90000
+    OPENAI_MAX_ATTEMPTS: int = 4
+    OPENAI_RETRY_MAX_DELAY_SECONDS: float = 10.0
+    OPENAI_BATCH_SERVICE_TIER: str = ""  # e.g. "flex" for batch-priority documents; empty uses the default tier
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
     
     # Google Drive Configuration
     GOOGLE_CLIENT_ID: str = ""
@@ -51,6 +60,9 @@ class Settings(BaseSettings):
     
     # Document Processing
     SUPPORTED_DOCUMENT_TYPES: list = ["flyer", "announcement", "notice", "event", "meeting_minutes", "letter", "report"]
+    JINJA_BYTECODE_CACHE_ENABLED: bool = True  # On-disk cache of compiled templates
+    JINJA_BYTECODE_CACHE_DIR: str = ""  # Empty uses Jinja's private per-user temp directory
+    JAPANESE_WEBFONT_URL: str = ""  # woff2 URL for a Noto Sans JP subset; empty relies on installed fonts
     
     # PDF Configuration
     PDF_OUTPUT_DIR: str = "/tmp/ai-printer"
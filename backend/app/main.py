@@ -9,6 +9,7 @@ import uvicorn
 import logging
 from .config import settings
 from .api.routes import router
+from .security.audit import audit_system
 
 # Configure logging
 logging.basicConfig(
@@ -38,6 +39,16 @@ app.add_middleware(
 # Include API routes
 app.include_router(router, prefix="/api")
 
+@app.on_event("startup")
+async def start_background_workers():
+    """Start background audit log writer"""
+    await audit_system.start_worker()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Flush pending audit logs and stop the writer"""
+    await audit_system.stop_worker()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
@@ -4,7 +4,7 @@ Comprehensive audit logging and compliance system
 import json
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set
 from enum import Enum
 import logging
 from sqlalchemy import select, insert
@@ -34,6 +34,12 @@ structlog.configure(
 
 audit_logger = structlog.get_logger("audit")
 
+# Background audit queue settings
+AUDIT_QUEUE_MAXSIZE = 10000
+AUDIT_BATCH_SIZE = 100
+# Queued after the last event to tell the worker to finish and exit
+_STOP_WORKER = object()
+
 
 class AuditEventType(Enum):
     """Types of audit events"""
@@ -102,6 +108,9 @@ class AuditLogger:
             ComplianceStandard.CCPA: self._handle_ccpa_audit,
             ComplianceStandard.SOC2: self._handle_soc2_audit,
         }
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._fallback_tasks: Set[asyncio.Task] = set()
     
     async def log_event(
         self,
@@ -118,6 +127,39 @@ class AuditLogger:
     ):
         """Log audit event with comprehensive details"""
         
+        event_data = await self._prepare_event(
+            event_type,
+            user_id=user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            action=action,
+            details=details,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            compliance_standards=compliance_standards,
+            severity=severity
+        )
+        
+        # Store in database
+        await self._store_audit_log(event_data)
+        
+        # Check for security alerts
+        await self._check_security_alerts(event_data)
+    
+    async def _prepare_event(
+        self,
+        event_type: AuditEventType,
+        user_id: Optional[int] = None,
+        resource_type: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        action: str = None,
+        details: Dict[str, Any] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        compliance_standards: List[ComplianceStandard] = None,
+        severity: str = "info"
+    ) -> Dict[str, Any]:
+        """Build event data, apply compliance handlers and emit structured log"""
         event_data = {
             "event_type": event_type.value,
             "timestamp": datetime.utcnow().isoformat(),
@@ -148,33 +190,49 @@ class AuditLogger:
             **event_data
         )
         
-        # Store in database
-        await self._store_audit_log(event_data)
-        
-        # Check for security alerts
-        await self._check_security_alerts(event_data)
+        return event_data
     
     async def _store_audit_log(self, event_data: Dict[str, Any]):
         """Store audit log in database"""
         try:
             async with get_db_context() as db:
-                audit_entry = AuditLog(
-                    user_id=event_data.get("user_id"),
-                    action=event_data["action"],
-                    resource_type=event_data.get("resource_type"),
-                    resource_id=event_data.get("resource_id"),
-                    details=event_data["details"],
-                    ip_address=event_data.get("ip_address"),
-                    user_agent=event_data.get("user_agent"),
-                    timestamp=datetime.fromisoformat(event_data["timestamp"].replace('Z', '+00:00'))
-                )
-                
-                db.add(audit_entry)
+                db.add(self._build_audit_entry(event_data))
                 await db.commit()
                 
         except Exception as e:
             self.logger.error(f"Failed to store audit log: {e}", event_data=event_data)
     
+    async def _store_audit_logs_bulk(self, events: List[Dict[str, Any]]):
+        """Store a batch of audit logs with a single multi-row INSERT"""
+        if not events:
+            return
+        try:
+            async with get_db_context() as db:
+                await db.execute(
+                    insert(AuditLog),
+                    [self._audit_row(event_data) for event_data in events]
+                )
+                await db.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to store {len(events)} audit logs: {e}")
+    
+    def _audit_row(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map event data to AuditLog column values"""
+        return {
+            "user_id": event_data.get("user_id"),
+            "action": event_data["action"],
+            "resource_type": event_data.get("resource_type"),
+            "resource_id": event_data.get("resource_id"),
+            "details": event_data["details"],
+            "ip_address": event_data.get("ip_address"),
+            "user_agent": event_data.get("user_agent"),
+            "timestamp": datetime.fromisoformat(event_data["timestamp"].replace('Z', '+00:00'))
+        }
+    
+    def _build_audit_entry(self, event_data: Dict[str, Any]) -> AuditLog:
+        """Build AuditLog row from event data"""
+        return AuditLog(**self._audit_row(event_data))
+    
     async def _check_security_alerts(self, event_data: Dict[str, Any]):
         """Check for security alerts based on audit events"""
         event_type = event_data["event_type"]
@@ -356,6 +414,112 @@ class AuditLogger:
             compliance_standards=[ComplianceStandard.GDPR]
         )
     
+    def enqueue_user_activity(
+        self,
+        user_id: int,
+        action: str,
+        resource_type: str = None,
+        resource_id: str = None,
+        details: Dict[str, Any] = None,
+        ip_address: str = None,
+        user_agent: str = None
+    ):
+        """Queue user activity for the background writer without blocking
+        
+        Falls back to a tracked background task when the worker is not
+        running. Events are dropped (and logged) if the queue is full.
+        """
+        event = {
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+        }
+        
+        if self._queue is None or self._worker_task is None or self._worker_task.done():
+            # Reason: the event loop only keeps weak references to tasks, so an
+            # unreferenced task can be garbage collected before it finishes
+            task = asyncio.create_task(self.log_user_activity(**event))
+            self._fallback_tasks.add(task)
+            task.add_done_callback(self._fallback_tasks.discard)
+            return
+        
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.logger.warning("Audit queue full, dropping event", **event)
+    
+    async def start_worker(self):
+        """Start the background task that drains queued audit events"""
+        if self._worker_task is not None and not self._worker_task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+        self._worker_task = asyncio.create_task(self._run_worker())
+    
+    async def stop_worker(self):
+        """Stop the background worker and flush anything still queued"""
+        if self._worker_task is not None:
+            if not self._worker_task.done():
+                # Reason: cancelling would drop the batch being written, so ask
+                # the worker to drain the queue and exit on its own instead
+                await self._queue.put(_STOP_WORKER)
+            try:
+                await self._worker_task
+            except Exception as e:
+                self.logger.error(f"Audit worker stopped with error: {e}")
+            self._worker_task = None
+        
+        if self._queue is not None:
+            remaining = []
+            while not self._queue.empty():
+                event = self._queue.get_nowait()
+                if event is not _STOP_WORKER:
+                    remaining.append(event)
+            await self._write_batch(remaining)
+            self._queue = None
+        
+        if self._fallback_tasks:
+            await asyncio.gather(*self._fallback_tasks, return_exceptions=True)
+    
+    async def _run_worker(self):
+        """Collect queued events into batches and write them until stopped"""
+        while True:
+            event = await self._queue.get()
+            if event is _STOP_WORKER:
+                return
+            
+            batch = [event]
+            stopping = False
+            while len(batch) < AUDIT_BATCH_SIZE and not self._queue.empty():
+                event = self._queue.get_nowait()
+                if event is _STOP_WORKER:
+                    stopping = True
+                    break
+                batch.append(event)
+            
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                self.logger.error(f"Audit worker failed to write batch: {e}")
+            
+            if stopping:
+                return
+    
+    async def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Prepare queued user activity events and bulk insert them"""
+        events = [
+            await self._prepare_event(
+                AuditEventType.API_CALL,
+                compliance_standards=[ComplianceStandard.GDPR],
+                **event
+            )
+            for event in batch
+        ]
+        await self._store_audit_logs_bulk(events)
+    
     async def log_data_access(
         self,
         user_id: int,
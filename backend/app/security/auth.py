@@ -2,8 +2,9 @@
 Advanced authentication and authorization system
 """
 import time
+import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
@@ -14,7 +15,7 @@ from ..config import settings
 from ..database.models import User, UserRole
 from ..database.connection import get_db_context
 from .encryption import EncryptionService
-from .audit import AuditLogger
+from .audit import audit_system
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +23,52 @@ logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 
 # Redis client for session management
-redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Reason: a shared blocking pool caps connections under load instead of
+# erroring out. from_url() picks UnixDomainSocketConnection for unix:// URLs
+# (co-located Redis), and redis-py uses the hiredis reply parser automatically
+# when the hiredis package is installed.
+redis_pool = redis.BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    decode_responses=True
+)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+# Sliding-window rate limit: drop entries older than the window, count what is
+# left and record this request only when it is still under the limit.
+# Returns the count *before* this request was recorded.
+RATE_LIMIT_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window * 1000)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('EXPIRE', KEYS[1], window)
+end
+return count
+"""
+rate_limit_script = redis_client.register_script(RATE_LIMIT_LUA)
+
+# Update last_activity only for existing sessions, so that a lookup of an
+# expired session never recreates it without a TTL, and return the hash.
+SESSION_TOUCH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {}
+end
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+session_touch_script = redis_client.register_script(SESSION_TOUCH_LUA)
+
+# Sessions live for 7 days
+SESSION_TTL_SECONDS = 7 * 24 * 3600
 
 # Security utilities
 security = HTTPBearer(auto_error=False)
 encryption_service = EncryptionService()
-audit_logger = AuditLogger()
+audit_logger = audit_system
 
 
 class AuthenticationError(Exception):
@@ -63,30 +104,33 @@ class SessionManager:
     def create_session(user_id: int, session_data: Dict[str, Any]) -> str:
         """Create a new user session"""
         session_id = f"session:{user_id}:{int(time.time())}"
+        now_iso = datetime.utcnow().isoformat()
         session_data.update({
-            "created_at": datetime.utcnow().isoformat(),
-            "last_activity": datetime.utcnow().isoformat(),
+            "created_at": now_iso,
+            "last_activity": now_iso,
             "user_id": user_id
         })
         
-        # Store session with 7-day expiry
-        redis_client.hmset(session_id, session_data)
-        redis_client.expire(session_id, 7 * 24 * 3600)
-        
-        # Track active sessions for user
-        redis_client.sadd(f"user_sessions:{user_id}", session_id)
-        redis_client.expire(f"user_sessions:{user_id}", 7 * 24 * 3600)
+        # Store session and track it for the user in a single round trip
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(session_id, mapping=session_data)
+        pipe.expire(session_id, SESSION_TTL_SECONDS)
+        pipe.sadd(f"user_sessions:{user_id}", session_id)
+        pipe.expire(f"user_sessions:{user_id}", SESSION_TTL_SECONDS)
+        pipe.execute()
         
         return session_id
     
     @staticmethod
     def get_session(session_id: str) -> Optional[Dict[str, Any]]:
         """Get session data"""
-        session_data = redis_client.hgetall(session_id)
-        if session_data:
-            # Update last activity
-            redis_client.hset(session_id, "last_activity", datetime.utcnow().isoformat())
-            return session_data
+        # Touch last activity and read the session back in one round trip
+        fields = session_touch_script(
+            keys=[session_id],
+            args=[datetime.utcnow().isoformat()]
+        )
+        if fields:
+            return dict(zip(fields[::2], fields[1::2]))
         return None
     
     @staticmethod
@@ -180,6 +224,47 @@ class AuthService:
         except JWTError as e:
             raise AuthenticationError(f"Invalid token: {str(e)}")
     
+    @staticmethod
+    def verify_token_and_ratecheck(
+        token: str,
+        key: str,
+        limit: int,
+        window: int = 3600,
+        identifier: str = "default"
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Verify JWT and check rate limit with a single Redis round trip"""
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
+        except JWTError as e:
+            raise AuthenticationError(f"Invalid token: {str(e)}")
+        
+        jti = payload.get("jti")
+        now_ms = int(time.time() * 1000)
+        
+        try:
+            # Reason: the blacklist lookup and the rate-limit script are
+            # independent, so both ride the same pipeline (one RTT).
+            pipe = redis_client.pipeline(transaction=False)
+            if jti:
+                pipe.exists(f"blacklist:{jti}")
+            rate_limit_script(
+                keys=[RateLimiter._cache_key(key, identifier)],
+                args=[now_ms, window, limit, RateLimiter._member(now_ms)],
+                client=pipe
+            )
+            results = pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Pipelined token/rate check failed, falling back: {e}")
+            return (
+                AuthService.verify_token(token),
+                RateLimiter.check_rate_limit(key, limit, window, identifier)
+            )
+        
+        if jti and results[0]:
+            raise AuthenticationError("Token has been revoked")
+        
+        return payload, RateLimiter._build_result(int(results[-1]), limit, window)
+    
     @staticmethod
     async def authenticate_user(email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password"""
@@ -241,8 +326,8 @@ class AuthService:
                 if not user.is_active:
                     raise AuthenticationError("Account is disabled")
                 
-                # Log user activity
-                audit_logger.log_user_activity(
+                # Audit write happens in the background, off the request path
+                audit_logger.enqueue_user_activity(
                     user_id=user.id,
                     action="api_access",
                     resource_type="api",
@@ -325,40 +410,15 @@ class RateLimiter:
         identifier: str = "default"
     ) -> Dict[str, Any]:
         """Check if rate limit is exceeded"""
-        cache_key = f"rate_limit:{identifier}:{key}"
+        cache_key = RateLimiter._cache_key(key, identifier)
         
         try:
-            current = redis_client.get(cache_key)
-            if current is None:
-                # First request in window
-                redis_client.setex(cache_key, window, 1)
-                return {
-                    "allowed": True,
-                    "count": 1,
-                    "limit": limit,
-                    "reset_time": int(time.time()) + window
-                }
-            
-            current_count = int(current)
-            if current_count >= limit:
-                ttl = redis_client.ttl(cache_key)
-                return {
-                    "allowed": False,
-                    "count": current_count,
-                    "limit": limit,
-                    "reset_time": int(time.time()) + ttl
-                }
-            
-            # Increment counter
-            redis_client.incr(cache_key)
-            ttl = redis_client.ttl(cache_key)
-            
-            return {
-                "allowed": True,
-                "count": current_count + 1,
-                "limit": limit,
-                "reset_time": int(time.time()) + ttl
-            }
+            now_ms = int(time.time() * 1000)
+            count = int(rate_limit_script(
+                keys=[cache_key],
+                args=[now_ms, window, limit, RateLimiter._member(now_ms)]
+            ))
+            return RateLimiter._build_result(count, limit, window)
             
         except Exception as e:
             logger.error(f"Rate limit check failed: {e}")
@@ -370,6 +430,29 @@ class RateLimiter:
                 "reset_time": int(time.time()) + window
             }
     
+    @staticmethod
+    def _cache_key(key: str, identifier: str) -> str:
+        """Redis key holding the sliding window for ``identifier``/``key``"""
+        return f"rate_limit:{identifier}:{key}"
+    
+    @staticmethod
+    def _member(now_ms: int) -> str:
+        """Unique sorted-set member for a request recorded at ``now_ms``"""
+        # Reason: several requests can land in the same millisecond, so the
+        # score alone is not a unique member.
+        return f"{now_ms}:{secrets.token_hex(4)}"
+    
+    @staticmethod
+    def _build_result(count: int, limit: int, window: int) -> Dict[str, Any]:
+        """Build rate limit result from the pre-request window count"""
+        allowed = count < limit
+        return {
+            "allowed": allowed,
+            "count": count + 1 if allowed else count,
+            "limit": limit,
+            "reset_time": int(time.time()) + window
+        }
+    
     @staticmethod
     def rate_limit_middleware(
         limit: int = 60,
@@ -415,19 +498,14 @@ async def get_current_user(
     return await AuthService.get_current_user(request, credentials)
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
-    """Dependency to get current active user"""
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
-    return current_user
+# get_current_user already rejects inactive accounts; kept as an alias so
+# existing routes and imports keep working.
+get_current_active_user = get_current_user
 
 
 def require_roles(*roles: UserRole):
     """Dependency to require specific roles"""
-    def role_dependency(current_user: User = Depends(get_current_active_user)):
+    def role_dependency(current_user: User = Depends(get_current_user)):
         if current_user.role not in roles and current_user.role != UserRole.ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -2,19 +2,44 @@
 Data encryption and security utilities
 """
 import base64
+import functools
+import html
+import json
+import re
 import secrets
+import warnings
 from typing import Union, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, x25519
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import os
 import logging
 from ..config import settings
 
+try:
+    import orjson as _json_fast
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    import json as _json_fast
+
+try:
+    import blake3
+except ImportError:  # pragma: no cover - blake3 is an optional speedup
+    blake3 = None
+
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns for input sanitization and validation
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s\-_\.]')
+_EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+_LOWERCASE_PATTERN = re.compile(r'[a-z]')
+_DIGIT_PATTERN = re.compile(r'\d')
+_SPECIAL_CHAR_PATTERN = re.compile(r'[!@#$%^&*(),.?":{}|<>]')
+
 
 class EncryptionService:
     """Service for data encryption and decryption"""
@@ -39,44 +64,62 @@ class EncryptionService:
     
     def encrypt_string(self, data: str) -> str:
         """Encrypt a string and return base64 encoded result"""
-        encrypted_data = self.fernet.encrypt(data.encode())
+        return self.encrypt_bytes(data.encode())
+    
+    def encrypt_bytes(self, data: bytes) -> str:
+        """Encrypt raw bytes and return base64 encoded result"""
+        encrypted_data = self.fernet.encrypt(data)
         return base64.b64encode(encrypted_data).decode()
     
     def decrypt_string(self, encrypted_data: str) -> str:
         """Decrypt base64 encoded string"""
+        return self.decrypt_bytes(encrypted_data).decode()
+    
+    def decrypt_bytes(self, encrypted_data: str) -> bytes:
+        """Decrypt base64 encoded data and return raw bytes"""
         try:
             decoded_data = base64.b64decode(encrypted_data.encode())
-            decrypted_data = self.fernet.decrypt(decoded_data)
-            return decrypted_data.decode()
+            return self.fernet.decrypt(decoded_data)
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
             raise ValueError("Failed to decrypt data")
     
     def encrypt_sensitive_data(self, data: dict) -> str:
         """Encrypt sensitive data (like API keys, tokens)"""
-        import json
-        json_data = json.dumps(data)
-        return self.encrypt_string(json_data)
+        try:
+            json_data = _json_fast.dumps(data)
+        except TypeError:
+            # Reason: orjson rejects input the stdlib accepted, such as non-str
+            # dict keys, so keep json's behaviour for those payloads
+            json_data = json.dumps(data)
+        if isinstance(json_data, str):
+            json_data = json_data.encode()
+        return self.encrypt_bytes(json_data)
     
     def decrypt_sensitive_data(self, encrypted_data: str) -> dict:
         """Decrypt sensitive data"""
-        import json
-        decrypted_json = self.decrypt_string(encrypted_data)
-        return json.loads(decrypted_json)
+        return _json_fast.loads(self.decrypt_bytes(encrypted_data))
     
     def generate_secure_token(self, length: int = 32) -> str:
         """Generate a cryptographically secure random token"""
         return secrets.token_urlsafe(length)
     
-    def hash_data(self, data: str, salt: bytes = None) -> Tuple[str, str]:
-        """Hash data with salt using SHA-256"""
+    def hash_data(self, data: str, salt: bytes = None, algorithm: str = "sha256") -> Tuple[str, str]:
+        """Hash data with salt using SHA-256 (or BLAKE3 when requested)"""
         if salt is None:
             salt = os.urandom(32)
         
-        digest = hashes.Hash(hashes.SHA256())
-        digest.update(salt)
-        digest.update(data.encode())
-        hash_value = digest.finalize()
+        if algorithm == "sha256":
+            digest = hashes.Hash(hashes.SHA256())
+            digest.update(salt)
+            digest.update(data.encode())
+            hash_value = digest.finalize()
+        elif algorithm == "blake3":
+            if blake3 is None:
+                raise ValueError("BLAKE3 hashing requires the blake3 package")
+            hash_value = blake3.blake3(salt + data.encode()).digest()
+        else:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
         
         return base64.b64encode(hash_value).decode(), base64.b64encode(salt).decode()
 
@@ -147,8 +190,26 @@ class FileEncryption:
         return padded_data[:-padding_length]
 
 
+@functools.lru_cache(maxsize=128)
+def _load_public_key(public_key_pem: bytes):
+    """Parse a PEM public key, cached by its bytes"""
+    return serialization.load_pem_public_key(public_key_pem)
+
+
+@functools.lru_cache(maxsize=128)
+def _load_private_key(private_key_pem: bytes):
+    """Parse an unencrypted PEM private key, cached by its bytes"""
+    return serialization.load_pem_private_key(private_key_pem, password=None)
+
+
+# Hybrid (ECIES-style) encryption layout: ephemeral X25519 public key || nonce || AES-GCM ciphertext
+_X25519_KEY_SIZE = 32
+_AESGCM_NONCE_SIZE = 12
+_HYBRID_HKDF_INFO = b"ai-printer-x25519-aesgcm"
+
+
 class AsymmetricEncryption:
-    """RSA public/private key encryption"""
+    """Public/private key encryption (X25519 hybrid, legacy RSA-OAEP)"""
     
     @staticmethod
     def generate_key_pair() -> Tuple[bytes, bytes]:
@@ -174,10 +235,77 @@ class AsymmetricEncryption:
         
         return private_pem, public_pem
     
+    @staticmethod
+    def generate_x25519_key_pair() -> Tuple[bytes, bytes]:
+        """Generate X25519 key pair for hybrid encryption"""
+        private_key = x25519.X25519PrivateKey.generate()
+        
+        private_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        
+        return private_pem, public_pem
+    
+    @staticmethod
+    def _derive_hybrid_key(shared_secret: bytes, ephemeral_public: bytes) -> bytes:
+        """Derive the AES-256 key from an X25519 shared secret"""
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=ephemeral_public,
+            info=_HYBRID_HKDF_INFO,
+        ).derive(shared_secret)
+    
+    @staticmethod
+    def encrypt_hybrid(data: bytes, public_key_pem: bytes) -> bytes:
+        """Encrypt data of any size with an X25519 public key (X25519 + HKDF + AES-GCM)"""
+        peer_public_key = _load_public_key(public_key_pem)
+        
+        ephemeral_key = x25519.X25519PrivateKey.generate()
+        ephemeral_public = ephemeral_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        key = AsymmetricEncryption._derive_hybrid_key(
+            ephemeral_key.exchange(peer_public_key), ephemeral_public
+        )
+        
+        nonce = os.urandom(_AESGCM_NONCE_SIZE)
+        ciphertext = AESGCM(key).encrypt(nonce, data, None)
+        
+        return ephemeral_public + nonce + ciphertext
+    
+    @staticmethod
+    def decrypt_hybrid(encrypted_data: bytes, private_key_pem: bytes) -> bytes:
+        """Decrypt data produced by encrypt_hybrid"""
+        private_key = _load_private_key(private_key_pem)
+        
+        ephemeral_public = encrypted_data[:_X25519_KEY_SIZE]
+        nonce = encrypted_data[_X25519_KEY_SIZE:_X25519_KEY_SIZE + _AESGCM_NONCE_SIZE]
+        ciphertext = encrypted_data[_X25519_KEY_SIZE + _AESGCM_NONCE_SIZE:]
+        
+        shared_secret = private_key.exchange(
+            x25519.X25519PublicKey.from_public_bytes(ephemeral_public)
+        )
+        key = AsymmetricEncryption._derive_hybrid_key(shared_secret, ephemeral_public)
+        
+        return AESGCM(key).decrypt(nonce, ciphertext, None)
+    
     @staticmethod
     def encrypt_with_public_key(data: bytes, public_key_pem: bytes) -> bytes:
-        """Encrypt data with public key"""
-        public_key = serialization.load_pem_public_key(public_key_pem)
+        """Encrypt data with RSA public key (deprecated, use encrypt_hybrid)"""
+        warnings.warn(
+            "RSA-OAEP encryption is deprecated; use AsymmetricEncryption.encrypt_hybrid",
+            DeprecationWarning,
+            stacklevel=2
+        )
+        public_key = _load_public_key(public_key_pem)
         
         encrypted_data = public_key.encrypt(
             data,
@@ -192,11 +320,13 @@ class AsymmetricEncryption:
     
     @staticmethod
     def decrypt_with_private_key(encrypted_data: bytes, private_key_pem: bytes) -> bytes:
-        """Decrypt data with private key"""
-        private_key = serialization.load_pem_private_key(
-            private_key_pem,
-            password=None,
+        """Decrypt data with RSA private key (deprecated, use decrypt_hybrid)"""
+        warnings.warn(
+            "RSA-OAEP decryption is deprecated; use AsymmetricEncryption.decrypt_hybrid",
+            DeprecationWarning,
+            stacklevel=2
         )
+        private_key = _load_private_key(private_key_pem)
         
         decrypted_data = private_key.decrypt(
             encrypted_data,
@@ -240,9 +370,8 @@ class DataSanitizer:
     @staticmethod
     def sanitize_filename(filename: str) -> str:
         """Sanitize filename to prevent directory traversal"""
-        import re
         # Remove path separators and special characters
-        sanitized = re.sub(r'[^\w\s\-_\.]', '', filename)
+        sanitized = _UNSAFE_FILENAME_CHARS.sub('', filename)
         # Remove leading dots and spaces
         sanitized = sanitized.lstrip('. ')
         # Limit length
@@ -255,7 +384,6 @@ class DataSanitizer:
     @staticmethod
     def sanitize_user_input(text: str) -> str:
         """Basic sanitization for user input"""
-        import html
         # HTML escape
         sanitized = html.escape(text)
         # Remove null bytes
@@ -265,21 +393,17 @@ class DataSanitizer:
     @staticmethod
     def validate_email(email: str) -> bool:
         """Validate email format"""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(_EMAIL_PATTERN.match(email))
     
     @staticmethod
     def validate_password_strength(password: str) -> dict:
         """Validate password strength"""
-        import re
-        
         checks = {
             'length': len(password) >= 8,
-            'uppercase': bool(re.search(r'[A-Z]', password)),
-            'lowercase': bool(re.search(r'[a-z]', password)),
-            'digit': bool(re.search(r'\d', password)),
-            'special': bool(re.search(r'[!@#$%^&*(),.?":{}|<>]', password)),
+            'uppercase': bool(_UPPERCASE_PATTERN.search(password)),
+            'lowercase': bool(_LOWERCASE_PATTERN.search(password)),
+            'digit': bool(_DIGIT_PATTERN.search(password)),
+            'special': bool(_SPECIAL_CHAR_PATTERN.search(password)),
         }
         
         score = sum(checks.values())
@@ -0,0 +1,99 @@
+"""
+Short-window request coalescing for batching concurrent AI calls
+"""
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Defaults: at most 8 items per batch, waiting no more than 250ms for a batch to fill
+COALESCE_MAX_BATCH_SIZE = 8
+COALESCE_MAX_WAIT_SECONDS = 0.25
+
+
+class BatchCoalescer:
+    """Collect concurrently submitted items and process them in batches
+
+    ``handler`` receives the list of items and must return a list of the
+    same length holding either a result or an Exception for each item.
+    A lone item submitted while no batch is in flight is dispatched right
+    away; the wait window only applies once there is concurrent load.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = COALESCE_MAX_BATCH_SIZE,
+        max_wait: float = COALESCE_MAX_WAIT_SECONDS
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch"""
+        if self._worker_task is None or self._worker_task.done():
+            # Reason: created lazily so the queue and worker bind to the running loop
+            self._queue = asyncio.Queue()
+            self._worker_task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.empty() and not self._dispatch_tasks:
+                # Reason: nothing else is waiting or in flight, so holding the
+                # item for the window would only add latency
+                self._start_dispatch(batch)
+                continue
+
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._start_dispatch(batch)
+
+    def _start_dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Dispatch a batch without blocking collection of the next one"""
+        # Reason: the loop only keeps weak references to tasks, so keep one
+        # until the batch finishes
+        task = asyncio.create_task(self._dispatch(batch))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+            if len(results) != len(batch):
+                raise ValueError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} items failed: {e}")
+            results = [e] * len(batch)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
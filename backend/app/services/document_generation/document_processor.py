@@ -1,20 +1,226 @@
 """
 Advanced document processing and generation service
 """
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, ClassVar, Mapping, FrozenSet
 import asyncio
+import copy
+import functools
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
 import re
 from dataclasses import dataclass
+from types import MappingProxyType
+
+try:
+    import orjson as _json_fast
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    import json as _json_fast
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - pyahocorasick is an optional speedup
+    ahocorasick = None
 from ..openai_service import OpenAIService
 from .template_engine import AdvancedTemplateEngine, DocumentTemplate
+from .throttling import openai_throttle
+from .response_cache import document_cache, normalize_transcription
+from .coalescer import BatchCoalescer
+from .prompts import (
+    GENERATION_PROMPTS, ANALYSIS_PREFIXES, GENERATION_PREFIXES, COMBINED_PREFIXES,
+    BATCH_ANALYSIS_PREFIX,
+    LENGTH_INSTRUCTIONS, FORMALITY_INSTRUCTIONS, DEFAULT_STYLE_INSTRUCTION
+)
 from ...database.models import DocumentType, Document, Template
 from ...database.connection import get_db_context
 from ...config import settings
 
 logger = logging.getLogger(__name__)
 
+# JSON schemas enforced through forced function calls
+_STRING_LIST_SCHEMA = {"type": "array", "items": {"type": "string"}}
+
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "main_topics": _STRING_LIST_SCHEMA,
+        "participants": _STRING_LIST_SCHEMA,
+        "dates_times": _STRING_LIST_SCHEMA,
+        "action_items": _STRING_LIST_SCHEMA,
+        "contact_info": _STRING_LIST_SCHEMA,
+        "tone": {"type": "string", "enum": ["formal", "casual", "professional"]},
+        "structure_suggestions": _STRING_LIST_SCHEMA,
+        "key_points": _STRING_LIST_SCHEMA,
+        "document_title_suggestions": _STRING_LIST_SCHEMA
+    },
+    "required": ["main_topics", "tone", "key_points", "document_title_suggestions"]
+}
+
+STRUCTURED_CONTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "heading": {"type": "string"},
+                    "content": {"type": "string"}
+                },
+                "required": ["heading", "content"]
+            }
+        },
+        "metadata": {
+            "type": "object",
+            "properties": {
+                "word_count": {"type": "integer"},
+                "estimated_reading_time": {"type": "string"},
+                "formality_level": {"type": "string"}
+            }
+        },
+        "template_variables": {"type": "object"}
+    },
+    "required": ["title", "sections", "metadata", "template_variables"]
+}
+
+COMBINED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": ANALYSIS_SCHEMA,
+        "structured_content": STRUCTURED_CONTENT_SCHEMA
+    },
+    "required": ["analysis", "structured_content"]
+}
+
+BATCH_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "analysis": ANALYSIS_SCHEMA
+                },
+                "required": ["id", "analysis"]
+            }
+        }
+    },
+    "required": ["results"]
+}
+
+# Fallback extraction patterns
+_NAME_RE = re.compile(r'\b[A-Z][a-z]+\b')
+# One alternation so the text is scanned once for all date formats
+_DATE_RE = re.compile(
+    r'\b\d{1,2}/\d{1,2}/\d{4}\b'
+    r'|\b\d{1,2}-\d{1,2}-\d{4}\b'
+    r'|\b[A-Za-z]+ \d{1,2}, \d{4}\b'
+)
+_TOPIC_KEYWORDS = ("会議", "プロジェクト", "チーム", "議論", "計画", "決定", "予定")
+
+
+def _build_topic_matcher():
+    """Build a single-pass multi-keyword matcher returning an iterator of matched keywords"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword in _TOPIC_KEYWORDS:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda text: (keyword for _, keyword in automaton.iter(text))
+    
+    pattern = re.compile("|".join(map(re.escape, _TOPIC_KEYWORDS)))
+    return lambda text: (match.group() for match in pattern.finditer(text))
+
+
+_iter_topic_keywords = _build_topic_matcher()
+
+# Suggestion checks
+_ACTION_HEADING_KEYWORDS = ("アクション", "行動", "action")
+_LETTER_GREETINGS = ("拝啓", "いつもお世話", "平素より")
+
+# Completion token budgets; decode time grows with the tokens requested
+ANALYSIS_MAX_TOKENS = 500
+LENGTH_MAX_TOKENS = MappingProxyType({"short": 500, "medium": 1200, "long": 2500})
+DEFAULT_CONTENT_MAX_TOKENS = 2000
+
+# Distinct (length, formality, preferences) combinations kept memoized
+STYLE_INSTRUCTION_CACHE_SIZE = 256
+
+# Generated document cache limits
+RESULT_CACHE_MAX_SIZE = 512
+RESULT_CACHE_TTL_SECONDS = 3600
+
+# Default number of documents generated concurrently by generate_documents
+BATCH_CONCURRENCY = 20
+
+
+# Static part of the analysis returned when the AI call fails
+_FALLBACK_ANALYSIS_TEMPLATE = MappingProxyType({
+    "action_items": (),
+    "contact_info": (),
+    "tone": "professional",
+    "structure_suggestions": ("はじめに", "メインコンテンツ", "まとめ")
+})
+
+
+@functools.lru_cache(maxsize=STYLE_INSTRUCTION_CACHE_SIZE)
+def _style_instructions(
+    target_length: Optional[str],
+    formality_level: Optional[str],
+    style_items: Tuple[Tuple[str, Any], ...]
+) -> str:
+    """Join style instructions for a (length, formality, preferences) combination"""
+    instructions = []
+    
+    if target_length:
+        instructions.append(LENGTH_INSTRUCTIONS.get(target_length, ""))
+    
+    if formality_level:
+        instructions.append(FORMALITY_INSTRUCTIONS.get(formality_level, ""))
+    
+    for key, value in style_items:
+        instructions.append(f"{key}: {value}")
+    
+    return "；".join(instructions) if instructions else DEFAULT_STYLE_INSTRUCTION
+
+
+def _ellipsize(text: str, limit: int = 200) -> str:
+    """Truncate text to ``limit`` characters with an ellipsis, without copying short text"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+@functools.lru_cache(maxsize=None)
+def _fallback_title(document_type: DocumentType) -> str:
+    return f"{document_type.value.title()} 文書"
+
+
+@functools.lru_cache(maxsize=2)
+def _iso_timestamp(epoch_sec: int) -> str:
+    return datetime.fromtimestamp(epoch_sec).isoformat()
+
+
+@functools.lru_cache(maxsize=2)
+def _japanese_date(epoch_sec: int) -> str:
+    return datetime.fromtimestamp(epoch_sec).strftime("%Y年%m月%d日")
+
+
+@dataclass(frozen=True)
+class _RequestContext:
+    """Per-request values captured once at the start of generate_document"""
+    now_iso: str
+    today_japanese: str
+    
+    @classmethod
+    def capture(cls) -> "_RequestContext":
+        """Read the clock once; formatted strings are shared within the same second"""
+        epoch_sec = int(time.time())
+        return cls(now_iso=_iso_timestamp(epoch_sec), today_japanese=_japanese_date(epoch_sec))
+
 
 @dataclass
 class DocumentGenerationRequest:
@@ -27,6 +233,7 @@ class DocumentGenerationRequest:
     additional_context: Dict[str, Any] = None
     target_length: Optional[str] = None  # short, medium, long
     formality_level: Optional[str] = None  # casual, formal, professional
+    priority: str = "interactive"  # interactive, batch
 
 
 @dataclass
@@ -43,19 +250,23 @@ class DocumentGenerationResult:
 class AdvancedDocumentProcessor:
     """Advanced document processor with AI-powered content generation"""
     
+    # AI prompts and cache-friendly prefixes, bound once at class creation
+    # and shared by all instances
+    generation_prompts: ClassVar[Mapping[DocumentType, str]] = GENERATION_PROMPTS
+    _analysis_prefix: ClassVar[Mapping[DocumentType, str]] = ANALYSIS_PREFIXES
+    _generation_prefix: ClassVar[Mapping[DocumentType, str]] = GENERATION_PREFIXES
+    _combined_prefix: ClassVar[Mapping[DocumentType, str]] = COMBINED_PREFIXES
+    
     def __init__(self, openai_service: OpenAIService):
         self.openai_service = openai_service
         self.template_engine = AdvancedTemplateEngine()
+        self._json_loads = _json_fast.loads
         
-        # AI prompts for different document types
-        self.generation_prompts = {
-            DocumentType.MEETING_MINUTES: self._get_meeting_minutes_prompt(),
-            DocumentType.LETTER: self._get_letter_prompt(),
-            DocumentType.REPORT: self._get_report_prompt(),
-            DocumentType.ANNOUNCEMENT: self._get_announcement_prompt(),
-            DocumentType.FLYER: self._get_flyer_prompt(),
-            DocumentType.CUSTOM: self._get_custom_prompt()
-        }
+        # Concurrent analyses within a short window share one OpenAI call
+        self._analysis_coalescer = BatchCoalescer(self._analyze_batch)
+        
+        # LRU cache of generated results: key -> (stored_at, result)
+        self._result_cache: "OrderedDict[str, Tuple[float, DocumentGenerationResult]]" = OrderedDict()
     
     async def generate_document(
         self,
@@ -64,171 +275,344 @@ class AdvancedDocumentProcessor:
     ) -> DocumentGenerationResult:
         """Generate document from transcription using AI and templates"""
         
+        context = _RequestContext.capture()
+        cache_key = self._result_cache_key(request, user_id)
+        cached = self._get_cached_result(cache_key, context)
+        if cached is not None:
+            logger.info("Returning cached document generation result")
+            return cached
+        
         try:
-            # Step 1: Analyze transcription and extract key information
-            logger.info("Analyzing transcription content...")
-            analysis_result = await self._analyze_transcription(
-                request.transcription_text,
-                request.document_type
+            # Step 1 & 2: Analyze transcription and generate structured content.
+            # A custom template only consumes template_variables, so the analysis
+            # is skipped entirely in that case.
+            content_cache_key = self._content_cache_key(request)
+            structured_content = (
+                await document_cache.get(content_cache_key) if content_cache_key else None
             )
             
-            # Step 2: Generate structured content using AI
-            logger.info("Generating structured content...")
-            structured_content = await self._generate_structured_content(
-                request, analysis_result
-            )
+            if structured_content is not None:
+                logger.info("Using cached structured content")
+            elif request.custom_template:
+                logger.info("Generating structured content for custom template...")
+                structured_content = await self._generate_structured_content_standalone(request, context)
+            else:
+                logger.info("Analyzing transcription and generating structured content...")
+                structured_content = await self._analyze_and_generate(request, context)
+            
+            # Snapshot for the cache before templating mutates template_variables;
+            # the Redis write overlaps with template rendering
+            cache_write = None
+            if content_cache_key and not structured_content.get("is_fallback"):
+                cache_write = document_cache.schedule_set(content_cache_key, structured_content)
             
             # Step 3: Apply template if specified
             logger.info("Applying document template...")
-            formatted_content = await self._apply_template(
+            formatted_content, plain_content = await self._apply_template(
                 request, structured_content, user_id
             )
+            if cache_write is not None:
+                await cache_write
             
             # Step 4: Post-process and validate
             logger.info("Post-processing document...")
             final_result = await self._post_process_document(
-                structured_content, formatted_content, request
+                structured_content, formatted_content, plain_content, request, context
             )
             
+            # Reason: a fallback document means the AI call failed; caching it
+            # would keep serving the degraded result after the outage ends
+            if not structured_content.get("is_fallback"):
+                self._store_cached_result(cache_key, final_result)
             return final_result
             
         except Exception as e:
             logger.error(f"文書生成が失敗しました: {e}")
             raise
     
+    def _result_cache_key(
+        self,
+        request: DocumentGenerationRequest,
+        user_id: Optional[int]
+    ) -> str:
+        """Build content-addressed cache key from normalized request inputs"""
+        parts = [
+            request.document_type.value,
+            request.target_length or "",
+            request.formality_level or "",
+            request.custom_template or str(request.template_id or ""),
+            repr(sorted((request.style_preferences or {}).items())),
+            repr(sorted((request.additional_context or {}).items())),
+            str(user_id or ""),
+            request.transcription_text.strip()
+        ]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    
+    def _content_cache_key(self, request: DocumentGenerationRequest) -> Optional[str]:
+        """Cross-request cache key for AI content, or None when the request is not cacheable"""
+        # Style preferences and formality change the generated text itself
+        if request.style_preferences or request.formality_level:
+            return None
+        return document_cache.build_key(
+            request.document_type.value,
+            request.target_length or "",
+            "custom" if request.custom_template else "standard",
+            normalize_transcription(request.transcription_text)
+        )
+    
+    def _get_cached_result(
+        self,
+        key: str,
+        context: _RequestContext
+    ) -> Optional[DocumentGenerationResult]:
+        """Return a private copy of a cached result within TTL with a fresh generation timestamp"""
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        
+        stored_at, result = entry
+        if time.monotonic() - stored_at > RESULT_CACHE_TTL_SECONDS:
+            del self._result_cache[key]
+            return None
+        
+        self._result_cache.move_to_end(key)
+        # Reason: callers and _apply_template mutate template_variables and
+        # suggestions in place, so a hit must not share them with the cache
+        result = copy.deepcopy(result)
+        result.metadata["generation_timestamp"] = context.now_iso
+        return result
+    
+    def _store_cached_result(self, key: str, result: DocumentGenerationResult):
+        """Store a copy of the result and evict least recently used entries"""
+        self._result_cache[key] = (time.monotonic(), copy.deepcopy(result))
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > RESULT_CACHE_MAX_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    async def generate_documents(
+        self,
+        requests: List[DocumentGenerationRequest],
+        user_id: Optional[int] = None,
+        concurrency: int = BATCH_CONCURRENCY
+    ) -> List[Any]:
+        """
+        Generate many documents concurrently
+        
+        Args:
+            requests: Generation requests
+            user_id: Requesting user
+            concurrency: Maximum documents in flight at once
+            
+        Returns:
+            Results in request order; failed items are returned as exceptions
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _generate_one(request: DocumentGenerationRequest) -> DocumentGenerationResult:
+            async with semaphore:
+                return await self.generate_document(request, user_id)
+        
+        return await asyncio.gather(
+            *[_generate_one(request) for request in requests],
+            return_exceptions=True
+        )
+    
+    async def _complete_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        schema: Dict[str, Any],
+        temperature: float,
+        max_tokens: int,
+        cache_key: Optional[str] = None,
+        service_tier: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Call OpenAI through the shared rate limiter and decode schema-constrained JSON
+        
+        ``system_prompt`` must be static per document type so OpenAI can reuse
+        its cached prefix; request data goes in ``user_prompt``. ``model``
+        defaults to the configured generation model.
+        """
+        # Reason: Japanese text is roughly one token per character, so the
+        # prompt length is a conservative estimate for the token bucket
+        arguments = await openai_throttle.run(
+            lambda: self.openai_service.generate_structured_completion(
+                user_prompt,
+                schema,
+                system_prompt=system_prompt,
+                cache_key=cache_key,
+                service_tier=service_tier,
+                model=model or settings.OPENAI_MODEL,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ),
+            estimated_tokens=len(system_prompt) + len(user_prompt) + max_tokens
+        )
+        return self._json_loads(arguments)
+    
+    def _content_max_tokens(self, request: DocumentGenerationRequest) -> int:
+        """Completion token budget for structured content based on target length"""
+        return LENGTH_MAX_TOKENS.get(request.target_length, DEFAULT_CONTENT_MAX_TOKENS)
+    
+    def _service_tier(self, request: DocumentGenerationRequest) -> Optional[str]:
+        """Return the discounted OpenAI tier for batch-priority requests, if configured"""
+        if request.priority == "batch" and settings.OPENAI_BATCH_SERVICE_TIER:
+            return settings.OPENAI_BATCH_SERVICE_TIER
+        return None
+    
+    async def _analyze_and_generate(
+        self,
+        request: DocumentGenerationRequest,
+        context: _RequestContext
+    ) -> Dict[str, Any]:
+        """Analyze transcription and generate structured content with one AI call
+        
+        Falls back to separate concurrent calls if the fused call fails.
+        """
+        style_instructions = self._build_style_instructions(request)
+        user_prompt = (
+            f"文字起こし:\n{request.transcription_text}\n\n"
+            f"スタイル要件:\n{style_instructions}"
+        )
+        
+        try:
+            combined = await self._complete_json(
+                self._combined_prefix[request.document_type],
+                user_prompt,
+                COMBINED_SCHEMA,
+                temperature=0.4,
+                max_tokens=ANALYSIS_MAX_TOKENS + self._content_max_tokens(request),
+                cache_key=f"combined:{request.document_type.value}",
+                service_tier=self._service_tier(request)
+            )
+            analysis_result = combined["analysis"]
+            structured_content = combined["structured_content"]
+        except Exception as e:
+            logger.warning(f"統合生成が失敗しました、個別の生成にフォールバックします: {e}")
+            # Reason: the analysis is only a soft hint for the content, so both
+            # OpenAI round-trips can be in flight at once and merged afterwards.
+            analysis_result, structured_content = await asyncio.gather(
+                self._analyze_transcription(
+                    request.transcription_text,
+                    request.document_type,
+                    service_tier=self._service_tier(request)
+                ),
+                self._generate_structured_content_standalone(request, context)
+            )
+        
+        return self._merge_analysis_hints(structured_content, analysis_result)
+    
     async def _analyze_transcription(
         self,
         transcription: str,
-        document_type: DocumentType
+        document_type: DocumentType,
+        service_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """Analyze transcription to extract key information"""
         
-        analysis_prompt = f"""
-        以下の文字起こしを分析して、{document_type.value}の生成に必要な重要な情報を抽出してください。
-        
-        文字起こし:
-        {transcription}
-        
-        以下の項目を抽出してください：
-        1. 主要なトピックとテーマ
-        2. 主要な参加者（言及されている場合）
-        3. 重要な日付と時間
-        4. アクションアイテムや決定事項
-        5. 連絡先情報
-        6. 文書のトーンと形式レベル
-        7. 文書構造の提案
-        
-        以下の構造でJSON形式で分析結果を返してください（すべて日本語で）：
-        {{
-            "main_topics": ["トピック1", "トピック2"],
-            "participants": ["参加者1", "参加者2"],
-            "dates_times": ["日付1", "時間1"],
-            "action_items": ["アクション1", "アクション2"],
-            "contact_info": ["メール", "電話"],
-            "tone": "formal/casual/professional",
-            "structure_suggestions": ["セクション1", "セクション2"],
-            "key_points": ["ポイント1", "ポイント2"],
-            "document_title_suggestions": ["タイトル1", "タイトル2"]
-        }}
-        """
-        
         try:
-            response = await self.openai_service.generate_completion(
-                analysis_prompt,
-                model=settings.OPENAI_MODEL,
-                temperature=0.3,
-                max_tokens=1000
+            return await self._analysis_coalescer.submit(
+                (transcription, document_type, service_tier)
             )
             
-            # Parse JSON response
-            import json
-            analysis = json.loads(response)
-            return analysis
-            
         except Exception as e:
             logger.warning(f"分析が失敗しました、基本的な抽出を使用します: {e}")
-            # Fallback to simple extraction
-            return {
-                "main_topics": self._extract_topics_simple(transcription),
-                "participants": self._extract_participants_simple(transcription),
-                "dates_times": self._extract_dates_simple(transcription),
-                "action_items": [],
-                "contact_info": [],
-                "tone": "professional",
-                "structure_suggestions": ["はじめに", "メインコンテンツ", "まとめ"],
-                "key_points": [transcription[:200] + "..."],
-                "document_title_suggestions": [f"{document_type.value.title()} 文書"]
-            }
+            # Fallback to simple extraction (CPU-bound, keep it off the event loop)
+            return await asyncio.to_thread(
+                self._build_fallback_analysis, transcription, document_type
+            )
     
-    async def _generate_structured_content(
+    async def _analyze_batch(
+        self,
+        items: List[Tuple[str, DocumentType, Optional[str]]]
+    ) -> List[Any]:
+        """Analyze several transcriptions, with one OpenAI call for the whole batch"""
+        tiers = {service_tier for _, _, service_tier in items}
+        service_tier = tiers.pop() if len(tiers) == 1 else None
+        
+        if len(items) == 1:
+            transcription, document_type, _ = items[0]
+            return [await self._complete_json(
+                self._analysis_prefix[document_type],
+                f"文字起こし:\n{transcription}",
+                ANALYSIS_SCHEMA,
+                temperature=0.3,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                cache_key=f"analysis:{document_type.value}",
+                service_tier=service_tier,
+                model=settings.OPENAI_ANALYSIS_MODEL
+            )]
+        
+        user_prompt = "\n\n".join(
+            f"--- REQUEST #{index} ---\n文書タイプ: {document_type.value}\n文字起こし:\n{transcription}"
+            for index, (transcription, document_type, _) in enumerate(items)
+        )
+        response = await self._complete_json(
+            BATCH_ANALYSIS_PREFIX,
+            user_prompt,
+            BATCH_ANALYSIS_SCHEMA,
+            temperature=0.3,
+            max_tokens=ANALYSIS_MAX_TOKENS * len(items),
+            cache_key="analysis:batch",
+            service_tier=service_tier,
+            model=settings.OPENAI_ANALYSIS_MODEL
+        )
+        
+        by_id = {result.get("id"): result.get("analysis") for result in response.get("results", [])}
+        return [
+            by_id[index] if by_id.get(index) else KeyError(f"No analysis returned for request #{index}")
+            for index in range(len(items))
+        ]
+    
+    def _build_fallback_analysis(
+        self,
+        transcription: str,
+        document_type: DocumentType
+    ) -> Dict[str, Any]:
+        """Build analysis result with simple regex extraction"""
+        analysis = dict(_FALLBACK_ANALYSIS_TEMPLATE)
+        analysis["main_topics"] = self._extract_topics_simple(transcription)
+        analysis["participants"] = self._extract_participants_simple(transcription)
+        analysis["dates_times"] = self._extract_dates_simple(transcription)
+        analysis["key_points"] = [_ellipsize(transcription)]
+        analysis["document_title_suggestions"] = [_fallback_title(document_type)]
+        return analysis
+    
+    async def _generate_structured_content_standalone(
         self,
         request: DocumentGenerationRequest,
-        analysis: Dict[str, Any]
+        context: _RequestContext
     ) -> Dict[str, Any]:
-        """Generate structured content using AI"""
-        
-        # Get document-specific prompt
-        base_prompt = self.generation_prompts[request.document_type]
+        """Generate structured content using AI from the request alone"""
         
         # Customize prompt based on request parameters
         style_instructions = self._build_style_instructions(request)
         
-        generation_prompt = f"""
-        {base_prompt}
-        
-        元の文字起こし:
-        {request.transcription_text}
-        
-        分析結果:
-        {analysis}
-        
-        スタイル要件:
-        {style_instructions}
-        
-        以下の要素を含む、よく構造化された{request.document_type.value}を生成してください：
-        1. 適切なフォーマット
-        2. 明確なセクションとヘッダー
-        3. プロフェッショナルな日本語
-        4. すべての重要な情報を含める
-        5. 文書タイプに適した構造
-        
-        以下のJSON形式で結果を返してください（すべて日本語で）：
-        {{
-            "title": "文書タイトル",
-            "sections": [
-                {{
-                    "heading": "セクション見出し",
-                    "content": "セクション内容"
-                }}
-            ],
-            "metadata": {{
-                "word_count": 123,
-                "estimated_reading_time": "2分",
-                "formality_level": "professional"
-            }},
-            "template_variables": {{
-                "variable_name": "value"
-            }}
-        }}
-        """
+        user_prompt = (
+            f"元の文字起こし:\n{request.transcription_text}\n\n"
+            f"スタイル要件:\n{style_instructions}"
+        )
         
         try:
-            response = await self.openai_service.generate_completion(
-                generation_prompt,
-                model=settings.OPENAI_MODEL,
+            return await self._complete_json(
+                self._generation_prefix[request.document_type],
+                user_prompt,
+                STRUCTURED_CONTENT_SCHEMA,
                 temperature=0.4,
-                max_tokens=2000
+                max_tokens=self._content_max_tokens(request),
+                cache_key=f"generation:{request.document_type.value}",
+                service_tier=self._service_tier(request)
             )
             
-            import json
-            structured_content = json.loads(response)
-            return structured_content
-            
         except Exception as e:
             logger.error(f"構造化コンテンツの生成が失敗しました: {e}")
             # Return basic structure
+            title = _fallback_title(request.document_type)
+            word_count = len(request.transcription_text.split())
             return {
-                "title": f"{request.document_type.value.title()} 文書",
+                "is_fallback": True,
+                "title": title,
                 "sections": [
                     {
                         "heading": "内容",
@@ -236,24 +620,45 @@ class AdvancedDocumentProcessor:
                     }
                 ],
                 "metadata": {
-                    "word_count": len(request.transcription_text.split()),
-                    "estimated_reading_time": f"{max(1, len(request.transcription_text.split()) // 200)}分",
+                    "word_count": word_count,
+                    "estimated_reading_time": f"{max(1, word_count // 200)}分",
                     "formality_level": "professional"
                 },
                 "template_variables": {
-                    "title": f"{request.document_type.value.title()} 文書",
+                    "title": title,
                     "content": request.transcription_text,
-                    "date": datetime.now().strftime("%Y年%m月%d日")
+                    "date": context.today_japanese
                 }
             }
     
+    def _merge_analysis_hints(
+        self,
+        structured_content: Dict[str, Any],
+        analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Fuse transcription analysis into template variables without overriding generated values"""
+        template_variables = structured_content.setdefault("template_variables", {})
+        
+        title_suggestions = analysis.get("document_title_suggestions") or []
+        if title_suggestions:
+            template_variables.setdefault("title", title_suggestions[0])
+        
+        for key in ("main_topics", "participants", "dates_times", "action_items", "key_points"):
+            if analysis.get(key):
+                template_variables.setdefault(key, analysis[key])
+        
+        if analysis.get("tone"):
+            structured_content.setdefault("metadata", {}).setdefault("formality_level", analysis["tone"])
+        
+        return structured_content
+    
     async def _apply_template(
         self,
         request: DocumentGenerationRequest,
         structured_content: Dict[str, Any],
         user_id: Optional[int]
-    ) -> str:
-        """Apply template to structured content"""
+    ) -> Tuple[str, str]:
+        """Apply template to structured content, returning formatted and plain text"""
         
         template_variables = structured_content.get("template_variables", {})
         
@@ -281,42 +686,66 @@ class AdvancedDocumentProcessor:
                     variables=template_variables
                 )
             
-            return formatted_content
-            
         except Exception as e:
             logger.warning(f"テンプレートの適用が失敗しました、基本的なフォーマットを使用します: {e}")
-            # Fallback to basic formatting
+            # Fallback to basic formatting, which emits the plain text in the same pass
             return self._format_basic_document(structured_content)
+        
+        sections = structured_content.get("sections", [])
+        return formatted_content, "\n\n".join(section.get("content", "") for section in sections)
     
     async def _post_process_document(
         self,
         structured_content: Dict[str, Any],
         formatted_content: str,
-        request: DocumentGenerationRequest
+        plain_content: str,
+        request: DocumentGenerationRequest,
+        context: _RequestContext
     ) -> DocumentGenerationResult:
         """Post-process document and calculate quality metrics"""
         
+        # Reason: scoring and suggestions are pure CPU work; running them in a
+        # worker thread lets other documents' I/O proceed
+        return await asyncio.to_thread(
+            self._post_process_document_sync,
+            structured_content, formatted_content, plain_content, request, context
+        )
+    
+    def _post_process_document_sync(
+        self,
+        structured_content: Dict[str, Any],
+        formatted_content: str,
+        plain_content: str,
+        request: DocumentGenerationRequest,
+        context: _RequestContext
+    ) -> DocumentGenerationResult:
+        """Calculate quality score and suggestions and build the final result"""
+        
+        # Tokenize each text once and share the result across checks
+        content_words = formatted_content.lower().split()
+        transcription_words = frozenset(request.transcription_text.lower().split())
+        
         # Calculate quality score
         quality_score = self._calculate_quality_score(
-            structured_content, formatted_content, request
+            structured_content, request, content_words, transcription_words
         )
         
         # Generate suggestions for improvement
-        suggestions = await self._generate_suggestions(
-            structured_content, formatted_content, request
+        suggestions = self._generate_suggestions(
+            structured_content, formatted_content, request, len(content_words)
         )
         
         # Extract metadata
-        metadata = {
-            **structured_content.get("metadata", {}),
-            "generation_timestamp": datetime.now().isoformat(),
+        metadata = dict(structured_content.get("metadata") or ())
+        metadata |= {
+            "generation_timestamp": context.now_iso,
             "document_type": request.document_type.value,
             "template_used": request.template_id is not None or request.custom_template is not None,
             "processing_version": "2.0"
         }
         
         return DocumentGenerationResult(
-            document_content=self._extract_plain_content(structured_content),
+            document_content=plain_content,
             formatted_content=formatted_content,
             metadata=metadata,
             quality_score=quality_score,
@@ -326,69 +755,41 @@ class AdvancedDocumentProcessor:
     
     def _build_style_instructions(self, request: DocumentGenerationRequest) -> str:
         """Build style instructions from request parameters"""
-        instructions = []
-        
-        if request.target_length:
-            length_map = {
-                "short": "簡潔で要点を絞った内容にしてください",
-                "medium": "適度な詳細と説明を提供してください",
-                "long": "包括的な詳細と説明を含めてください"
-            }
-            instructions.append(length_map.get(request.target_length, ""))
-        
-        if request.formality_level:
-            formality_map = {
-                "casual": "会話的で親しみやすい日本語を使用してください",
-                "formal": "正式で伝統的なビジネス日本語を使用してください",
-                "professional": "プロフェッショナルで明確かつ直接的な日本語を使用してください"
-            }
-            instructions.append(formality_map.get(request.formality_level, ""))
-        
-        if request.style_preferences:
-            for key, value in request.style_preferences.items():
-                instructions.append(f"{key}: {value}")
-        
-        return "；".join(instructions) if instructions else "明確でプロフェッショナルな日本語を使用してください"
+        style_items = tuple((request.style_preferences or {}).items())
+        try:
+            return _style_instructions(request.target_length, request.formality_level, style_items)
+        except TypeError:
+            # Unhashable preference values cannot be cached
+            return _style_instructions.__wrapped__(
+                request.target_length, request.formality_level, style_items
+            )
     
-    def _format_basic_document(self, structured_content: Dict[str, Any]) -> str:
-        """Format document using basic formatting when template fails"""
-        title = structured_content.get("title", "Document")
-        sections = structured_content.get("sections", [])
+    def _format_basic_document(self, structured_content: Dict[str, Any]) -> Tuple[str, str]:
+        """Format document using basic formatting when template fails
         
-        content_parts = [f"# {title}", ""]
-        
-        for section in sections:
-            heading = section.get("heading", "")
-            content = section.get("content", "")
-            
-            if heading:
-                content_parts.append(f"## {heading}")
-                content_parts.append("")
-            
-            content_parts.append(content)
-            content_parts.append("")
-        
-        return "\n".join(content_parts)
-    
-    def _extract_plain_content(self, structured_content: Dict[str, Any]) -> str:
-        """Extract plain text content from structured content"""
-        sections = structured_content.get("sections", [])
-        content_parts = []
+        Returns the formatted document and its plain text, built in one pass over the sections.
+        """
+        title = structured_content.get("title", "Document")
         
-        for section in sections:
+        blocks = [f"# {title}"]
+        plain_blocks = []
+        for section in structured_content.get("sections", []):
             content = section.get("content", "")
-            content_parts.append(content)
-        
-        return "\n\n".join(content_parts)
+            plain_blocks.append(content)
+            heading = section.get("heading", "")
+            blocks.append(f"## {heading}\n\n{content}" if heading else content)
+        return "\n\n".join(blocks) + "\n", "\n\n".join(plain_blocks)
     
     def _calculate_quality_score(
         self,
         structured_content: Dict[str, Any],
-        formatted_content: str,
-        request: DocumentGenerationRequest
+        request: DocumentGenerationRequest,
+        content_words: List[str],
+        transcription_word_set: FrozenSet[str]
     ) -> float:
-        """Calculate document quality score"""
+        """Calculate document quality score from pre-tokenized (lowercased) words"""
         score = 0.0
+        content_word_set = frozenset(content_words)
         
         # Content completeness (30%)
         sections = structured_content.get("sections", [])
@@ -400,7 +801,7 @@ class AdvancedDocumentProcessor:
             score += 0.1
         
         # Word count appropriateness (20%)
-        word_count = len(formatted_content.split())
+        word_count = len(content_words)
         if 100 <= word_count <= 2000:
             score += 0.2
         elif 50 <= word_count <= 100 or 2000 <= word_count <= 3000:
@@ -422,27 +823,26 @@ class AdvancedDocumentProcessor:
         
         # Content relevance (10%)
         # Simple heuristic: check if transcription content is reflected
-        transcription_words = set(request.transcription_text.lower().split())
-        content_words = set(formatted_content.lower().split())
-        overlap = len(transcription_words.intersection(content_words))
-        if overlap > len(transcription_words) * 0.3:
-            score += 0.1
-        elif overlap > len(transcription_words) * 0.1:
-            score += 0.05
+        if transcription_word_set:
+            overlap = len(transcription_word_set & content_word_set)
+            if overlap > len(transcription_word_set) * 0.3:
+                score += 0.1
+            elif overlap > len(transcription_word_set) * 0.1:
+                score += 0.05
         
         return min(1.0, score)
     
-    async def _generate_suggestions(
+    def _generate_suggestions(
         self,
         structured_content: Dict[str, Any],
         formatted_content: str,
-        request: DocumentGenerationRequest
+        request: DocumentGenerationRequest,
+        word_count: int
     ) -> List[str]:
         """Generate suggestions for document improvement"""
         suggestions = []
         
         # Analyze word count
-        word_count = len(formatted_content.split())
         if word_count < 50:
             suggestions.append("文書をより包括的にするために詳細を追加することを検討してください")
         elif word_count > 2000:
@@ -455,101 +855,35 @@ class AdvancedDocumentProcessor:
         
         # Check for specific document type requirements
         if request.document_type == DocumentType.MEETING_MINUTES:
-            if not any("アクション" in s.get("heading", "").lower() or "行動" in s.get("heading", "").lower() for s in sections):
+            # Reason: one joined string turns the heading x keyword scan into one pass per keyword
+            headings = "\n".join(s.get("heading", "") for s in sections).lower()
+            if not any(keyword in headings for keyword in _ACTION_HEADING_KEYWORDS):
                 suggestions.append("アクションアイテムのセクションを追加することを検討してください")
         
         elif request.document_type == DocumentType.LETTER:
-            if not any("拝啓" in formatted_content or "いつもお世話" in formatted_content or "平素より" in formatted_content):
+            if not any(greeting in formatted_content for greeting in _LETTER_GREETINGS):
                 suggestions.append("適切な挨拶文を追加することを検討してください")
         
         return suggestions
     
-    # Document type specific prompts
-    def _get_meeting_minutes_prompt(self) -> str:
-        return """
-        以下を含むプロフェッショナルな議事録を生成してください：
-        - 会議タイトル、日付、参加者
-        - 議論されたアジェンダ項目
-        - 決定された重要事項
-        - 担当者が割り当てられたアクションアイテム
-        - 次のステップとフォローアップ日程
-        ビジネス文書に適した明確で簡潔な日本語を使用してください。
-        """
-    
-    def _get_letter_prompt(self) -> str:
-        return """
-        以下を含む正式な手紙を生成してください：
-        - 送信者と受信者の情報を含む適切なヘッダー
-        - 適切な挨拶
-        - 明確で構造化された本文段落
-        - プロフェッショナルな結び
-        - 署名欄
-        適切な敬語とビジネスマナーを維持してください。
-        """
-    
-    def _get_report_prompt(self) -> str:
-        return """
-        以下を含む包括的な報告書を生成してください：
-        - エグゼクティブサマリー
-        - 説明的な見出しを持つ明確なセクション
-        - データと調査結果の提示
-        - 分析と洞察
-        - 結論と提案
-        プロフェッショナルな日本語と論理的な構造を使用してください。
-        """
-    
-    def _get_announcement_prompt(self) -> str:
-        return """
-        以下を含む明確なお知らせを生成してください：
-        - 注意を引く見出し
-        - 重要な詳細（何を、いつ、どこで、誰が）
-        - 明確な行動喚起
-        - 必要に応じて連絡先情報
-        魅力的でプロフェッショナルな日本語を使用してください。
-        """
-    
-    def _get_flyer_prompt(self) -> str:
-        return """
-        以下を含む魅力的なフライヤーを生成してください：
-        - 目を引く見出し
-        - イベントや製品の詳細
-        - 日付、時間、場所
-        - メリットやハイライト
-        - 明確な行動喚起
-        - 連絡先情報
-        マーケティングに適した説得力のある魅力的な日本語を使用してください。
-        """
-    
-    def _get_custom_prompt(self) -> str:
-        return """
-        提供されたコンテンツに基づいて、よく構造化された文書を生成してください。
-        適切な見出しとセクションで情報を論理的に整理してください。
-        対象読者に適した明確でプロフェッショナルな日本語を使用してください。
-        """
-    
     # Simple extraction methods for fallback
     def _extract_topics_simple(self, text: str) -> List[str]:
-        """Simple topic extraction using keyword frequency"""
+        """Simple topic extraction using keyword matching"""
         # This is a simplified version - in production you'd use NLP techniques
-        words = re.findall(r'\b\w+\b', text.lower())
-        # Return most common non-stopwords (simplified)
-        common_words = ['meeting', 'project', 'team', 'discussion', 'plan']
-        return [word for word in common_words if word in words][:5]
+        # Reason: dict keeps first-occurrence order while de-duplicating
+        return list(dict.fromkeys(_iter_topic_keywords(text)))[:5]
     
     def _extract_participants_simple(self, text: str) -> List[str]:
         """Simple participant extraction using capitalized words"""
         # Look for capitalized words that might be names
-        potential_names = re.findall(r'\b[A-Z][a-z]+\b', text)
+        potential_names = _NAME_RE.findall(text)
         return list(set(potential_names))[:10]
     
     def _extract_dates_simple(self, text: str) -> List[str]:
         """Simple date extraction using regex patterns"""
-        date_patterns = [
-            r'\b\d{1,2}/\d{1,2}/\d{4}\b',
-            r'\b\d{1,2}-\d{1,2}-\d{4}\b',
-            r'\b[A-Za-z]+ \d{1,2}, \d{4}\b'
-        ]
         dates = []
-        for pattern in date_patterns:
-            dates.extend(re.findall(pattern, text))
-        return dates[:5]
\ No newline at end of file
+        for match in _DATE_RE.finditer(text):
+            dates.append(match.group())
+            if len(dates) == 5:
+                break
+        return dates
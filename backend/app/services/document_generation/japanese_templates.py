@@ -1,10 +1,36 @@
 """
 Japanese-optimized document templates with improved design
 """
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import Callable, Dict, Final, FrozenSet, Any, Mapping, Optional, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
+from types import MappingProxyType
+from collections import OrderedDict, defaultdict
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import re
+import sys
+import textwrap
+from jinja2 import DictLoader, Environment, Template, meta
+from ...config import settings
 from ...database.models import DocumentType
+from .template_engine import create_bytecode_cache, format_date, markdown_to_html
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Bound on cached render outputs per library
+RENDER_CACHE_MAX_SIZE = 256
+
+# Bump whenever _TEMPLATE_ENV options change so stale bytecode is ignored
+_BYTECODE_CACHE_VERSION = 2
 
 
 class TemplateStyle(Enum):
@@ -15,7 +41,7 @@ class TemplateStyle(Enum):
     MINIMAL = "japanese_minimal"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class JapaneseTemplate:
     """Japanese-optimized template definition"""
     id: str
@@ -25,794 +51,1028 @@ class JapaneseTemplate:
     style: TemplateStyle
     template_html: str
     css_styles: str
-    variables: List[str]
+    variables: Tuple[str, ...]
     category: str
-    tags: List[str]
+    tags: Tuple[str, ...]
+    compiled_template: Optional[Template] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def css_styles_gz(self) -> bytes:
+        """Gzip-compressed css_styles, precomputed for the built-in styles"""
+        if _BASE_STYLES.get(self.style.value) is self.css_styles:
+            return _BASE_STYLES_GZ[self.style.value]
+        return gzip.compress(self.css_styles.encode("utf-8"), compresslevel=9, mtime=0)
+    
+    def render(self, variables: Dict[str, Any]) -> str:
+        """Render the precompiled template with the given variables"""
+        if self.compiled_template is None:
+            # Reason: frozen instances still memoize the compiled form on first render
+            object.__setattr__(self, "compiled_template", _TEMPLATE_ENV.from_string(self.template_html))
+        return self.compiled_template.render(variables)
+
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};:,])\s*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from a static CSS blob"""
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_PUNCTUATION_RE.sub(r"\1", css)
+    return _WHITESPACE_RE.sub(" ", css).strip()
+
+
+# One web font first for consistent rendering; platform fonts remain as fallbacks
+_JP_FONT_STACK: Final[str] = '"Noto Sans JP", "Hiragino Sans", "Yu Gothic", "Meiryo", system-ui, sans-serif'
+
+
+def _font_face_css(url: str) -> str:
+    """@font-face for the configured Noto Sans JP subset, limited to kana, CJK and full-width ranges"""
+    if not url:
+        return ""
+    return (
+        '@font-face { font-family: "Noto Sans JP"; '
+        f'src: url("{url}") format("woff2"); '
+        'unicode-range: U+3000-30FF, U+4E00-9FFF, U+FF00-FFEF; font-display: swap; }'
+    )
+
+
+_JP_FONT_FACE_CSS: Final[str] = _font_face_css(settings.JAPANESE_WEBFONT_URL)
+
+# Colors and gradients reused across rules, defined once as custom properties
+_TOKENS_CSS: Final[str] = """
+:root {
+    --brand-color: #22c55e;
+    --creative-gradient: linear-gradient(135deg, #667eea, #764ba2);
+}
+"""
+
+
+# Section header emoji live in one CSS rule each instead of in every rendered heading
+_EMOJI_HEADER_CSS: Final[str] = """
+.emoji-header::before {
+    font-size: 24px;
+    margin-right: 12px;
+}
+.emoji-clipboard::before { content: "📋"; }
+.emoji-memo::before { content: "📝"; }
+.emoji-speech::before { content: "💬"; }
+.emoji-check::before { content: "✅"; }
+.emoji-chart::before { content: "📊"; }
+.emoji-bulb::before { content: "💡"; }
+"""
+
+
+def _japanese_css(css: str, extra_rules: str = "") -> str:
+    """Fill in the shared font stack, prepend the web font and design tokens, and minify"""
+    css = css.replace("$JP_FONT_STACK", _JP_FONT_STACK)
+    css = css.replace("<style>", "<style>" + _JP_FONT_FACE_CSS + _TOKENS_CSS, 1)
+    return _minify_css(css.replace("</style>", extra_rules + "</style>", 1))
+
+
+# Base CSS for each template style, minified once at import
+_PROFESSIONAL_CSS: Final[str] = _japanese_css("""
+    <style>
+    body {
+        font-family: $JP_FONT_STACK;
+        font-size: 14px;
+        line-height: 1.8;
+        color: #1e293b;
+        max-width: 800px;
+        margin: 0 auto;
+        padding: 40px 32px;
+        background: white;
+    }
+    h1 {
+        font-size: 24px;
+        font-weight: 600;
+        color: #1e293b;
+        text-align: center;
+        margin-bottom: 32px;
+        padding-bottom: 16px;
+        border-bottom: 2px solid var(--brand-color);
+    }
+    h2 {
+        font-size: 18px;
+        font-weight: 600;
+        color: #334155;
+        margin: 32px 0 16px 0;
+        padding: 8px 16px;
+        background: linear-gradient(90deg, #f8f9fa, transparent);
+        border-left: 4px solid var(--brand-color);
+    }
+    h3 {
+        font-size: 16px;
+        font-weight: 600;
+        color: #475569;
+        margin: 24px 0 12px 0;
+    }
+    .card {
+        background: #f8f9fa;
+        padding: 16px;
+        margin: 16px 0;
+        border-radius: 8px;
+        border: 1px solid #e2e8f0;
+    }
+    .highlight {
+        background: linear-gradient(transparent 60%, rgba(34, 197, 94, 0.3) 60%);
+        padding: 2px 4px;
+    }
+    .footer {
+        margin-top: 48px;
+        text-align: center;
+        font-size: 12px;
+        color: #94a3b8;
+        border-top: 1px solid #e2e8f0;
+        padding-top: 16px;
+    }
+    @media print {
+        body { padding: 20px; font-size: 12px; }
+        h1 { border-bottom: 1px solid #000; }
+    }
+    </style>
+""")
+
+_MODERN_CSS: Final[str] = _japanese_css("""
+    <style>
+    body {
+        font-family: $JP_FONT_STACK;
+        font-size: 14px;
+        line-height: 1.7;
+        color: #1e293b;
+        max-width: 750px;
+        margin: 0 auto;
+        padding: 48px 40px;
+        background: linear-gradient(135deg, #fafafa 0%, #ffffff 100%);
+    }
+    h1 {
+        font-size: 28px;
+        font-weight: 700;
+        color: #0f172a;
+        text-align: center;
+        margin-bottom: 40px;
+        position: relative;
+    }
+    h1:after {
+        content: '';
+        position: absolute;
+        bottom: -12px;
+        left: 50%;
+        transform: translateX(-50%);
+        width: 80px;
+        height: 3px;
+        background: linear-gradient(90deg, var(--brand-color), #ef2b70);
+        border-radius: 2px;
+    }
+    h2 {
+        font-size: 20px;
+        font-weight: 600;
+        color: #1e293b;
+        margin: 36px 0 20px 0;
+        padding: 12px 20px;
+        background: white;
+        border-radius: 8px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+        border-left: 4px solid var(--brand-color);
+    }
+    .card {
+        background: white;
+        padding: 24px;
+        margin: 20px 0;
+        border-radius: 12px;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+        border: 1px solid #e2e8f0;
+    }
+    .badge {
+        display: inline-block;
+        background: linear-gradient(135deg, var(--brand-color), #16a34a);
+        color: white;
+        padding: 8px 16px;
+        border-radius: 20px;
+        font-size: 13px;
+        font-weight: 500;
+        margin-bottom: 20px;
+    }
+    .tag {
+        background: #f1f5f9;
+        color: #475569;
+        padding: 6px 12px;
+        border-radius: 16px;
+        font-size: 13px;
+        border: 1px solid #cbd5e1;
+        display: inline-block;
+        margin: 4px;
+    }
+    @media (max-width: 768px) {
+        body { padding: 24px 20px; }
+    }
+    </style>
+""", _EMOJI_HEADER_CSS)
+
+_FORMAL_CSS: Final[str] = _minify_css("""
+    <style>
+    body {
+        font-family: "MS Mincho", "Yu Mincho", "Hiragino Mincho ProN", serif;
+        font-size: 14px;
+        line-height: 1.9;
+        color: #1a1a1a;
+        max-width: 700px;
+        margin: 0 auto;
+        padding: 60px 48px;
+        background: white;
+    }
+    h1 {
+        font-size: 22px;
+        font-weight: 600;
+        color: #1a1a1a;
+        text-align: center;
+        margin-bottom: 48px;
+        padding: 20px 0;
+        border: 2px solid #1a1a1a;
+        position: relative;
+    }
+    h1:before, h1:after {
+        content: '';
+        position: absolute;
+        width: 30px;
+        height: 30px;
+        border: 2px solid #1a1a1a;
+    }
+    h1:before {
+        top: -2px;
+        left: -2px;
+        border-right: none;
+        border-bottom: none;
+    }
+    h1:after {
+        bottom: -2px;
+        right: -2px;
+        border-left: none;
+        border-top: none;
+    }
+    h2 {
+        font-size: 18px;
+        font-weight: 600;
+        color: #1a1a1a;
+        margin: 40px 0 20px 0;
+        text-align: center;
+        padding-bottom: 8px;
+        border-bottom: 1px solid #666;
+    }
+    .formal-box {
+        border: 1px solid #ccc;
+        padding: 20px;
+        margin: 30px 0;
+        text-align: center;
+        background: #fafafa;
+    }
+    .signature-section {
+        margin-top: 60px;
+        text-align: right;
+        padding-right: 40px;
+    }
+    p {
+        text-indent: 1em;
+    }
+    @media print {
+        body { padding: 40px; font-size: 12px; }
+    }
+    </style>
+""")
+
+_CREATIVE_CSS: Final[str] = _japanese_css("""
+    <style>
+    body {
+        font-family: $JP_FONT_STACK;
+        font-size: 14px;
+        line-height: 1.6;
+        color: #2d3748;
+        max-width: 800px;
+        margin: 0 auto;
+        padding: 40px;
+        background: var(--creative-gradient);
+        min-height: 100vh;
+    }
+    .content {
+        background: white;
+        border-radius: 20px;
+        padding: 40px;
+        box-shadow: 0 20px 40px rgba(0,0,0,0.1);
+    }
+    h1 {
+        font-size: 32px;
+        font-weight: 800;
+        background: var(--creative-gradient);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        text-align: center;
+        margin-bottom: 40px;
+    }
+    h2 {
+        font-size: 24px;
+        font-weight: 600;
+        color: #4a5568;
+        margin: 32px 0 16px 0;
+        position: relative;
+        padding-left: 20px;
+    }
+    h2:before {
+        content: '';
+        position: absolute;
+        left: 0;
+        top: 50%;
+        transform: translateY(-50%);
+        width: 4px;
+        height: 100%;
+        background: var(--creative-gradient);
+        border-radius: 2px;
+    }
+    .creative-card {
+        background: linear-gradient(135deg, #f7fafc, #edf2f7);
+        border-radius: 16px;
+        padding: 24px;
+        margin: 20px 0;
+        border-left: 4px solid #667eea;
+        position: relative;
+        overflow: hidden;
+    }
+    .creative-card:before {
+        content: '';
+        position: absolute;
+        top: 0;
+        right: 0;
+        width: 100px;
+        height: 100px;
+        background: linear-gradient(135deg, rgba(102, 126, 234, 0.1), rgba(118, 75, 162, 0.1));
+        border-radius: 50%;
+        transform: translate(30px, -30px);
+    }
+    </style>
+""", _EMOJI_HEADER_CSS)
+
+_MINIMAL_CSS: Final[str] = _japanese_css("""
+    <style>
+    body {
+        font-family: $JP_FONT_STACK;
+        font-size: 15px;
+        line-height: 1.7;
+        color: #2d3748;
+        max-width: 650px;
+        margin: 0 auto;
+        padding: 80px 40px;
+        background: #ffffff;
+    }
+    h1 {
+        font-size: 28px;
+        font-weight: 300;
+        color: #1a202c;
+        text-align: left;
+        margin-bottom: 60px;
+        letter-spacing: -0.5px;
+    }
+    h2 {
+        font-size: 20px;
+        font-weight: 400;
+        color: #2d3748;
+        margin: 48px 0 16px 0;
+        letter-spacing: -0.3px;
+    }
+    h3 {
+        font-size: 16px;
+        font-weight: 500;
+        color: #4a5568;
+        margin: 32px 0 12px 0;
+    }
+    p {
+        margin: 24px 0;
+        color: #4a5568;
+    }
+    .minimal-divider {
+        width: 60px;
+        height: 1px;
+        background: #cbd5e0;
+        margin: 40px 0;
+        border: none;
+    }
+    .minimal-highlight {
+        border-left: 2px solid #e2e8f0;
+        padding-left: 24px;
+        margin: 32px 0;
+        font-style: italic;
+        color: #718096;
+    }
+    .date-simple {
+        font-size: 13px;
+        color: #a0aec0;
+        margin-bottom: 40px;
+    }
+    ul, ol {
+        color: #4a5568;
+        margin: 24px 0;
+    }
+    @media print {
+        body { padding: 40px 20px; }
+    }
+    </style>
+""")
+
+# CSS per template style; every template of a style shares the same string
+_BASE_STYLES: Mapping[str, str] = MappingProxyType({
+    TemplateStyle.PROFESSIONAL.value: _PROFESSIONAL_CSS,
+    TemplateStyle.MODERN.value: _MODERN_CSS,
+    TemplateStyle.FORMAL.value: _FORMAL_CSS,
+    TemplateStyle.CREATIVE.value: _CREATIVE_CSS,
+    TemplateStyle.MINIMAL.value: _MINIMAL_CSS
+})
+
+# Pre-compressed CSS for responses that can send gzip bodies as-is
+_BASE_STYLES_GZ: Mapping[str, bytes] = MappingProxyType({
+    style: gzip.compress(css.encode("utf-8"), compresslevel=9, mtime=0)
+    for style, css in _BASE_STYLES.items()
+})
+
+
+# Static HTML bodies of the library templates
+_MEETING_PROFESSIONAL_HTML: Final[str] = textwrap.dedent("""
+    <div class="date-header">{{ format_date(meeting_date, "%Y年%-m月%-d日") }}</div>
+    
+    <h1>{{ meeting_title }}</h1>
+    
+    <div class="card">
+        <h2>📋 会議概要</h2>
+        <p><strong>主催者：</strong>{{ meeting_organizer }}</p>
+        <p><strong>出席者：</strong>{{ attendees | join(", ") }}</p>
+    </div>
+    
+    <h2>📝 議題</h2>
+    <ol>
+    {% for item in agenda_items %}
+        <li>{{ item }}</li>
+    {% endfor %}
+    </ol>
+    
+    <h2>💬 討議内容</h2>
+    {{ discussion_points | markdown }}
+    
+    <h2>✅ アクション項目</h2>
+    {% for action in action_items %}
+    <div class="card">
+        <strong>{{ action.task }}</strong><br>
+        担当者: {{ action.owner }}<br>
+        期限: {{ format_date(action.due_date, "%-m月%-d日") if action.due_date else "未定" }}
+    </div>
+    {% endfor %}
+    
+    <div class="footer">
+        次回会議: {{ format_date(next_meeting_date, "%Y年%-m月%-d日") if next_meeting_date else "未定" }}
+    </div>
+""")
+
+_MEETING_MODERN_HTML: Final[str] = textwrap.dedent("""
+    <div class="badge">{{ format_date(meeting_date, "%Y年%-m月%-d日") }}</div>
+    
+    <h1>{{ meeting_title }}</h1>
+    
+    <div class="card">
+        <h2><span class="emoji-header emoji-clipboard"></span>会議概要</h2>
+        <p><strong>主催者：</strong>{{ meeting_organizer }}</p>
+        <div style="margin-top: 16px;">
+        {% for attendee in attendees %}
+            <span class="tag">{{ attendee }}</span>
+        {% endfor %}
+        </div>
+    </div>
+    
+    <h2><span class="emoji-header emoji-memo"></span>議題</h2>
+    <div class="card">
+        <ol>
+        {% for item in agenda_items %}
+            <li>{{ item }}</li>
+        {% endfor %}
+        </ol>
+    </div>
+    
+    <h2><span class="emoji-header emoji-speech"></span>討議内容</h2>
+    <div class="card">
+        {{ discussion_points | markdown }}
+    </div>
+    
+    <h2><span class="emoji-header emoji-check"></span>アクション項目</h2>
+    {% for action in action_items %}
+    <div class="card" style="border-left: 4px solid #3b82f6;">
+        <strong>{{ action.task }}</strong><br>
+        担当者: {{ action.owner }}<br>
+        期限: {{ format_date(action.due_date, "%-m月%-d日") if action.due_date else "未定" }}
+    </div>
+    {% endfor %}
+""")
+
+_MEETING_MINIMAL_HTML: Final[str] = textwrap.dedent("""
+    <div class="date-simple">{{ format_date(meeting_date, "%Y年%-m月%-d日") }}</div>
+    
+    <h1>{{ meeting_title }}</h1>
+    
+    <hr class="minimal-divider">
+    
+    <h2>出席者</h2>
+    <p>{{ attendees | join(", ") }}</p>
+    
+    <h2>議題</h2>
+    {% for item in agenda_items %}
+    <p>{{ loop.index }}. {{ item }}</p>
+    {% endfor %}
+    
+    <h2>討議内容</h2>
+    {{ discussion_points | markdown }}
+    
+    <h2>アクション項目</h2>
+    {% for action in action_items %}
+    <div class="minimal-highlight">
+        {{ action.task }} ({{ action.owner }})
+    </div>
+    {% endfor %}
+""")
+
+_LETTER_FORMAL_HTML: Final[str] = textwrap.dedent("""
+    <div class="date-line">{{ format_date(date, "%Y年%-m月%-d日") }}</div>
+    
+    <div class="formal-box">
+        {{ recipient_company }}<br>
+        {{ recipient_title }} {{ recipient_name }} 様
+    </div>
+    
+    <h1>{{ subject }}</h1>
+    
+    <p>拝啓　時下ますますご清栄のこととお慶び申し上げます。</p>
+    
+    {{ body | markdown }}
+    
+    <p>何かご不明な点がございましたら、お気軽にお問い合わせください。</p>
+    <p>今後ともよろしくお願い申し上げます。</p>
+    
+    <div class="signature-section">
+        <p>敬具</p>
+        <div style="margin-top: 40px;">
+            {{ sender_company }}<br>
+            {{ sender_title }}<br>
+            <strong>{{ sender_name }}</strong>
+        </div>
+    </div>
+""")
+
+_LETTER_MODERN_HTML: Final[str] = textwrap.dedent("""
+    <div class="badge">{{ format_date(date, "%Y年%-m月%-d日") }}</div>
+    
+    <div class="card">
+        <strong>宛先:</strong> {{ recipient_company }} {{ recipient_name }} 様
+    </div>
+    
+    <h1>{{ subject }}</h1>
+    
+    <div class="card">
+        {{ body | markdown }}
+    </div>
+    
+    <div class="card" style="text-align: right;">
+        <strong>{{ sender_company }}</strong><br>
+        {{ sender_name }}
+    </div>
+""")
+
+_REPORT_PROFESSIONAL_HTML: Final[str] = textwrap.dedent("""
+    <div class="date-header">{{ format_date(date, "%Y年%-m月%-d日") }}</div>
+    
+    <h1>{{ report_title }}</h1>
+    
+    <div class="card">
+        <h2>📊 概要</h2>
+        <p><strong>作成者：</strong>{{ author }}</p>
+        {{ summary | markdown }}
+    </div>
+    
+    <h2>📋 詳細内容</h2>
+    {% for section in content_sections %}
+    <div class="card">
+        <h3>{{ section.title }}</h3>
+        {{ section.content | markdown }}
+    </div>
+    {% endfor %}
+    
+    <h2>💡 結論・提案</h2>
+    <div class="card">
+        {{ conclusions | markdown }}
+        
+        {% if recommendations %}
+        <h3>推奨事項</h3>
+        <ul>
+        {% for rec in recommendations %}
+            <li class="highlight">{{ rec }}</li>
+        {% endfor %}
+        </ul>
+        {% endif %}
+    </div>
+""")
+
+_REPORT_CREATIVE_HTML: Final[str] = textwrap.dedent("""
+    <div class="content">
+        <div class="badge">{{ format_date(date, "%Y年%-m月%-d日") }}</div>
+        
+        <h1>{{ report_title }}</h1>
+        
+        <div class="creative-card">
+            <h2><span class="emoji-header emoji-chart"></span>概要</h2>
+            <p><strong>作成者：</strong>{{ author }}</p>
+            {{ summary | markdown }}
+        </div>
+        
+        {% for section in content_sections %}
+        <div class="creative-card">
+            <h2><span class="emoji-header emoji-clipboard"></span>{{ section.title }}</h2>
+            {{ section.content | markdown }}
+        </div>
+        {% endfor %}
+        
+        <div class="creative-card">
+            <h2><span class="emoji-header emoji-bulb"></span>重要なインサイト</h2>
+            {% for insight in key_insights %}
+            <div class="highlight">{{ insight }}</div>
+            {% endfor %}
+        </div>
+    </div>
+""")
+
+_FLYER_EVENT_HTML: Final[str] = textwrap.dedent("""
+    <h1 style="font-size: 32px; color: #22c55e; text-shadow: 2px 2px 4px rgba(0,0,0,0.1);">
+        {{ headline }}
+    </h1>
+    
+    <div class="card" style="text-align: center; background: linear-gradient(135deg, #f8f9fa, #e2e8f0);">
+        <h2 style="font-size: 24px; margin-bottom: 24px;">{{ event_name }}</h2>
+        
+        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 24px; margin: 24px 0;">
+            <div>
+                <h3>📅 日時</h3>
+                <p><strong>{{ format_date(event_date, "%Y年%-m月%-d日") }}</strong></p>
+                <p>{{ event_time }}</p>
+            </div>
+            <div>
+                <h3>📍 場所</h3>
+                <p>{{ location }}</p>
+            </div>
+        </div>
+    </div>
+    
+    <div class="card">
+        {{ description | markdown }}
+    </div>
+    
+    <div class="card" style="background: #dcfce7; border-left-color: #22c55e; text-align: center;">
+        <h3 style="color: #15803d;">{{ call_to_action }}</h3>
+        <p><strong>お問い合わせ：</strong>{{ contact_info }}</p>
+    </div>
+""")
+
+_FLYER_BUSINESS_HTML: Final[str] = textwrap.dedent("""
+    <h1 style="text-align: center;">{{ company_name }}</h1>
+    
+    <div class="card" style="text-align: center;">
+        <h2>{{ service_title }}</h2>
+        {{ service_description | markdown }}
+    </div>
+    
+    <h2>✨ サービスの特徴</h2>
+    {% for benefit in benefits %}
+    <div class="card">
+        <span class="highlight">{{ benefit }}</span>
+    </div>
+    {% endfor %}
+    
+    <div class="card" style="background: #f0f9ff; border-left-color: #0ea5e9; text-align: center;">
+        <h3>{{ call_to_action }}</h3>
+        <p><strong>お問い合わせ：</strong>{{ contact_info }}</p>
+    </div>
+    
+    <div class="footer">
+        {{ company_name }} - プロフェッショナルなサービスをお届けします
+    </div>
+""")
+
+# Library template sources by ID
+_TEMPLATE_SOURCES: Mapping[str, str] = MappingProxyType({
+    "meeting_professional_ja": _MEETING_PROFESSIONAL_HTML,
+    "meeting_modern_ja": _MEETING_MODERN_HTML,
+    "meeting_minimal_ja": _MEETING_MINIMAL_HTML,
+    "letter_formal_ja": _LETTER_FORMAL_HTML,
+    "letter_modern_ja": _LETTER_MODERN_HTML,
+    "report_professional_ja": _REPORT_PROFESSIONAL_HTML,
+    "report_creative_ja": _REPORT_CREATIVE_HTML,
+    "flyer_event_ja": _FLYER_EVENT_HTML,
+    "flyer_business_ja": _FLYER_BUSINESS_HTML
+})
+
+# Shared environment; each library template is compiled against it once.
+# Reason: bytecode caching only applies to loader-based templates, so
+# library templates are loaded by ID rather than via from_string.
+# Autoescape is fixed on because the IDs carry no .html extension for
+# select_autoescape to match; Jinja escapes expression output only, so the
+# static spans of each template cost nothing extra.
+_TEMPLATE_ENV = Environment(
+    loader=DictLoader(_TEMPLATE_SOURCES),
+    autoescape=True,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+    optimized=True,
+    cache_size=400,
+    auto_reload=False,
+    bytecode_cache=create_bytecode_cache(f"ja_v{_BYTECODE_CACHE_VERSION}")
+)
+_TEMPLATE_ENV.globals['format_date'] = format_date
+_TEMPLATE_ENV.filters['markdown'] = markdown_to_html
+
+
+# Lookup metadata, so filtering by type or style does not build templates
+_TEMPLATE_INDEX: Dict[str, Tuple[DocumentType, TemplateStyle]] = {
+    "meeting_professional_ja": (DocumentType.MEETING_MINUTES, TemplateStyle.PROFESSIONAL),
+    "meeting_modern_ja": (DocumentType.MEETING_MINUTES, TemplateStyle.MODERN),
+    "meeting_minimal_ja": (DocumentType.MEETING_MINUTES, TemplateStyle.MINIMAL),
+    "letter_formal_ja": (DocumentType.LETTER, TemplateStyle.FORMAL),
+    "letter_modern_ja": (DocumentType.LETTER, TemplateStyle.MODERN),
+    "report_professional_ja": (DocumentType.REPORT, TemplateStyle.PROFESSIONAL),
+    "report_creative_ja": (DocumentType.REPORT, TemplateStyle.CREATIVE),
+    "flyer_event_ja": (DocumentType.FLYER, TemplateStyle.MODERN),
+    "flyer_business_ja": (DocumentType.FLYER, TemplateStyle.PROFESSIONAL)
+}
+
+
+def _group_template_ids(position: int) -> Mapping[Any, Tuple[str, ...]]:
+    """Group template IDs by one field of their index entry, keeping library order"""
+    groups = defaultdict(list)
+    for template_id, keys in _TEMPLATE_INDEX.items():
+        groups[keys[position]].append(template_id)
+    return MappingProxyType({key: tuple(ids) for key, ids in groups.items()})
+
+
+@functools.lru_cache(maxsize=None)
+def _required_variables(template_id: str) -> FrozenSet[str]:
+    """Variables a library template reads from its render context"""
+    ast = _TEMPLATE_ENV.parse(_TEMPLATE_SOURCES[template_id])
+    return frozenset(meta.find_undeclared_variables(ast) - _TEMPLATE_ENV.globals.keys())
+
+
+def _t(*items: str) -> Tuple[str, ...]:
+    """Tuple of interned strings, shared across templates with the same names or tags"""
+    return tuple(sys.intern(item) for item in items)
+
+
+_JSON_SCALAR_TYPES: FrozenSet[type] = frozenset({str, int, float, bool, type(None)})
+
+
+def _is_plain_json(variables: Mapping[str, Any]) -> bool:
+    """True if every value is an exact JSON scalar, list or str-keyed dict
+
+    Subclasses are rejected because the serializers erase them: ``Markup``
+    encodes like the ``str`` it escapes differently from, and dates like
+    their ISO strings. Containers seen twice (shared or circular) are
+    rejected too, which also keeps the walk finite.
+    """
+    stack = [dict(variables)]
+    seen = set()
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type in _JSON_SCALAR_TYPES:
+            continue
+        if value_type is not dict and value_type is not list:
+            return False
+        if id(value) in seen:
+            return False
+        seen.add(id(value))
+        if value_type is dict:
+            if any(type(key) is not str for key in value):
+                return False
+            stack.extend(value.values())
+        else:
+            stack.extend(value)
+    return True
+
+
+def _context_digest(variables: Mapping[str, Any]) -> Optional[bytes]:
+    """Stable digest of render variables, or None if they are not plain JSON data"""
+    if not _is_plain_json(variables):
+        return None
+    try:
+        if orjson is not None:
+            payload = orjson.dumps(variables, option=orjson.OPT_SORT_KEYS)
+        else:
+            payload = json.dumps(variables, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+_IDS_BY_TYPE: Mapping[DocumentType, Tuple[str, ...]] = _group_template_ids(0)
+_IDS_BY_STYLE: Mapping[TemplateStyle, Tuple[str, ...]] = _group_template_ids(1)
 
 
 class JapaneseTemplateLibrary:
     """Library of Japanese-optimized templates"""
     
     def __init__(self):
-        self.templates = self._initialize_templates()
+        # Templates are built lazily by ID; only the metadata index exists up front
+        self._factories = self._build_factories()
+        self._cache: Dict[str, JapaneseTemplate] = {}
+        self._by_type: Dict[DocumentType, Tuple[JapaneseTemplate, ...]] = {}
+        self._by_style: Dict[TemplateStyle, Tuple[JapaneseTemplate, ...]] = {}
+        self._render_cache: "OrderedDict[Tuple[str, bytes], str]" = OrderedDict()
     
-    def _get_base_styles(self) -> Dict[str, str]:
-        """Get base CSS styles for different template styles"""
+    def _build_factories(self) -> Dict[str, Callable[[], JapaneseTemplate]]:
+        """Map template IDs to factories that build each template on first use"""
         return {
-            TemplateStyle.PROFESSIONAL.value: '''
-                <style>
-                body {
-                    font-family: "Hiragino Kaku Gothic ProN", "Hiragino Sans", "Yu Gothic Medium", "Meiryo", "MS Gothic", sans-serif;
-                    font-size: 14px;
-                    line-height: 1.8;
-                    color: #1e293b;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 40px 32px;
-                    background: white;
-                }
-                h1 {
-                    font-size: 24px;
-                    font-weight: 600;
-                    color: #1e293b;
-                    text-align: center;
-                    margin-bottom: 32px;
-                    padding-bottom: 16px;
-                    border-bottom: 2px solid #22c55e;
-                }
-                h2 {
-                    font-size: 18px;
-                    font-weight: 600;
-                    color: #334155;
-                    margin: 32px 0 16px 0;
-                    padding: 8px 16px;
-                    background: linear-gradient(90deg, #f8f9fa, transparent);
-                    border-left: 4px solid #22c55e;
-                }
-                h3 {
-                    font-size: 16px;
-                    font-weight: 600;
-                    color: #475569;
-                    margin: 24px 0 12px 0;
-                }
-                .card {
-                    background: #f8f9fa;
-                    padding: 16px;
-                    margin: 16px 0;
-                    border-radius: 8px;
-                    border: 1px solid #e2e8f0;
-                }
-                .highlight {
-                    background: linear-gradient(transparent 60%, rgba(34, 197, 94, 0.3) 60%);
-                    padding: 2px 4px;
-                }
-                .footer {
-                    margin-top: 48px;
-                    text-align: center;
-                    font-size: 12px;
-                    color: #94a3b8;
-                    border-top: 1px solid #e2e8f0;
-                    padding-top: 16px;
-                }
-                @media print {
-                    body { padding: 20px; font-size: 12px; }
-                    h1 { border-bottom: 1px solid #000; }
-                }
-                </style>
-            ''',
-            
-            TemplateStyle.MODERN.value: '''
-                <style>
-                body {
-                    font-family: "Hiragino Kaku Gothic ProN", "Hiragino Sans", "Yu Gothic Medium", "Meiryo", sans-serif;
-                    font-size: 14px;
-                    line-height: 1.7;
-                    color: #1e293b;
-                    max-width: 750px;
-                    margin: 0 auto;
-                    padding: 48px 40px;
-                    background: linear-gradient(135deg, #fafafa 0%, #ffffff 100%);
-                }
-                h1 {
-                    font-size: 28px;
-                    font-weight: 700;
-                    color: #0f172a;
-                    text-align: center;
-                    margin-bottom: 40px;
-                    position: relative;
-                }
-                h1:after {
-                    content: '';
-                    position: absolute;
-                    bottom: -12px;
-                    left: 50%;
-                    transform: translateX(-50%);
-                    width: 80px;
-                    height: 3px;
-                    background: linear-gradient(90deg, #22c55e, #ef2b70);
-                    border-radius: 2px;
-                }
-                h2 {
-                    font-size: 20px;
-                    font-weight: 600;
-                    color: #1e293b;
-                    margin: 36px 0 20px 0;
-                    padding: 12px 20px;
-                    background: white;
-                    border-radius: 8px;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-                    border-left: 4px solid #22c55e;
-                }
-                .card {
-                    background: white;
-                    padding: 24px;
-                    margin: 20px 0;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-                    border: 1px solid #e2e8f0;
-                }
-                .badge {
-                    display: inline-block;
-                    background: linear-gradient(135deg, #22c55e, #16a34a);
-                    color: white;
-                    padding: 8px 16px;
-                    border-radius: 20px;
-                    font-size: 13px;
-                    font-weight: 500;
-                    margin-bottom: 20px;
-                }
-                .tag {
-                    background: #f1f5f9;
-                    color: #475569;
-                    padding: 6px 12px;
-                    border-radius: 16px;
-                    font-size: 13px;
-                    border: 1px solid #cbd5e1;
-                    display: inline-block;
-                    margin: 4px;
-                }
-                @media (max-width: 768px) {
-                    body { padding: 24px 20px; }
-                }
-                </style>
-            ''',
-            
-            TemplateStyle.FORMAL.value: '''
-                <style>
-                body {
-                    font-family: "MS Mincho", "Yu Mincho", "Hiragino Mincho ProN", serif;
-                    font-size: 14px;
-                    line-height: 1.9;
-                    color: #1a1a1a;
-                    max-width: 700px;
-                    margin: 0 auto;
-                    padding: 60px 48px;
-                    background: white;
-                }
-                h1 {
-                    font-size: 22px;
-                    font-weight: 600;
-                    color: #1a1a1a;
-                    text-align: center;
-                    margin-bottom: 48px;
-                    padding: 20px 0;
-                    border: 2px solid #1a1a1a;
-                    position: relative;
-                }
-                h1:before, h1:after {
-                    content: '';
-                    position: absolute;
-                    width: 30px;
-                    height: 30px;
-                    border: 2px solid #1a1a1a;
-                }
-                h1:before {
-                    top: -2px;
-                    left: -2px;
-                    border-right: none;
-                    border-bottom: none;
-                }
-                h1:after {
-                    bottom: -2px;
-                    right: -2px;
-                    border-left: none;
-                    border-top: none;
-                }
-                h2 {
-                    font-size: 18px;
-                    font-weight: 600;
-                    color: #1a1a1a;
-                    margin: 40px 0 20px 0;
-                    text-align: center;
-                    padding-bottom: 8px;
-                    border-bottom: 1px solid #666;
-                }
-                .formal-box {
-                    border: 1px solid #ccc;
-                    padding: 20px;
-                    margin: 30px 0;
-                    text-align: center;
-                    background: #fafafa;
-                }
-                .signature-section {
-                    margin-top: 60px;
-                    text-align: right;
-                    padding-right: 40px;
-                }
-                p {
-                    text-indent: 1em;
-                }
-                @media print {
-                    body { padding: 40px; font-size: 12px; }
-                }
-                </style>
-            ''',
-            
-            TemplateStyle.CREATIVE.value: '''
-                <style>
-                body {
-                    font-family: "Hiragino Kaku Gothic ProN", "Hiragino Sans", "Yu Gothic Medium", sans-serif;
-                    font-size: 14px;
-                    line-height: 1.6;
-                    color: #2d3748;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 40px;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                }
-                .content {
-                    background: white;
-                    border-radius: 20px;
-                    padding: 40px;
-                    box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-                }
-                h1 {
-                    font-size: 32px;
-                    font-weight: 800;
-                    background: linear-gradient(135deg, #667eea, #764ba2);
-                    -webkit-background-clip: text;
-                    -webkit-text-fill-color: transparent;
-                    text-align: center;
-                    margin-bottom: 40px;
-                }
-                h2 {
-                    font-size: 24px;
-                    font-weight: 600;
-                    color: #4a5568;
-                    margin: 32px 0 16px 0;
-                    position: relative;
-                    padding-left: 20px;
-                }
-                h2:before {
-                    content: '';
-                    position: absolute;
-                    left: 0;
-                    top: 50%;
-                    transform: translateY(-50%);
-                    width: 4px;
-                    height: 100%;
-                    background: linear-gradient(135deg, #667eea, #764ba2);
-                    border-radius: 2px;
-                }
-                .creative-card {
-                    background: linear-gradient(135deg, #f7fafc, #edf2f7);
-                    border-radius: 16px;
-                    padding: 24px;
-                    margin: 20px 0;
-                    border-left: 4px solid #667eea;
-                    position: relative;
-                    overflow: hidden;
-                }
-                .creative-card:before {
-                    content: '';
-                    position: absolute;
-                    top: 0;
-                    right: 0;
-                    width: 100px;
-                    height: 100px;
-                    background: linear-gradient(135deg, rgba(102, 126, 234, 0.1), rgba(118, 75, 162, 0.1));
-                    border-radius: 50%;
-                    transform: translate(30px, -30px);
-                }
-                .emoji-header {
-                    font-size: 24px;
-                    margin-right: 12px;
-                }
-                </style>
-            ''',
-            
-            TemplateStyle.MINIMAL.value: '''
-                <style>
-                body {
-                    font-family: "Hiragino Kaku Gothic ProN", "Hiragino Sans", "Yu Gothic", sans-serif;
-                    font-size: 15px;
-                    line-height: 1.7;
-                    color: #2d3748;
-                    max-width: 650px;
-                    margin: 0 auto;
-                    padding: 80px 40px;
-                    background: #ffffff;
-                }
-                h1 {
-                    font-size: 28px;
-                    font-weight: 300;
-                    color: #1a202c;
-                    text-align: left;
-                    margin-bottom: 60px;
-                    letter-spacing: -0.5px;
-                }
-                h2 {
-                    font-size: 20px;
-                    font-weight: 400;
-                    color: #2d3748;
-                    margin: 48px 0 16px 0;
-                    letter-spacing: -0.3px;
-                }
-                h3 {
-                    font-size: 16px;
-                    font-weight: 500;
-                    color: #4a5568;
-                    margin: 32px 0 12px 0;
-                }
-                p {
-                    margin: 24px 0;
-                    color: #4a5568;
-                }
-                .minimal-divider {
-                    width: 60px;
-                    height: 1px;
-                    background: #cbd5e0;
-                    margin: 40px 0;
-                    border: none;
-                }
-                .minimal-highlight {
-                    border-left: 2px solid #e2e8f0;
-                    padding-left: 24px;
-                    margin: 32px 0;
-                    font-style: italic;
-                    color: #718096;
-                }
-                .date-simple {
-                    font-size: 13px;
-                    color: #a0aec0;
-                    margin-bottom: 40px;
-                }
-                ul, ol {
-                    color: #4a5568;
-                    margin: 24px 0;
-                }
-                @media print {
-                    body { padding: 40px 20px; }
-                }
-                </style>
-            '''
-        }
-    
-    def _initialize_templates(self) -> List[JapaneseTemplate]:
-        """Initialize all Japanese templates"""
-        styles = self._get_base_styles()
-        
-        templates = []
-        
-        # Meeting Minutes Templates
-        templates.extend([
-            JapaneseTemplate(
-                id="meeting_professional_ja",
+            "meeting_professional_ja": functools.partial(
+                self._build_template,
+                "meeting_professional_ja",
                 name="会議議事録（プロフェッショナル）",
                 description="ビジネス会議に適したプロフェッショナルなデザイン",
-                document_type=DocumentType.MEETING_MINUTES,
-                style=TemplateStyle.PROFESSIONAL,
-                css_styles=styles[TemplateStyle.PROFESSIONAL.value],
-                template_html=self._get_meeting_professional_template(),
-                variables=['meeting_title', 'meeting_date', 'attendees', 'agenda_items', 'discussion_points', 'action_items', 'next_meeting_date', 'meeting_organizer'],
+                variables=_t('meeting_title', 'meeting_date', 'attendees', 'agenda_items', 'discussion_points', 'action_items', 'next_meeting_date', 'meeting_organizer'),
                 category="会議・ミーティング",
-                tags=["ビジネス", "プロフェッショナル", "標準"]
+                tags=_t("ビジネス", "プロフェッショナル", "標準")
             ),
-            JapaneseTemplate(
-                id="meeting_modern_ja",
+            "meeting_modern_ja": functools.partial(
+                self._build_template,
+                "meeting_modern_ja",
                 name="会議議事録（モダン）",
                 description="モダンで視覚的に魅力的なデザイン",
-                document_type=DocumentType.MEETING_MINUTES,
-                style=TemplateStyle.MODERN,
-                css_styles=styles[TemplateStyle.MODERN.value],
-                template_html=self._get_meeting_modern_template(),
-                variables=['meeting_title', 'meeting_date', 'attendees', 'agenda_items', 'discussion_points', 'action_items', 'next_meeting_date', 'meeting_organizer'],
+                variables=_t('meeting_title', 'meeting_date', 'attendees', 'agenda_items', 'discussion_points', 'action_items', 'next_meeting_date', 'meeting_organizer'),
                 category="会議・ミーティング",
-                tags=["モダン", "カラフル", "視覚的"]
+                tags=_t("モダン", "カラフル", "視覚的")
             ),
-            JapaneseTemplate(
-                id="meeting_minimal_ja",
+            "meeting_minimal_ja": functools.partial(
+                self._build_template,
+                "meeting_minimal_ja",
                 name="会議議事録（ミニマル）",
                 description="シンプルで読みやすいミニマルデザイン",
-                document_type=DocumentType.MEETING_MINUTES,
-                style=TemplateStyle.MINIMAL,
-                css_styles=styles[TemplateStyle.MINIMAL.value],
-                template_html=self._get_meeting_minimal_template(),
-                variables=['meeting_title', 'meeting_date', 'attendees', 'agenda_items', 'discussion_points', 'action_items'],
+                variables=_t('meeting_title', 'meeting_date', 'attendees', 'agenda_items', 'discussion_points', 'action_items'),
                 category="会議・ミーティング",
-                tags=["ミニマル", "シンプル", "読みやすい"]
-            )
-        ])
-        
-        # Letter Templates
-        templates.extend([
-            JapaneseTemplate(
-                id="letter_formal_ja",
+                tags=_t("ミニマル", "シンプル", "読みやすい")
+            ),
+            "letter_formal_ja": functools.partial(
+                self._build_template,
+                "letter_formal_ja",
                 name="正式な手紙（フォーマル）",
                 description="正式なビジネス文書に適したクラシックなデザイン",
-                document_type=DocumentType.LETTER,
-                style=TemplateStyle.FORMAL,
-                css_styles=styles[TemplateStyle.FORMAL.value],
-                template_html=self._get_letter_formal_template(),
-                variables=['sender_name', 'sender_title', 'sender_company', 'recipient_name', 'recipient_title', 'recipient_company', 'date', 'subject', 'body'],
+                variables=_t('sender_name', 'sender_title', 'sender_company', 'recipient_name', 'recipient_title', 'recipient_company', 'date', 'subject', 'body'),
                 category="手紙・文書",
-                tags=["フォーマル", "ビジネス", "正式"]
+                tags=_t("フォーマル", "ビジネス", "正式")
             ),
-            JapaneseTemplate(
-                id="letter_modern_ja",
+            "letter_modern_ja": functools.partial(
+                self._build_template,
+                "letter_modern_ja",
                 name="ビジネスレター（モダン）",
                 description="現代的なビジネスレターのデザイン",
-                document_type=DocumentType.LETTER,
-                style=TemplateStyle.MODERN,
-                css_styles=styles[TemplateStyle.MODERN.value],
-                template_html=self._get_letter_modern_template(),
-                variables=['sender_name', 'sender_company', 'recipient_name', 'recipient_company', 'date', 'subject', 'body'],
+                variables=_t('sender_name', 'sender_company', 'recipient_name', 'recipient_company', 'date', 'subject', 'body'),
                 category="手紙・文書",
-                tags=["モダン", "ビジネス", "現代的"]
-            )
-        ])
-        
-        # Report Templates
-        templates.extend([
-            JapaneseTemplate(
-                id="report_professional_ja",
+                tags=_t("モダン", "ビジネス", "現代的")
+            ),
+            "report_professional_ja": functools.partial(
+                self._build_template,
+                "report_professional_ja",
                 name="ビジネスレポート（プロフェッショナル）",
                 description="詳細なビジネスレポートに適したデザイン",
-                document_type=DocumentType.REPORT,
-                style=TemplateStyle.PROFESSIONAL,
-                css_styles=styles[TemplateStyle.PROFESSIONAL.value],
-                template_html=self._get_report_professional_template(),
-                variables=['report_title', 'author', 'date', 'summary', 'content_sections', 'conclusions', 'recommendations'],
+                variables=_t('report_title', 'author', 'date', 'summary', 'content_sections', 'conclusions', 'recommendations'),
                 category="レポート・報告書",
-                tags=["ビジネス", "分析", "プロフェッショナル"]
+                tags=_t("ビジネス", "分析", "プロフェッショナル")
             ),
-            JapaneseTemplate(
-                id="report_creative_ja",
+            "report_creative_ja": functools.partial(
+                self._build_template,
+                "report_creative_ja",
                 name="クリエイティブレポート",
                 description="クリエイティブで印象的なレポートデザイン",
-                document_type=DocumentType.REPORT,
-                style=TemplateStyle.CREATIVE,
-                css_styles=styles[TemplateStyle.CREATIVE.value],
-                template_html=self._get_report_creative_template(),
-                variables=['report_title', 'author', 'date', 'summary', 'content_sections', 'key_insights'],
+                variables=_t('report_title', 'author', 'date', 'summary', 'content_sections', 'key_insights'),
                 category="レポート・報告書",
-                tags=["クリエイティブ", "印象的", "カラフル"]
-            )
-        ])
-        
-        # Flyer Templates
-        templates.extend([
-            JapaneseTemplate(
-                id="flyer_event_ja",
+                tags=_t("クリエイティブ", "印象的", "カラフル")
+            ),
+            "flyer_event_ja": functools.partial(
+                self._build_template,
+                "flyer_event_ja",
                 name="イベントフライヤー",
                 description="イベント告知に最適なデザイン",
-                document_type=DocumentType.FLYER,
-                style=TemplateStyle.MODERN,
-                css_styles=styles[TemplateStyle.MODERN.value],
-                template_html=self._get_flyer_event_template(),
-                variables=['headline', 'event_name', 'event_date', 'event_time', 'location', 'description', 'contact_info', 'call_to_action'],
+                variables=_t('headline', 'event_name', 'event_date', 'event_time', 'location', 'description', 'contact_info', 'call_to_action'),
                 category="フライヤー・チラシ",
-                tags=["イベント", "告知", "カラフル"]
+                tags=_t("イベント", "告知", "カラフル")
             ),
-            JapaneseTemplate(
-                id="flyer_business_ja",
+            "flyer_business_ja": functools.partial(
+                self._build_template,
+                "flyer_business_ja",
                 name="ビジネスフライヤー",
                 description="ビジネス向けのプロフェッショナルなフライヤー",
-                document_type=DocumentType.FLYER,
-                style=TemplateStyle.PROFESSIONAL,
-                css_styles=styles[TemplateStyle.PROFESSIONAL.value],
-                template_html=self._get_flyer_business_template(),
-                variables=['company_name', 'service_title', 'service_description', 'benefits', 'contact_info', 'call_to_action'],
+                variables=_t('company_name', 'service_title', 'service_description', 'benefits', 'contact_info', 'call_to_action'),
                 category="フライヤー・チラシ",
-                tags=["ビジネス", "サービス", "プロフェッショナル"]
+                tags=_t("ビジネス", "サービス", "プロフェッショナル")
             )
-        ])
-        
-        return templates
+        }
+    
+    def _build_template(
+        self,
+        template_id: str,
+        **fields: Any
+    ) -> JapaneseTemplate:
+        """Build and compile a single template"""
+        document_type, style = _TEMPLATE_INDEX[template_id]
+        template_html = _TEMPLATE_SOURCES[template_id]
+        return JapaneseTemplate(
+            id=template_id,
+            document_type=document_type,
+            style=style,
+            css_styles=_BASE_STYLES[style.value],
+            template_html=template_html,
+            # Reason: lex/parse/codegen happens here once instead of on every render
+            compiled_template=_TEMPLATE_ENV.get_template(template_id),
+            **fields
+        )
+    
+    @property
+    def templates(self) -> Tuple[JapaneseTemplate, ...]:
+        """All templates, building any not yet materialized"""
+        return tuple(self.get_template_by_id(template_id) for template_id in self._factories)
     
-    def get_templates_by_type(self, document_type: DocumentType) -> List[JapaneseTemplate]:
+    def get_templates_by_type(self, document_type: DocumentType) -> Tuple[JapaneseTemplate, ...]:
         """Get templates by document type"""
-        return [t for t in self.templates if t.document_type == document_type]
+        templates = self._by_type.get(document_type)
+        if templates is None:
+            templates = self._by_type[document_type] = tuple(
+                self.get_template_by_id(template_id)
+                for template_id in _IDS_BY_TYPE.get(document_type, ())
+            )
+        return templates
     
     def get_template_by_id(self, template_id: str) -> JapaneseTemplate:
         """Get template by ID"""
-        for template in self.templates:
-            if template.id == template_id:
-                return template
-        raise ValueError(f"Template with ID {template_id} not found")
+        template = self._cache.get(template_id)
+        if template is None:
+            factory = self._factories.get(template_id)
+            if factory is None:
+                raise ValueError(f"Template with ID {template_id} not found")
+            template = self._cache[template_id] = factory()
+        return template
     
-    def get_templates_by_style(self, style: TemplateStyle) -> List[JapaneseTemplate]:
+    def get_templates_by_style(self, style: TemplateStyle) -> Tuple[JapaneseTemplate, ...]:
         """Get templates by style"""
-        return [t for t in self.templates if t.style == style]
-    
-    def _get_meeting_professional_template(self) -> str:
-        return '''
-        <div class="date-header">{{ format_date(meeting_date, "%Y年%m月%d日") }}</div>
-        
-        <h1>{{ meeting_title }}</h1>
-        
-        <div class="card">
-            <h2>📋 会議概要</h2>
-            <p><strong>主催者：</strong>{{ meeting_organizer }}</p>
-            <p><strong>出席者：</strong>
-            {% for attendee in attendees %}
-                {{ attendee }}{% if not loop.last %}, {% endif %}
-            {% endfor %}
-            </p>
-        </div>
-        
-        <h2>📝 議題</h2>
-        <ol>
-        {% for item in agenda_items %}
-            <li>{{ item }}</li>
-        {% endfor %}
-        </ol>
-        
-        <h2>💬 討議内容</h2>
-        {{ discussion_points | markdown }}
-        
-        <h2>✅ アクション項目</h2>
-        {% for action in action_items %}
-        <div class="card">
-            <strong>{{ action.task }}</strong><br>
-            担当者: {{ action.owner }}<br>
-            期限: {{ format_date(action.due_date, "%m月%d日") if action.due_date else "未定" }}
-        </div>
-        {% endfor %}
-        
-        <div class="footer">
-            次回会議: {{ format_date(next_meeting_date, "%Y年%m月%d日") if next_meeting_date else "未定" }}
-        </div>
-        '''
-    
-    def _get_meeting_modern_template(self) -> str:
-        return '''
-        <div class="badge">{{ format_date(meeting_date, "%Y年%m月%d日") }}</div>
-        
-        <h1>{{ meeting_title }}</h1>
-        
-        <div class="card">
-            <h2><span class="emoji-header">📋</span>会議概要</h2>
-            <p><strong>主催者：</strong>{{ meeting_organizer }}</p>
-            <div style="margin-top: 16px;">
-            {% for attendee in attendees %}
-                <span class="tag">{{ attendee }}</span>
-            {% endfor %}
-            </div>
-        </div>
-        
-        <h2><span class="emoji-header">📝</span>議題</h2>
-        <div class="card">
-            <ol>
-            {% for item in agenda_items %}
-                <li>{{ item }}</li>
-            {% endfor %}
-            </ol>
-        </div>
-        
-        <h2><span class="emoji-header">💬</span>討議内容</h2>
-        <div class="card">
-            {{ discussion_points | markdown }}
-        </div>
-        
-        <h2><span class="emoji-header">✅</span>アクション項目</h2>
-        {% for action in action_items %}
-        <div class="card" style="border-left: 4px solid #3b82f6;">
-            <strong>{{ action.task }}</strong><br>
-            担当者: {{ action.owner }}<br>
-            期限: {{ format_date(action.due_date, "%m月%d日") if action.due_date else "未定" }}
-        </div>
-        {% endfor %}
-        '''
-    
-    def _get_meeting_minimal_template(self) -> str:
-        return '''
-        <div class="date-simple">{{ format_date(meeting_date, "%Y年%m月%d日") }}</div>
-        
-        <h1>{{ meeting_title }}</h1>
-        
-        <hr class="minimal-divider">
-        
-        <h2>出席者</h2>
-        <p>
-        {% for attendee in attendees %}
-            {{ attendee }}{% if not loop.last %}, {% endif %}
-        {% endfor %}
-        </p>
-        
-        <h2>議題</h2>
-        {% for item in agenda_items %}
-        <p>{{ loop.index }}. {{ item }}</p>
-        {% endfor %}
-        
-        <h2>討議内容</h2>
-        {{ discussion_points | markdown }}
-        
-        <h2>アクション項目</h2>
-        {% for action in action_items %}
-        <div class="minimal-highlight">
-            {{ action.task }} ({{ action.owner }})
-        </div>
-        {% endfor %}
-        '''
-    
-    def _get_letter_formal_template(self) -> str:
-        return '''
-        <div class="date-line">{{ format_date(date, "%Y年%m月%d日") }}</div>
-        
-        <div class="formal-box">
-            {{ recipient_company }}<br>
-            {{ recipient_title }} {{ recipient_name }} 様
-        </div>
-        
-        <h1>{{ subject }}</h1>
-        
-        <p>拝啓　時下ますますご清栄のこととお慶び申し上げます。</p>
-        
-        {{ body | markdown }}
-        
-        <p>何かご不明な点がございましたら、お気軽にお問い合わせください。</p>
-        <p>今後ともよろしくお願い申し上げます。</p>
-        
-        <div class="signature-section">
-            <p>敬具</p>
-            <div style="margin-top: 40px;">
-                {{ sender_company }}<br>
-                {{ sender_title }}<br>
-                <strong>{{ sender_name }}</strong>
-            </div>
-        </div>
-        '''
+        templates = self._by_style.get(style)
+        if templates is None:
+            templates = self._by_style[style] = tuple(
+                self.get_template_by_id(template_id)
+                for template_id in _IDS_BY_STYLE.get(style, ())
+            )
+        return templates
     
-    def _get_letter_modern_template(self) -> str:
-        return '''
-        <div class="badge">{{ format_date(date, "%Y年%m月%d日") }}</div>
-        
-        <div class="card">
-            <strong>宛先:</strong> {{ recipient_company }} {{ recipient_name }} 様
-        </div>
-        
-        <h1>{{ subject }}</h1>
+    def render(self, template_id: str, variables: Mapping[str, Any]) -> str:
+        """Render a template by ID, reusing the output for repeated identical variables"""
+        template = self.get_template_by_id(template_id)
+        digest = _context_digest(variables)
+        if digest is None:
+            return template.render(variables)
         
-        <div class="card">
-            {{ body | markdown }}
-        </div>
+        key = (template_id, digest)
+        rendered = self._render_cache.get(key)
+        if rendered is not None:
+            self._render_cache.move_to_end(key)
+            return rendered
         
-        <div class="card" style="text-align: right;">
-            <strong>{{ sender_company }}</strong><br>
-            {{ sender_name }}
-        </div>
-        '''
+        rendered = self._render_cache[key] = template.render(variables)
+        if len(self._render_cache) > RENDER_CACHE_MAX_SIZE:
+            self._render_cache.popitem(last=False)
+        return rendered
     
-    def _get_report_professional_template(self) -> str:
-        return '''
-        <div class="date-header">{{ format_date(date, "%Y年%m月%d日") }}</div>
-        
-        <h1>{{ report_title }}</h1>
+    def prerender_static(self, template_id: str, variables: Mapping[str, Any]) -> str:
+        """
+        Bake a template to static HTML from fully resolved variables
         
-        <div class="card">
-            <h2>📊 概要</h2>
-            <p><strong>作成者：</strong>{{ author }}</p>
-            {{ summary | markdown }}
-        </div>
-        
-        <h2>📋 詳細内容</h2>
-        {% for section in content_sections %}
-        <div class="card">
-            <h3>{{ section.title }}</h3>
-            {{ section.content | markdown }}
-        </div>
-        {% endfor %}
+        Each template is rendered once per set of variables and served from
+        the render cache afterwards; values that are not plain JSON data
+        (such as ``Markup``) are rendered without the cache.
         
-        <h2>💡 結論・提案</h2>
-        <div class="card">
-            {{ conclusions | markdown }}
+        Args:
+            template_id: Library template ID
+            variables: Values for every variable the template reads
             
-            {% if recommendations %}
-            <h3>推奨事項</h3>
-            <ul>
-            {% for rec in recommendations %}
-                <li class="highlight">{{ rec }}</li>
-            {% endfor %}
-            </ul>
-            {% endif %}
-        </div>
-        '''
-    
-    def _get_report_creative_template(self) -> str:
-        return '''
-        <div class="content">
-            <div class="badge">{{ format_date(date, "%Y年%m月%d日") }}</div>
-            
-            <h1>{{ report_title }}</h1>
-            
-            <div class="creative-card">
-                <h2><span class="emoji-header">📊</span>概要</h2>
-                <p><strong>作成者：</strong>{{ author }}</p>
-                {{ summary | markdown }}
-            </div>
-            
-            {% for section in content_sections %}
-            <div class="creative-card">
-                <h2><span class="emoji-header">📋</span>{{ section.title }}</h2>
-                {{ section.content | markdown }}
-            </div>
-            {% endfor %}
-            
-            <div class="creative-card">
-                <h2><span class="emoji-header">💡</span>重要なインサイト</h2>
-                {% for insight in key_insights %}
-                <div class="highlight">{{ insight }}</div>
-                {% endfor %}
-            </div>
-        </div>
-        '''
-    
-    def _get_flyer_event_template(self) -> str:
-        return '''
-        <h1 style="font-size: 32px; color: #22c55e; text-shadow: 2px 2px 4px rgba(0,0,0,0.1);">
-            {{ headline }}
-        </h1>
-        
-        <div class="card" style="text-align: center; background: linear-gradient(135deg, #f8f9fa, #e2e8f0);">
-            <h2 style="font-size: 24px; margin-bottom: 24px;">{{ event_name }}</h2>
+        Returns:
+            Rendered HTML
             
-            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 24px; margin: 24px 0;">
-                <div>
-                    <h3>📅 日時</h3>
-                    <p><strong>{{ format_date(event_date, "%Y年%m月%d日") }}</strong></p>
-                    <p>{{ event_time }}</p>
-                </div>
-                <div>
-                    <h3>📍 場所</h3>
-                    <p>{{ location }}</p>
-                </div>
-            </div>
-        </div>
-        
-        <div class="card">
-            {{ description | markdown }}
-        </div>
-        
-        <div class="card" style="background: #dcfce7; border-left-color: #22c55e; text-align: center;">
-            <h3 style="color: #15803d;">{{ call_to_action }}</h3>
-            <p><strong>お問い合わせ：</strong>{{ contact_info }}</p>
-        </div>
-        '''
-    
-    def _get_flyer_business_template(self) -> str:
-        return '''
-        <h1 style="text-align: center;">{{ company_name }}</h1>
-        
-        <div class="card" style="text-align: center;">
-            <h2>{{ service_title }}</h2>
-            {{ service_description | markdown }}
-        </div>
-        
-        <h2>✨ サービスの特徴</h2>
-        {% for benefit in benefits %}
-        <div class="card">
-            <span class="highlight">{{ benefit }}</span>
-        </div>
-        {% endfor %}
-        
-        <div class="card" style="background: #f0f9ff; border-left-color: #0ea5e9; text-align: center;">
-            <h3>{{ call_to_action }}</h3>
-            <p><strong>お問い合わせ：</strong>{{ contact_info }}</p>
-        </div>
-        
-        <div class="footer">
-            {{ company_name }} - プロフェッショナルなサービスをお届けします
-        </div>
-        '''
\ No newline at end of file
+        Raises:
+            ValueError: If the template is unknown or variables are missing
+        """
+        # Reason: reports unknown IDs as ValueError before _required_variables
+        # would fail on the source lookup with a KeyError
+        self.get_template_by_id(template_id)
+        missing = _required_variables(template_id) - variables.keys()
+        if missing:
+            raise ValueError(f"Missing variables for {template_id}: {', '.join(sorted(missing))}")
+        return self.render(template_id, variables)
+
+
+@functools.lru_cache(maxsize=1)
+def get_library() -> JapaneseTemplateLibrary:
+    """Shared template library; use this instead of constructing one per request"""
+    return JapaneseTemplateLibrary()
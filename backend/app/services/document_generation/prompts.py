@@ -0,0 +1,165 @@
+"""
+Prompt text for AI document generation
+"""
+from types import MappingProxyType
+from typing import Mapping
+from ...database.models import DocumentType
+
+# Document type specific prompts
+MEETING_MINUTES_PROMPT = """以下を含むプロフェッショナルな議事録を生成してください：
+- 会議タイトル、日付、参加者
+- 議論されたアジェンダ項目
+- 決定された重要事項
+- 担当者が割り当てられたアクションアイテム
+- 次のステップとフォローアップ日程
+ビジネス文書に適した明確で簡潔な日本語を使用してください。"""
+
+LETTER_PROMPT = """以下を含む正式な手紙を生成してください：
+- 送信者と受信者の情報を含む適切なヘッダー
+- 適切な挨拶
+- 明確で構造化された本文段落
+- プロフェッショナルな結び
+- 署名欄
+適切な敬語とビジネスマナーを維持してください。"""
+
+REPORT_PROMPT = """以下を含む包括的な報告書を生成してください：
+- エグゼクティブサマリー
+- 説明的な見出しを持つ明確なセクション
+- データと調査結果の提示
+- 分析と洞察
+- 結論と提案
+プロフェッショナルな日本語と論理的な構造を使用してください。"""
+
+ANNOUNCEMENT_PROMPT = """以下を含む明確なお知らせを生成してください：
+- 注意を引く見出し
+- 重要な詳細（何を、いつ、どこで、誰が）
+- 明確な行動喚起
+- 必要に応じて連絡先情報
+魅力的でプロフェッショナルな日本語を使用してください。"""
+
+FLYER_PROMPT = """以下を含む魅力的なフライヤーを生成してください：
+- 目を引く見出し
+- イベントや製品の詳細
+- 日付、時間、場所
+- メリットやハイライト
+- 明確な行動喚起
+- 連絡先情報
+マーケティングに適した説得力のある魅力的な日本語を使用してください。"""
+
+CUSTOM_PROMPT = """提供されたコンテンツに基づいて、よく構造化された文書を生成してください。
+適切な見出しとセクションで情報を論理的に整理してください。
+対象読者に適した明確でプロフェッショナルな日本語を使用してください。"""
+
+GENERATION_PROMPTS: Mapping[DocumentType, str] = MappingProxyType({
+    DocumentType.MEETING_MINUTES: MEETING_MINUTES_PROMPT,
+    DocumentType.LETTER: LETTER_PROMPT,
+    DocumentType.REPORT: REPORT_PROMPT,
+    DocumentType.ANNOUNCEMENT: ANNOUNCEMENT_PROMPT,
+    DocumentType.FLYER: FLYER_PROMPT,
+    DocumentType.CUSTOM: CUSTOM_PROMPT
+})
+
+# Reason: OpenAI caches identical prompt prefixes, so the static instructions and
+# JSON schema come first and the per-request data is appended at the end.
+ANALYSIS_PREFIX_TEMPLATE = """以下の文字起こしを分析して、{document_type}の生成に必要な重要な情報を抽出してください。
+
+以下の項目を抽出してください：
+1. 主要なトピックとテーマ
+2. 主要な参加者（言及されている場合）
+3. 重要な日付と時間
+4. アクションアイテムや決定事項
+5. 連絡先情報
+6. 文書のトーンと形式レベル
+7. 文書構造の提案
+
+以下の構造でJSON形式で分析結果を返してください（すべて日本語で）：
+{{
+    "main_topics": ["トピック1", "トピック2"],
+    "participants": ["参加者1", "参加者2"],
+    "dates_times": ["日付1", "時間1"],
+    "action_items": ["アクション1", "アクション2"],
+    "contact_info": ["メール", "電話"],
+    "tone": "formal/casual/professional",
+    "structure_suggestions": ["セクション1", "セクション2"],
+    "key_points": ["ポイント1", "ポイント2"],
+    "document_title_suggestions": ["タイトル1", "タイトル2"]
+}}"""
+
+GENERATION_PREFIX_TEMPLATE = """{base_prompt}
+
+以下の要素を含む、よく構造化された{document_type}を生成してください：
+1. 適切なフォーマット
+2. 明確なセクションとヘッダー
+3. プロフェッショナルな日本語
+4. すべての重要な情報を含める
+5. 文書タイプに適した構造
+
+以下のJSON形式で結果を返してください（すべて日本語で）：
+{{
+    "title": "文書タイトル",
+    "sections": [
+        {{
+            "heading": "セクション見出し",
+            "content": "セクション内容"
+        }}
+    ],
+    "metadata": {{
+        "word_count": 123,
+        "estimated_reading_time": "2分",
+        "formality_level": "professional"
+    }},
+    "template_variables": {{
+        "variable_name": "value"
+    }}
+}}"""
+
+# Byte-identical prompt prefixes per document type, built once at import
+ANALYSIS_PREFIXES: Mapping[DocumentType, str] = MappingProxyType({
+    doc_type: ANALYSIS_PREFIX_TEMPLATE.format(document_type=doc_type.value)
+    for doc_type in GENERATION_PROMPTS
+})
+
+GENERATION_PREFIXES: Mapping[DocumentType, str] = MappingProxyType({
+    doc_type: GENERATION_PREFIX_TEMPLATE.format(base_prompt=prompt, document_type=doc_type.value)
+    for doc_type, prompt in GENERATION_PROMPTS.items()
+})
+
+COMBINED_PREFIX_TEMPLATE = """以下の2つのタスクを1回の応答で実行してください。
+
+### ANALYSIS
+{analysis_prefix}
+
+### DOCUMENT
+{generation_prefix}
+
+結果は {{"analysis": ANALYSISの結果, "structured_content": DOCUMENTの結果}} の形式の1つのJSONオブジェクトで返してください。"""
+
+COMBINED_PREFIXES: Mapping[DocumentType, str] = MappingProxyType({
+    doc_type: COMBINED_PREFIX_TEMPLATE.format(
+        analysis_prefix=ANALYSIS_PREFIXES[doc_type],
+        generation_prefix=GENERATION_PREFIXES[doc_type]
+    )
+    for doc_type in GENERATION_PROMPTS
+})
+
+BATCH_ANALYSIS_PREFIX = ANALYSIS_PREFIX_TEMPLATE.format(
+    document_type="各リクエストで指定された文書タイプ"
+) + """
+
+複数のリクエストが「--- REQUEST #番号 ---」で区切られて渡されます。各リクエストを個別に分析し、
+{"results": [{"id": 番号, "analysis": 上記の構造の分析結果}]} の形式で、すべてのリクエストの結果を返してください。"""
+
+# Style instruction fragments
+LENGTH_INSTRUCTIONS: Mapping[str, str] = MappingProxyType({
+    "short": "簡潔で要点を絞った内容にしてください",
+    "medium": "適度な詳細と説明を提供してください",
+    "long": "包括的な詳細と説明を含めてください"
+})
+
+FORMALITY_INSTRUCTIONS: Mapping[str, str] = MappingProxyType({
+    "casual": "会話的で親しみやすい日本語を使用してください",
+    "formal": "正式で伝統的なビジネス日本語を使用してください",
+    "professional": "プロフェッショナルで明確かつ直接的な日本語を使用してください"
+})
+
+DEFAULT_STYLE_INSTRUCTION = "明確でプロフェッショナルな日本語を使用してください"
@@ -0,0 +1,82 @@
+"""
+Redis-backed cache of AI-generated document content shared across workers
+"""
+from typing import Any, Dict, Optional, Union
+import asyncio
+import hashlib
+import logging
+import unicodedata
+import redis.asyncio as redis
+from ...config import settings
+
+try:
+    import orjson as _json_fast
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    import json as _json_fast
+
+logger = logging.getLogger(__name__)
+
+# Generated content is reused for one day
+DOCUMENT_CACHE_TTL_SECONDS = 24 * 3600
+
+
+def normalize_transcription(text: str) -> str:
+    """Normalize width variants and whitespace so trivially different transcriptions match"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class DocumentCache:
+    """Exact-match cache of structured content keyed by normalized inputs"""
+
+    def __init__(self, redis_url: str = settings.REDIS_URL, ttl: int = DOCUMENT_CACHE_TTL_SECONDS):
+        self.client = redis.from_url(redis_url, max_connections=settings.REDIS_MAX_CONNECTIONS)
+        self.ttl = ttl
+
+    @staticmethod
+    def build_key(*parts: str) -> str:
+        """Build cache key from the inputs that determine the generated content"""
+        digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+        return f"doc_cache:{digest}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached content, or None on miss or Redis failure"""
+        try:
+            data = await self.client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Document cache read failed: {e}")
+            return None
+        return _json_fast.loads(data) if data else None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store content; failures are logged and ignored"""
+        try:
+            payload = _json_fast.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Document cache write failed: {e}")
+            return
+        await self._write(key, payload)
+
+    def schedule_set(self, key: str, value: Dict[str, Any]) -> "asyncio.Task":
+        """Serialize ``value`` now and write it in a background task
+
+        The snapshot is taken before returning, so the caller may keep
+        mutating ``value`` while the write is in flight.
+        """
+        try:
+            payload = _json_fast.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Document cache write failed: {e}")
+            payload = None
+        return asyncio.create_task(self._write(key, payload))
+
+    async def _write(self, key: str, payload: Optional[Union[bytes, str]]):
+        if payload is None:
+            return
+        try:
+            await self.client.set(key, payload, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Document cache write failed: {e}")
+
+
+# Global cache instance
+document_cache = DocumentCache()
@@ -1,17 +1,181 @@
 """
 Advanced template engine for document generation
 """
-from typing import Dict, Any, List, Optional
-from jinja2 import Environment, BaseLoader, TemplateNotFound, select_autoescape
+from typing import AsyncIterator, Callable, Dict, Any, FrozenSet, List, Mapping, Optional, Tuple
+from jinja2 import Environment, BaseLoader, FileSystemBytecodeCache, Template as JinjaTemplate, TemplateNotFound
+from jinja2.meta import find_undeclared_variables
+from markupsafe import Markup, escape
 from dataclasses import dataclass
-from datetime import datetime
-import re
+from collections import OrderedDict
+from datetime import date, datetime
+from types import MappingProxyType
+import functools
+import os
+import stat
 import logging
+from ...config import settings
 from ...database.models import Template, DocumentType
 from ...database.connection import get_db_context
+from .template_filters import (
+    bullet_list,
+    create_list,
+    format_currency,
+    format_phone,
+    numbered_list,
+    title_case,
+    truncate_words,
+    word_count,
+)
+
+try:
+    import mistune
+except ImportError:  # pragma: no cover - mistune is an optional speedup
+    mistune = None
 
 logger = logging.getLogger(__name__)
 
+# Markdown bodies often repeat across sections and re-renders
+MARKDOWN_CACHE_SIZE = 512
+FORMAT_DATE_CACHE_SIZE = 1024
+
+# Built once; mistune renderers are reusable across calls. Raw HTML in the
+# input is escaped because the text comes from transcriptions and users.
+_markdown_renderer = (
+    mistune.create_markdown(escape=True, plugins=["table", "strikethrough"])
+    if mistune is not None else None
+)
+
+
+def _jp_date(date_obj) -> str:
+    return f"{date_obj.year}年{date_obj.month}月{date_obj.day}日"
+
+
+def _jp_month_day(date_obj) -> str:
+    return f"{date_obj.month}月{date_obj.day}日"
+
+
+# Formats the Japanese templates use, built directly instead of through strftime.
+# Japanese dates drop leading zeros, hence the glibc "%-m"/"%-d" directives.
+_DATE_FORMATTERS = {
+    "%Y年%-m月%-d日": _jp_date,
+    "%-m月%-d日": _jp_month_day,
+}
+
+
+@functools.lru_cache(maxsize=FORMAT_DATE_CACHE_SIZE)
+def _format_date_value(date_obj: date, format_pattern: str) -> str:
+    formatter = _DATE_FORMATTERS.get(format_pattern)
+    if formatter is not None:
+        return formatter(date_obj)
+    return date_obj.strftime(format_pattern)
+
+
+@functools.singledispatch
+def format_date(value: Any, format_pattern: str = "%B %d, %Y") -> Any:
+    """Format a date; values that are neither dates nor ISO strings are returned unchanged
+    
+    Results are memoized since a document repeats few dates and patterns.
+    """
+    return value
+
+
+@format_date.register(str)
+# Reason: typed so a Markup returned unchanged is never served for a plain str
+@functools.lru_cache(maxsize=FORMAT_DATE_CACHE_SIZE, typed=True)
+def _format_date_str(value: str, format_pattern: str = "%B %d, %Y") -> str:
+    try:
+        # Reason: fromisoformat accepts a trailing "Z" since Python 3.11
+        return _format_date_value(datetime.fromisoformat(value), format_pattern)
+    except (TypeError, ValueError):
+        return value
+
+
+@format_date.register
+def _format_date_obj(value: date, format_pattern: str = "%B %d, %Y") -> str:
+    try:
+        return _format_date_value(value, format_pattern)
+    except (TypeError, ValueError):
+        return value
+
+
+def _find_single_star(text: str, start: int, end: int) -> int:
+    """Index of the next lone ``*`` in ``text[start:end]``, skipping ``**`` runs, or -1"""
+    while True:
+        star = text.find('*', start, end)
+        if star == -1 or not text.startswith('**', star):
+            return star
+        start = star + 2
+
+
+def _markdown_inline(text: str) -> str:
+    """Convert **bold**, *italic* and blank-line paragraph breaks in one left-to-right scan
+    
+    Emphasis closes at the nearest matching marker on the same line and
+    must not be empty; markers nested inside it are converted too.
+    Unmatched asterisks are kept as text.
+    """
+    out = []
+    i = 0
+    para = text.find('\n\n')
+    while True:
+        star = text.find('*', i)
+        if para != -1 and para < i:
+            para = text.find('\n\n', i)
+        if star == -1 and para == -1:
+            break
+        
+        if para != -1 and (star == -1 or para < star):
+            out.append(text[i:para])
+            out.append('</p><p>')
+            i = para + 2
+            continue
+        
+        line_end = text.find('\n', star)
+        if line_end == -1:
+            line_end = len(text)
+        
+        if text.startswith('**', star):
+            close = text.find('**', star + 3, line_end)
+            if close != -1 and text.startswith('*', star + 2) and text.startswith('***', close):
+                # ***text*** is bold italic: close on the outer pair so *text* stays inside
+                close += 1
+            if close != -1:
+                out.append(text[i:star])
+                out.append(f'<strong>{_markdown_inline(text[star + 2:close])}</strong>')
+                i = close + 2
+            else:
+                # Reason: an unclosed ** must not pair with its own second asterisk
+                out.append(text[i:star + 1])
+                i = star + 1
+            continue
+        
+        close = _find_single_star(text, star + 2, line_end)
+        if close != -1:
+            out.append(text[i:star])
+            out.append(f'<em>{_markdown_inline(text[star + 1:close])}</em>')
+            i = close + 1
+        else:
+            out.append(text[i:star + 1])
+            i = star + 1
+    
+    out.append(text[i:])
+    return ''.join(out)
+
+
+# Reason: typed so an already-safe Markup input never shares an entry with an equal plain str
+@functools.lru_cache(maxsize=MARKDOWN_CACHE_SIZE, typed=True)
+def markdown_to_html(text: str) -> Markup:
+    """Convert markdown to HTML, using mistune when it is installed
+    
+    HTML in ``text`` is escaped rather than passed through, on both paths,
+    and the result is ``Markup`` so autoescaping templates keep the tags.
+    """
+    if _markdown_renderer is not None:
+        return Markup(_markdown_renderer(text))
+    
+    # Basic markdown conversion; escaping leaves the asterisks and newlines it scans for intact
+    return Markup(f'<p>{_markdown_inline(escape(text))}</p>'.replace('<p></p>', ''))
+
 
 @dataclass
 class TemplateVariable:
@@ -38,6 +202,45 @@ class DocumentTemplate:
     user_id: Optional[int] = None
 
 
+# Document types by their value, for parsing "template_type:template_name" loader names
+_DOCUMENT_TYPES_BY_VALUE = {document_type.value: document_type for document_type in DocumentType}
+
+
+class _TemplateSourceCache:
+    """In-memory template sources, versioned so updates invalidate compiled templates"""
+    
+    def __init__(self):
+        self._sources: Dict[Tuple[Optional[int], str], Tuple[str, int]] = {}
+        self._versions: Dict[Tuple[Optional[int], str], int] = {}
+    
+    def get(self, key: Tuple[Optional[int], str]) -> Optional[Tuple[str, int]]:
+        """Return (source, version), or None if the source is not loaded"""
+        return self._sources.get(key)
+    
+    def put(self, key: Tuple[Optional[int], str], source: str) -> int:
+        """Store a freshly loaded source and return its version"""
+        version = self._versions.get(key, 0)
+        self._sources[key] = (source, version)
+        return version
+    
+    def current_version(self, key: Tuple[Optional[int], str]) -> int:
+        return self._versions.get(key, 0)
+    
+    def invalidate(self, key: Tuple[Optional[int], str]):
+        """Drop a source and bump its version so Jinja reloads it on next use"""
+        self._sources.pop(key, None)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+
+# Shared by every loader; keyed by (user_id, template name)
+_template_sources = _TemplateSourceCache()
+
+
+def invalidate_template(user_id: Optional[int], template: str):
+    """Mark a stored template as changed, e.g. after it is edited"""
+    _template_sources.invalidate((user_id, template))
+
+
 class DatabaseTemplateLoader(BaseLoader):
     """Custom Jinja2 loader for database-stored templates"""
     
@@ -45,26 +248,46 @@ class DatabaseTemplateLoader(BaseLoader):
         self.user_id = user_id
     
     def get_source(self, environment, template):
+        """Load template source, hitting the database only on first use or after invalidation"""
+        key = (self.user_id, template)
+        cached = _template_sources.get(key)
+        if cached is None:
+            source = self._load_source(template)
+            version = _template_sources.put(key, source)
+        else:
+            source, version = cached
+        
+        # Reason: Jinja calls uptodate before reusing a compiled template, so a bumped version forces a reload
+        return source, template, lambda: _template_sources.current_version(key) == version
+    
+    def _load_source(self, template: str) -> str:
         """Load template from database"""
         # Template format: "template_type:template_name" or just "template_id"
-        try:
-            if ':' in template:
-                doc_type_str, template_name = template.split(':', 1)
-                doc_type = DocumentType(doc_type_str)
-                template_obj = self._get_template_by_type_and_name(doc_type, template_name)
-            else:
-                template_id = int(template)
-                template_obj = self._get_template_by_id(template_id)
-            
-            if not template_obj:
+        # Reason: names are validated up front so a miss costs one raise, not a caught-and-rethrown chain
+        if ':' in template:
+            doc_type_str, template_name = template.split(':', 1)
+            doc_type = _DOCUMENT_TYPES_BY_VALUE.get(doc_type_str)
+            if doc_type is None:
                 raise TemplateNotFound(template)
-            
-            # Return source, filename, uptodate function
-            return template_obj.template_content, template, lambda: True
-            
+            template_obj = self._lookup(template, self._get_template_by_type_and_name, doc_type, template_name)
+        elif template.isdigit():
+            template_obj = self._lookup(template, self._get_template_by_id, int(template))
+        else:
+            raise TemplateNotFound(template)
+        
+        if not template_obj:
+            raise TemplateNotFound(template)
+        
+        return template_obj.template_content
+    
+    @staticmethod
+    def _lookup(template: str, query: Callable[..., Optional[Template]], *args: Any) -> Optional[Template]:
+        """Run a database lookup, logging failures before letting them propagate"""
+        try:
+            return query(*args)
         except Exception as e:
             logger.error(f"Failed to load template {template}: {e}")
-            raise TemplateNotFound(template)
+            raise
     
     def _get_template_by_id(self, template_id: int) -> Optional[Template]:
         """Get template by ID"""
@@ -77,235 +300,151 @@ class DatabaseTemplateLoader(BaseLoader):
         pass
 
 
-class AdvancedTemplateEngine:
-    """Advanced template engine with custom functions and filters"""
-    
-    def __init__(self, user_id: Optional[int] = None):
-        self.user_id = user_id
-        self.env = self._create_environment()
-        self._register_custom_functions()
-        self._register_custom_filters()
-    
-    def _create_environment(self) -> Environment:
-        """Create Jinja2 environment with custom loader"""
-        env = Environment(
-            loader=DatabaseTemplateLoader(self.user_id),
-            autoescape=select_autoescape(['html', 'xml']),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            keep_trailing_newline=True
-        )
-        return env
-    
-    def _register_custom_functions(self):
-        """Register custom functions for templates"""
-        
-        def format_date(date_str: str, format_pattern: str = "%B %d, %Y") -> str:
-            """Format date string"""
-            try:
-                if isinstance(date_str, str):
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                else:
-                    date_obj = date_str
-                return date_obj.strftime(format_pattern)
-            except:
-                return date_str
-        
-        def current_date(format_pattern: str = "%B %d, %Y") -> str:
-            """Get current date formatted"""
-            return datetime.now().strftime(format_pattern)
-        
-        def format_currency(amount: float, currency: str = "USD") -> str:
-            """Format currency amount"""
-            if currency == "USD":
-                return f"${amount:,.2f}"
-            elif currency == "EUR":
-                return f"€{amount:,.2f}"
-            else:
-                return f"{amount:,.2f} {currency}"
-        
-        def create_list(items: str, separator: str = ",") -> List[str]:
-            """Create list from separated string"""
-            return [item.strip() for item in items.split(separator) if item.strip()]
-        
-        def format_phone(phone: str) -> str:
-            """Format phone number"""
-            # Remove all non-digit characters
-            digits = re.sub(r'\D', '', phone)
-            if len(digits) == 10:
-                return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
-            elif len(digits) == 11 and digits[0] == '1':
-                return f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
-            return phone
-        
-        def word_count(text: str) -> int:
-            """Count words in text"""
-            return len(text.split())
-        
-        def truncate_words(text: str, word_limit: int, suffix: str = "...") -> str:
-            """Truncate text to word limit"""
-            words = text.split()
-            if len(words) <= word_limit:
-                return text
-            return " ".join(words[:word_limit]) + suffix
-        
-        # Register functions as globals
-        self.env.globals.update({
-            'format_date': format_date,
-            'current_date': current_date,
-            'format_currency': format_currency,
-            'create_list': create_list,
-            'format_phone': format_phone,
-            'word_count': word_count,
-            'truncate_words': truncate_words,
-        })
-    
-    def _register_custom_filters(self):
-        """Register custom filters for templates"""
-        
-        def title_case(text: str) -> str:
-            """Convert to title case with proper handling of articles"""
-            articles = {'a', 'an', 'the', 'and', 'but', 'or', 'for', 'nor', 'on', 'at', 'to', 'from', 'by'}
-            words = text.lower().split()
-            if not words:
-                return text
-            
-            # Always capitalize first word
-            result = [words[0].capitalize()]
-            
-            for word in words[1:]:
-                if word in articles:
-                    result.append(word)
-                else:
-                    result.append(word.capitalize())
-            
-            return ' '.join(result)
-        
-        def currency(amount: float, currency_code: str = "USD") -> str:
-            """Format as currency"""
-            return self.env.globals['format_currency'](amount, currency_code)
-        
-        def phone(phone_number: str) -> str:
-            """Format phone number"""
-            return self.env.globals['format_phone'](phone_number)
-        
-        def markdown_to_html(text: str) -> str:
-            """Convert basic markdown to HTML"""
-            # Basic markdown conversion
-            text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-            text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
-            text = re.sub(r'\n\n', '</p><p>', text)
-            text = f'<p>{text}</p>'
-            text = re.sub(r'<p></p>', '', text)
-            return text
-        
-        def bullet_list(items: List[str], bullet_char: str = "•") -> str:
-            """Create bullet list HTML"""
-            if not items:
-                return ""
-            list_items = [f"<li>{item}</li>" for item in items]
-            return f"<ul>{''.join(list_items)}</ul>"
-        
-        def numbered_list(items: List[str]) -> str:
-            """Create numbered list HTML"""
-            if not items:
-                return ""
-            list_items = [f"<li>{item}</li>" for item in items]
-            return f"<ol>{''.join(list_items)}</ol>"
-        
-        # Register filters
-        self.env.filters.update({
-            'title_case': title_case,
-            'currency': currency,
-            'phone': phone,
-            'markdown': markdown_to_html,
-            'bullets': bullet_list,
-            'numbered': numbered_list,
-        })
+def current_date(format_pattern: str = "%B %d, %Y") -> str:
+    """Get current date formatted"""
+    return datetime.now().strftime(format_pattern)
+
+
+@functools.lru_cache(maxsize=4)
+def _long_date(day: date) -> str:
+    """Format a day as e.g. "July 12, 2024"; only changes once a day"""
+    return day.strftime("%B %d, %Y")
+
+
+# Functions available to every template
+_TEMPLATE_GLOBALS = {
+    'format_date': format_date,
+    'current_date': current_date,
+    'format_currency': format_currency,
+    'create_list': create_list,
+    'format_phone': format_phone,
+    'word_count': word_count,
+    'truncate_words': truncate_words,
+}
+
+# Filters available to every template
+_TEMPLATE_FILTERS = {
+    'title_case': title_case,
+    'currency': format_currency,
+    'phone': format_phone,
+    'markdown': markdown_to_html,
+    'bullets': bullet_list,
+    'numbered': numbered_list,
+}
+
+# Variables _render_variables supplies to every render, so templates never need them from callers
+_COMMON_VARIABLES: FrozenSet[str] = frozenset({'current_date', 'current_time', 'current_year'})
+
+# Bump whenever _build_environment options change so stale bytecode is ignored
+_BYTECODE_CACHE_VERSION = 3
+
+
+def create_bytecode_cache(namespace: str) -> Optional[FileSystemBytecodeCache]:
+    """On-disk bytecode cache so restarted workers skip recompiling templates
     
-    async def render_template(
-        self,
-        template_id: Optional[int] = None,
-        template_content: Optional[str] = None,
-        variables: Dict[str, Any] = None,
-        document_type: Optional[DocumentType] = None
-    ) -> str:
-        """Render template with provided variables"""
-        
-        variables = variables or {}
-        
-        try:
-            if template_content:
-                # Use provided template content directly
-                template = self.env.from_string(template_content)
-            elif template_id:
-                # Load template from database by ID
-                template = self.env.get_template(str(template_id))
-            elif document_type:
-                # Load default template for document type
-                template = self.env.get_template(f"{document_type.value}:default")
-            else:
-                raise ValueError("Must provide template_id, template_content, or document_type")
-            
-            # Add common variables
-            common_vars = {
-                'current_date': datetime.now().strftime("%B %d, %Y"),
-                'current_time': datetime.now().strftime("%I:%M %p"),
-                'current_year': datetime.now().year,
-            }
-            
-            # Merge variables
-            render_vars = {**common_vars, **variables}
-            
-            # Render template
-            rendered = template.render(**render_vars)
-            
-            return rendered
-            
-        except Exception as e:
-            logger.error(f"Template rendering failed: {e}")
-            raise
+    Without ``JINJA_BYTECODE_CACHE_DIR`` Jinja picks its own per-user temp
+    directory, which it creates with mode 0700 and checks the owner of.
     
-    async def validate_template(self, template_content: str) -> Dict[str, Any]:
-        """Validate template syntax and extract variables"""
+    Args:
+        namespace: Distinguishes environments sharing the cache directory
         
-        try:
-            # Parse template to check syntax
-            template = self.env.from_string(template_content)
-            
-            # Extract undefined variables
-            from jinja2.meta import find_undeclared_variables
-            ast = self.env.parse(template_content)
-            undefined_vars = find_undeclared_variables(ast)
-            
-            # Try to render with empty context to find required variables
-            try:
-                template.render()
-                required_vars = []
-            except Exception as render_error:
-                # Extract variable names from error message
-                error_msg = str(render_error)
-                required_vars = list(undefined_vars)
-            
-            return {
-                'valid': True,
-                'undefined_variables': list(undefined_vars),
-                'required_variables': required_vars,
-                'syntax_errors': []
-            }
-            
-        except Exception as e:
-            return {
-                'valid': False,
-                'undefined_variables': [],
-                'required_variables': [],
-                'syntax_errors': [str(e)]
-            }
+    Returns:
+        The cache, or None when disabled or the directory is unusable
+    """
+    if not settings.JINJA_BYTECODE_CACHE_ENABLED:
+        return None
+    # Reason: cache keys cover the template name and source only, so compiled
+    # code from a differently configured environment must land in other files
+    pattern = f"__ai_printer_{namespace}_%s.cache"
+    directory = settings.JINJA_BYTECODE_CACHE_DIR
+    try:
+        if not directory:
+            return FileSystemBytecodeCache(pattern=pattern)
+        _ensure_private_directory(directory)
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"Jinja bytecode cache disabled: {e}")
+        return None
+    return FileSystemBytecodeCache(directory=directory, pattern=pattern)
+
+
+def _ensure_private_directory(directory: str):
+    """Create ``directory`` with mode 0700, or check that an existing one is private
     
-    def get_japanese_template_styles(self) -> Dict[str, str]:
-        """Get CSS styles optimized for Japanese documents"""
-        return {
-            'japanese_professional': '''
+    Raises:
+        RuntimeError: If the path is not a directory owned by this user, or
+            other users can write to it
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # Reason: Jinja unmarshals code from this directory, so anyone able to
+    # plant files in it could run code in this process
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"{directory} is not a directory")
+    if info.st_uid != os.getuid():
+        raise RuntimeError(f"{directory} is not owned by the current user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise RuntimeError(f"{directory} is writable by other users")
+
+
+# Shared by every user's environment; loader templates compile once across restarts
+_bytecode_cache = create_bytecode_cache(f"engine_v{_BYTECODE_CACHE_VERSION}")
+
+# Distinct users whose prepared environments are kept around
+ENVIRONMENT_CACHE_SIZE = 1024
+
+
+# Prepared environments by user ID, least recently used first
+_environments: "OrderedDict[Optional[int], Environment]" = OrderedDict()
+
+
+def _build_environment(user_id: Optional[int]) -> Environment:
+    """Create a Jinja2 environment with the custom loader, functions and filters"""
+    env = Environment(
+        loader=DatabaseTemplateLoader(user_id),
+        # Reason: stored templates are named by ID or "type:name", never by an
+        # extension, so an extension-based policy left every one of them
+        # unescaped. All output ends up in HTML documents, so escape everything;
+        # literal template text is unaffected, only interpolated values are.
+        autoescape=True,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+        bytecode_cache=_bytecode_cache
+    )
+    env.globals.update(_TEMPLATE_GLOBALS)
+    env.filters.update(_TEMPLATE_FILTERS)
+    return env
+
+
+def get_environment(user_id: Optional[int] = None) -> Environment:
+    """Return the user's shared environment, building it on first use"""
+    env = _environments.get(user_id)
+    if env is None:
+        env = _environments[user_id] = _build_environment(user_id)
+        if len(_environments) > ENVIRONMENT_CACHE_SIZE:
+            _environments.popitem(last=False)
+    else:
+        _environments.move_to_end(user_id)
+    return env
+
+
+# Inline template sources kept compiled, e.g. for previewing one template with varying variables
+TEMPLATE_SOURCE_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=TEMPLATE_SOURCE_CACHE_SIZE)
+def _compile_source(env: Environment, source: str) -> JinjaTemplate:
+    """Compile inline template source once per environment"""
+    return env.from_string(source)
+
+
+def evict_environment(user_id: Optional[int]):
+    """Drop a user's cached environment, e.g. after their templates change"""
+    _environments.pop(user_id, None)
+
+
+# Inline CSS prepended to the suggested sample templates, by style name
+_STYLE_PROFESSIONAL = '''
                 <style>
                 body {
                     font-family: "Hiragino Kaku Gothic ProN", "Hiragino Sans", "Yu Gothic Medium", "Meiryo", "MS Gothic", sans-serif;
@@ -401,9 +540,9 @@ class AdvancedTemplateEngine:
                     .action-item { border: 1px solid #ccc; }
                 }
                 </style>
-            ''',
-            
-            'japanese_modern': '''
+            '''
+
+_STYLE_MODERN = '''
                 <style>
                 body {
                     font-family: "Hiragino Kaku Gothic ProN", "Hiragino Sans", "Yu Gothic Medium", "Meiryo", sans-serif;
@@ -524,9 +663,9 @@ class AdvancedTemplateEngine:
                     .attendees { flex-direction: column; }
                 }
                 </style>
-            ''',
-            
-            'japanese_formal': '''
+            '''
+
+_STYLE_FORMAL = '''
                 <style>
                 body {
                     font-family: "MS Mincho", "Yu Mincho", "Hiragino Mincho ProN", serif;
@@ -649,36 +788,35 @@ class AdvancedTemplateEngine:
                 }
                 </style>
             '''
-        }
-    
-    async def get_template_suggestions(
-        self, 
-        document_type: DocumentType,
-        content_hints: List[str] = None,
-        style_preference: str = "japanese_professional"
-    ) -> Dict[str, Any]:
-        """Get template suggestions based on document type and content with Japanese styling"""
-        
-        styles = self.get_japanese_template_styles()
-        selected_style = styles.get(style_preference, styles['japanese_professional'])
-        
-        suggestions = {
-            DocumentType.MEETING_MINUTES: {
-                'structure': [
-                    '会議タイトルと日時',
-                    '出席者リスト',
-                    '議題項目',
-                    '討議内容',
-                    '決定事項とアクション項目',
-                    '次回会議予定'
-                ],
-                'variables': [
-                    'meeting_title', 'meeting_date', 'attendees',
-                    'agenda_items', 'discussion_points', 'action_items',
-                    'next_meeting_date', 'meeting_organizer'
-                ],
-                'sample_template': f'''{selected_style}
-<div class="date-header">{{ format_date(meeting_date, "%Y年%m月%d日") }}</div>
+
+_JAPANESE_STYLES: Mapping[str, str] = MappingProxyType({
+    'japanese_professional': _STYLE_PROFESSIONAL,
+    'japanese_modern': _STYLE_MODERN,
+    'japanese_formal': _STYLE_FORMAL,
+})
+
+# Used when a caller asks for a style that does not exist
+_DEFAULT_SAMPLE_STYLE = 'japanese_professional'
+
+
+# Suggested structure per document type; sample_body is combined with each style in _SAMPLE_TEMPLATES
+_TEMPLATE_SUGGESTIONS: Mapping[DocumentType, Mapping[str, Any]] = MappingProxyType({
+    DocumentType.MEETING_MINUTES: MappingProxyType({
+        'structure': (
+            '会議タイトルと日時',
+            '出席者リスト',
+            '議題項目',
+            '討議内容',
+            '決定事項とアクション項目',
+            '次回会議予定'
+        ),
+        'variables': (
+            'meeting_title', 'meeting_date', 'attendees',
+            'agenda_items', 'discussion_points', 'action_items',
+            'next_meeting_date', 'meeting_organizer'
+        ),
+        'sample_body': '''
+<div class="date-header">{{ format_date(meeting_date, "%Y年%-m月%-d日") }}</div>
 
 <h1>{{ meeting_title }}</h1>
 
@@ -708,33 +846,33 @@ class AdvancedTemplateEngine:
 <div class="action-card">
 <strong>{{ action.task }}</strong><br>
 担当者: {{ action.owner }}<br>
-期限: {{ format_date(action.due_date, "%m月%d日") if action.due_date else "未定" }}
+期限: {{ format_date(action.due_date, "%-m月%-d日") if action.due_date else "未定" }}
 </div>
 {% endfor %}
 </div>
 
 <div class="footer">
-次回会議: {{ format_date(next_meeting_date, "%Y年%m月%d日") if next_meeting_date else "未定" }}
+次回会議: {{ format_date(next_meeting_date, "%Y年%-m月%-d日") if next_meeting_date else "未定" }}
 </div>'''
-            },
-            
-            DocumentType.LETTER: {
-                'structure': [
-                    '差出人情報',
-                    '日付',
-                    '宛先情報',
-                    '件名',
-                    '本文',
-                    '結び',
-                    '署名'
-                ],
-                'variables': [
-                    'sender_name', 'sender_title', 'sender_company', 'sender_address',
-                    'recipient_name', 'recipient_title', 'recipient_company', 'recipient_address',
-                    'date', 'subject', 'body', 'closing', 'signature'
-                ],
-                'sample_template': f'''{selected_style}
-<div class="date-line">{{ format_date(date, "%Y年%m月%d日") }}</div>
+    }),
+    
+    DocumentType.LETTER: MappingProxyType({
+        'structure': (
+            '差出人情報',
+            '日付',
+            '宛先情報',
+            '件名',
+            '本文',
+            '結び',
+            '署名'
+        ),
+        'variables': (
+            'sender_name', 'sender_title', 'sender_company', 'sender_address',
+            'recipient_name', 'recipient_title', 'recipient_company', 'recipient_address',
+            'date', 'subject', 'body', 'closing', 'signature'
+        ),
+        'sample_body': '''
+<div class="date-line">{{ format_date(date, "%Y年%-m月%-d日") }}</div>
 
 <div class="formal-address">
 {{ recipient_company }}<br>
@@ -766,31 +904,31 @@ class AdvancedTemplateEngine:
 </div>
 {% endif %}
 </div>'''
-            },
-            
-            DocumentType.REPORT: {
-                'structure': [
-                    'レポートタイトル',
-                    '作成日時・作成者',
-                    '概要',
-                    '詳細内容',
-                    '結論・提案',
-                    '添付資料'
-                ],
-                'variables': [
-                    'report_title', 'author', 'date', 'summary',
-                    'content_sections', 'conclusions', 'recommendations',
-                    'attachments'
-                ],
-                'sample_template': f'''{selected_style}
-<div class="date-badge">{{ format_date(date, "%Y年%m月%d日") }}</div>
+    }),
+    
+    DocumentType.REPORT: MappingProxyType({
+        'structure': (
+            'レポートタイトル',
+            '作成日時・作成者',
+            '概要',
+            '詳細内容',
+            '結論・提案',
+            '添付資料'
+        ),
+        'variables': (
+            'report_title', 'author', 'date', 'summary',
+            'content_sections', 'conclusions', 'recommendations',
+            'attachments'
+        ),
+        'sample_body': '''
+<div class="date-badge">{{ format_date(date, "%Y年%-m月%-d日") }}</div>
 
 <h1>{{ report_title }}</h1>
 
 <div class="card">
 <h2>📊 概要</h2>
 <p><strong>作成者：</strong>{{ author }}</p>
-<p><strong>作成日：</strong>{{ format_date(date, "%Y年%m月%d日") }}</p>
+<p><strong>作成日：</strong>{{ format_date(date, "%Y年%-m月%-d日") }}</p>
 {{ summary | markdown }}
 </div>
 
@@ -821,22 +959,22 @@ class AdvancedTemplateEngine:
 <strong>添付資料：</strong>{{ attachments | join(", ") }}
 </div>
 {% endif %}'''
-            },
-            
-            DocumentType.FLYER: {
-                'structure': [
-                    'キャッチフレーズ',
-                    'イベント詳細',
-                    '日時・場所',
-                    '連絡先情報',
-                    '行動喚起'
-                ],
-                'variables': [
-                    'headline', 'event_name', 'event_date', 'event_time',
-                    'location', 'description', 'contact_info', 'call_to_action',
-                    'organizer', 'ticket_info'
-                ],
-                'sample_template': f'''{selected_style}
+    }),
+    
+    DocumentType.FLYER: MappingProxyType({
+        'structure': (
+            'キャッチフレーズ',
+            'イベント詳細',
+            '日時・場所',
+            '連絡先情報',
+            '行動喚起'
+        ),
+        'variables': (
+            'headline', 'event_name', 'event_date', 'event_time',
+            'location', 'description', 'contact_info', 'call_to_action',
+            'organizer', 'ticket_info'
+        ),
+        'sample_body': '''
 <h1 style="font-size: 32px; color: #22c55e; text-shadow: 2px 2px 4px rgba(0,0,0,0.1);">
 {{ headline }}
 </h1>
@@ -847,7 +985,7 @@ class AdvancedTemplateEngine:
 <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 24px; margin: 24px 0;">
 <div>
 <h3>📅 日時</h3>
-<p><strong>{{ format_date(event_date, "%Y年%m月%d日") }}</strong></p>
+<p><strong>{{ format_date(event_date, "%Y年%-m月%-d日") }}</strong></p>
 <p>{{ event_time }}</p>
 </div>
 <div>
@@ -876,11 +1014,181 @@ class AdvancedTemplateEngine:
 <strong>主催：</strong>{{ organizer }}<br>
 <strong>お問い合わせ：</strong>{{ contact_info }}
 </div>'''
+    })
+})
+
+
+# Used for document types without a dedicated suggestion
+_DEFAULT_SUGGESTION: Mapping[str, Any] = MappingProxyType({
+    'structure': ('タイトル', '内容', '結論'),
+    'variables': ('title', 'content'),
+    'sample_body': '<h1>{{ title }}</h1>\n\n{{ content | markdown }}'
+})
+
+
+# Every style and document type combination, concatenated once at import
+_SAMPLE_TEMPLATES: Mapping[Tuple[str, DocumentType], str] = MappingProxyType({
+    (style, document_type): css + _TEMPLATE_SUGGESTIONS.get(document_type, _DEFAULT_SUGGESTION)['sample_body']
+    for style, css in _JAPANESE_STYLES.items()
+    for document_type in DocumentType
+})
+
+
+class AdvancedTemplateEngine:
+    """Advanced template engine with custom functions and filters"""
+    
+    def __init__(self, user_id: Optional[int] = None):
+        self.user_id = user_id
+        # Reason: building an Environment and registering helpers is per-user work, not per-request
+        self.env = get_environment(user_id)
+    
+    def _resolve_template(
+        self,
+        template_id: Optional[int],
+        template_content: Optional[str],
+        document_type: Optional[DocumentType]
+    ) -> JinjaTemplate:
+        """Pick the template to render from inline content, a stored ID or the type default"""
+        if template_content:
+            # Use provided template content directly
+            return _compile_source(self.env, template_content)
+        elif template_id:
+            # Load template from database by ID
+            return self.env.get_template(str(template_id))
+        elif document_type:
+            # Load default template for document type
+            return self.env.get_template(f"{document_type.value}:default")
+        raise ValueError("Must provide template_id, template_content, or document_type")
+    
+    @staticmethod
+    def _render_variables(variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge caller variables over the common date/time variables
+        
+        Keep the names in sync with ``_COMMON_VARIABLES``.
+        """
+        now = datetime.now()
+        common_vars = {
+            'current_date': _long_date(now.date()),
+            'current_time': now.strftime("%I:%M %p"),
+            'current_year': now.year,
+        }
+        return {**common_vars, **(variables or {})}
+    
+    async def render_template(
+        self,
+        template_id: Optional[int] = None,
+        template_content: Optional[str] = None,
+        variables: Dict[str, Any] = None,
+        document_type: Optional[DocumentType] = None
+    ) -> str:
+        """Render template with provided variables"""
+        
+        try:
+            template = self._resolve_template(template_id, template_content, document_type)
+            return template.render(**self._render_variables(variables))
+            
+        except Exception as e:
+            logger.error(f"Template rendering failed: {e}")
+            raise
+    
+    async def render_template_stream(
+        self,
+        template_id: Optional[int] = None,
+        template_content: Optional[str] = None,
+        variables: Dict[str, Any] = None,
+        document_type: Optional[DocumentType] = None
+    ) -> AsyncIterator[str]:
+        """
+        Render template incrementally, yielding output chunks as Jinja produces them
+        
+        Takes the same arguments as ``render_template``. Suited to large
+        documents consumed by a streaming response, since the full output
+        is never held in memory at once.
+        
+        Yields:
+            Consecutive pieces of the rendered document
+        """
+        try:
+            template = self._resolve_template(template_id, template_content, document_type)
+            for chunk in template.generate(**self._render_variables(variables)):
+                yield chunk
+            
+        except Exception as e:
+            logger.error(f"Template rendering failed: {e}")
+            raise
+    
+    async def validate_template(self, template_content: str) -> Dict[str, Any]:
+        """Validate template syntax and extract variables"""
+        
+        try:
+            # Parse once; the AST serves both the syntax check and variable extraction
+            ast = self.env.parse(template_content)
+            undefined_vars = find_undeclared_variables(ast)
+            
+            # Compiling catches errors the parser does not, such as unknown filters
+            self.env.compile(ast)
+            
+            # Anything not supplied by the environment must come from the caller
+            required_vars = [
+                name for name in undefined_vars
+                if name not in self.env.globals and name not in _COMMON_VARIABLES
+            ]
+            
+            return {
+                'valid': True,
+                'undefined_variables': list(undefined_vars),
+                'required_variables': required_vars,
+                'syntax_errors': []
             }
+            
+        except Exception as e:
+            return {
+                'valid': False,
+                'undefined_variables': [],
+                'required_variables': [],
+                'syntax_errors': [str(e)]
+            }
+    
+    def get_japanese_template_styles(self) -> Mapping[str, str]:
+        """Get CSS styles optimized for Japanese documents; shared and read-only"""
+        return _JAPANESE_STYLES
+    
+    async def get_template_suggestions(
+        self, 
+        document_type: DocumentType,
+        content_hints: List[str] = None,
+        style_preference: str = "japanese_professional"
+    ) -> Dict[str, Any]:
+        """Get template suggestions based on document type and content with Japanese styling"""
+        
+        suggestion = _TEMPLATE_SUGGESTIONS.get(document_type, _DEFAULT_SUGGESTION)
+        return {
+            'structure': list(suggestion['structure']),
+            'variables': list(suggestion['variables']),
+            'sample_template': self._sample_template(document_type, style_preference)
         }
+    
+    def get_compiled_sample(
+        self,
+        document_type: DocumentType,
+        style_preference: str = "japanese_professional"
+    ) -> JinjaTemplate:
+        """
+        Get the suggested sample template for a document type, already compiled
+        
+        Shares the inline-source cache with ``render_template``, so previews
+        rendered either way parse each sample at most once.
         
-        return suggestions.get(document_type, {
-            'structure': ['タイトル', '内容', '結論'],
-            'variables': ['title', 'content'],
-            'sample_template': f'{selected_style}<h1>{{ title }}</h1>\n\n{{ content | markdown }}'
-        })
\ No newline at end of file
+        Args:
+            document_type: Document type to get the sample for
+            style_preference: Key of ``get_japanese_template_styles``
+            
+        Returns:
+            Compiled template ready to render
+        """
+        return _compile_source(self.env, self._sample_template(document_type, style_preference))
+    
+    def _sample_template(self, document_type: DocumentType, style_preference: str) -> str:
+        if style_preference not in _JAPANESE_STYLES:
+            style_preference = _DEFAULT_SAMPLE_STYLE
+        return _SAMPLE_TEMPLATES[style_preference, document_type]
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Client-side rate limiting and retry for OpenAI calls
+"""
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import random
+import time
+import openai
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously up to a per-minute capacity
+
+    Callers reserve tokens up front, letting the balance go negative, and then
+    sleep off their share of the deficit, so waiters are served in FIFO order
+    without holding anything while they sleep.
+    """
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def _reserve(self, amount: float) -> float:
+        """Consume ``amount`` tokens and return how long to wait before using them"""
+        self._refill()
+        self.tokens -= amount
+        return max(0.0, -self.tokens) / self.refill_rate
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until ``amount`` tokens are available and consume them"""
+        # Reason: a single request larger than the bucket would otherwise wait forever
+        amount = min(float(amount), self.capacity)
+
+        # Reason: _reserve never awaits, so it runs atomically on the event loop
+        # and needs no asyncio.Lock (which would also bind to the import-time loop)
+        delay = self._reserve(amount)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Give back the reservation so later callers are not delayed by it
+                self.tokens += amount
+                raise
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return True for rate limits, server errors and transient network failures"""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After header from an API error response, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenAIThrottle:
+    """Requests/tokens per minute throttle with exponential backoff retries"""
+
+    def __init__(
+        self,
+        max_requests_per_minute: int,
+        max_tokens_per_minute: int,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 10.0
+    ):
+        self.request_bucket = TokenBucket(max_requests_per_minute)
+        self.token_bucket = TokenBucket(max_tokens_per_minute)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Exponential backoff with jitter, honoring Retry-After when the server sends it"""
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # Reason: jitter spreads out retries from concurrent callers hit by the same 429 burst
+        delay = self.base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+        return min(self.max_delay, delay)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0
+    ) -> Any:
+        """
+        Run an OpenAI call once capacity is available, retrying transient failures
+
+        Args:
+            call: Zero-argument coroutine factory performing the API call
+            estimated_tokens: Prompt plus completion token estimate
+
+        Returns:
+            Result of ``call``
+        """
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_attempts):
+            await self.request_bucket.acquire(1)
+            if estimated_tokens:
+                await self.token_bucket.acquire(estimated_tokens)
+
+            try:
+                return await call()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == self.max_attempts - 1:
+                    raise
+                last_error = e
+                delay = self._backoff_delay(attempt, e)
+                logger.warning(f"OpenAI call failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+
+# Shared throttle so every processor respects the same account limits
+openai_throttle = OpenAIThrottle(
+    max_requests_per_minute=settings.OPENAI_MAX_REQUESTS_PER_MINUTE,
+    max_tokens_per_minute=settings.OPENAI_MAX_TOKENS_PER_MINUTE,
+    max_attempts=settings.OPENAI_MAX_ATTEMPTS,
+    max_delay=settings.OPENAI_RETRY_MAX_DELAY_SECONDS
+)
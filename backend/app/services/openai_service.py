@@ -3,14 +3,27 @@ OpenAI Service Integration
 Handles Whisper API for transcription and GPT API for document generation
 """
 import asyncio
+import re
 import tempfile
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
+import httpx
 from openai import AsyncOpenAI
 from ..config import settings
 from ..models.audio import TranscriptionResponse, DocumentResponse
 
+try:
+    import orjson as _json_fast
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    import json as _json_fast
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - HTTP/2 requires the httpx[http2] extra
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
@@ -20,10 +33,29 @@ class OpenAIService:
         if not settings.OPENAI_API_KEY and not settings.DEVELOPMENT:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY or "mock-key-for-development")
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY or "mock-key-for-development",
+            http_client=self._create_http_client()
+        )
+        # Reason: completion callers retry through their own backoff policy;
+        # stacking the SDK's retries under it multiplies attempts per failure
+        self._no_retry_client = self.client.with_options(max_retries=0)
         self.whisper_model = settings.WHISPER_MODEL
         self.gpt_model = settings.OPENAI_MODEL
     
+    @staticmethod
+    def _create_http_client() -> httpx.AsyncClient:
+        """Create a pooled HTTP client so calls reuse TLS connections"""
+        # Reason: HTTP/2 multiplexes concurrent completions over one connection
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS
+            )
+        )
+    
     async def transcribe_audio(
         self, 
         audio_data: bytes, 
@@ -139,6 +171,120 @@ class OpenAIService:
             logger.error(f"文書生成が失敗しました: {e}")
             raise Exception(f"文書の生成に失敗しました: {str(e)}")
     
+    async def generate_structured_completion(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        function_name: str = "emit",
+        system_prompt: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        service_tier: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1000
+    ) -> str:
+        """
+        Run a completion forced through a function call so output matches ``schema``
+        
+        Args:
+            prompt: User prompt
+            schema: JSON schema of the function parameters
+            function_name: Name of the forced function
+            system_prompt: Static instructions sent first so the prefix can be cached
+            cache_key: Prompt cache routing key for requests sharing a prefix
+            service_tier: Processing tier, e.g. "flex" for cheaper low-priority work
+            model: Model name (defaults to configured GPT model)
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            
+        Returns:
+            JSON string with the function arguments
+        """
+        argument_chunks = []
+        async for delta in self.stream_structured_completion(
+            prompt,
+            schema,
+            function_name=function_name,
+            system_prompt=system_prompt,
+            cache_key=cache_key,
+            service_tier=service_tier,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ):
+            argument_chunks.append(delta)
+        
+        return "".join(argument_chunks)
+    
+    async def stream_structured_completion(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        function_name: str = "emit",
+        system_prompt: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        service_tier: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """
+        Stream function-call argument deltas for a forced function call
+        
+        Takes the same arguments as generate_structured_completion.
+        
+        Raises:
+            ValueError: If the output was cut off by ``max_tokens``, since the
+                JSON arguments would be incomplete
+        """
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        
+        stream = await self._no_retry_client.chat.completions.create(
+            model=model or self.gpt_model,
+            messages=messages,
+            tools=[{
+                "type": "function",
+                "function": {"name": function_name, "parameters": schema}
+            }],
+            tool_choice={"type": "function", "function": {"name": function_name}},
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            extra_body=self._extra_body(cache_key=cache_key, service_tier=service_tier)
+        )
+        
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                tool_calls = choice.delta.tool_calls if choice.delta else None
+                if tool_calls and tool_calls[0].function and tool_calls[0].function.arguments:
+                    yield tool_calls[0].function.arguments
+                if choice.finish_reason == "length":
+                    raise ValueError(f"Structured output truncated at max_tokens={max_tokens}")
+                if choice.finish_reason:
+                    break
+        finally:
+            # Reason: leaving the loop early (truncation, break, or the consumer
+            # stopping) would otherwise keep the HTTP connection checked out
+            await stream.response.aclose()
+    
+    def _extra_body(
+        self,
+        cache_key: Optional[str] = None,
+        service_tier: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        """Build request fields not covered by the pinned SDK version"""
+        body = {}
+        if cache_key:
+            body["prompt_cache_key"] = cache_key
+        if service_tier:
+            body["service_tier"] = service_tier
+        return body or None
+    
     async def _analyze_document_type(self, transcription: str) -> str:
         """Analyze transcription to determine document type"""
         
@@ -219,9 +365,6 @@ class OpenAIService:
         """Parse GPT response to extract document components"""
         
         try:
-            import json
-            import re
-            
             # Clean up response content by removing markdown code blocks
             cleaned_content = response_content.strip()
             if cleaned_content.startswith('```json'):
@@ -236,7 +379,7 @@ class OpenAIService:
             
             # Try to parse as JSON first
             if cleaned_content.strip().startswith('{'):
-                content = json.loads(cleaned_content)
+                content = _json_fast.loads(cleaned_content)
                 
                 # Clean up HTML and CSS content
                 html_content = content.get("html", "<div>Content not generated</div>")
@@ -255,7 +398,7 @@ class OpenAIService:
             # Fallback: Extract components manually
             return self._extract_components_manually(response_content)
             
-        except json.JSONDecodeError as e:
+        except _json_fast.JSONDecodeError as e:
             logger.warning(f"JSONデコードエラー: {e}")
             logger.warning(f"Cleaned content: {cleaned_content[:300]}...")
             # Use manual extraction as fallback
@@ -271,7 +414,6 @@ class OpenAIService:
     
     def _extract_components_manually(self, content: str) -> Dict[str, str]:
         """Manually extract HTML/CSS components from response"""
-        import re
         
         # Extract title from JSON-like content
         title_match = re.search(r'"title":\s*"([^"]+)"', content)
@@ -323,7 +465,6 @@ class OpenAIService:
         cleaned = cleaned.replace('\\t', '\t')     # Convert to actual tabs
         
         # Remove any remaining single backslashes before normal characters
-        import re
         cleaned = re.sub(r'\\([^\\])', r'\1', cleaned)
         
         return cleaned.strip()
@@ -0,0 +1,76 @@
+"""
+Tests for the background audit queue
+"""
+import asyncio
+import pytest
+from app.security.audit import AUDIT_BATCH_SIZE, AuditLogger
+
+
+@pytest.fixture
+def audit(monkeypatch):
+    """Audit logger that records bulk writes and direct writes instead of using the database"""
+    logger = AuditLogger()
+    logger.batches = []
+    logger.direct = []
+    
+    async def fake_bulk(events):
+        await asyncio.sleep(0)
+        logger.batches.append(events)
+    
+    async def fake_log_user_activity(**event):
+        await asyncio.sleep(0)
+        logger.direct.append(event)
+    
+    monkeypatch.setattr(logger, "_store_audit_logs_bulk", fake_bulk)
+    monkeypatch.setattr(logger, "log_user_activity", fake_log_user_activity)
+    return logger
+
+
+class TestAuditQueue:
+    """Test queued user activity logging"""
+    
+    @pytest.mark.asyncio
+    async def test_enqueued_events_are_written_in_batches(self, audit):
+        """Test that queued events reach the bulk writer grouped into batches"""
+        await audit.start_worker()
+        for i in range(AUDIT_BATCH_SIZE + 5):
+            audit.enqueue_user_activity(user_id=1, action=f"action_{i}", resource_type="api")
+        await audit.stop_worker()
+        
+        written = [event["action"] for batch in audit.batches for event in batch]
+        assert written == [f"action_{i}" for i in range(AUDIT_BATCH_SIZE + 5)]
+        assert all(len(batch) <= AUDIT_BATCH_SIZE for batch in audit.batches)
+        assert audit.direct == []
+    
+    @pytest.mark.asyncio
+    async def test_stop_worker_flushes_events_still_queued(self, audit):
+        """Test that stopping before the worker runs still writes every queued event"""
+        await audit.start_worker()
+        audit.enqueue_user_activity(user_id=1, action="first", resource_type="api")
+        audit.enqueue_user_activity(user_id=2, action="second", resource_type="api")
+        await audit.stop_worker()
+        
+        written = [event["user_id"] for batch in audit.batches for event in batch]
+        assert written == [1, 2]
+    
+    @pytest.mark.asyncio
+    async def test_stop_worker_without_start_is_noop(self, audit):
+        """Test that stopping a worker that never started does nothing"""
+        await audit.stop_worker()
+        
+        assert audit.batches == []
+    
+    @pytest.mark.asyncio
+    async def test_fallback_tasks_are_tracked_until_done(self, audit):
+        """Test that events logged without a worker keep their task referenced"""
+        audit.enqueue_user_activity(user_id=3, action="direct", resource_type="api")
+        
+        assert len(audit._fallback_tasks) == 1
+        await audit.stop_worker()
+        
+        assert audit._fallback_tasks == set()
+        assert audit.direct[0]["action"] == "direct"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
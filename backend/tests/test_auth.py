@@ -0,0 +1,152 @@
+"""
+Tests for Redis-backed authentication helpers
+"""
+import time
+import fakeredis
+import pytest
+import redis
+from app.security import auth
+from app.security.auth import (
+    AuthenticationError,
+    AuthService,
+    RateLimiter,
+    SessionManager,
+    TokenBlacklist,
+)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the auth module and its Lua scripts at an in-memory Redis"""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(auth, "redis_client", client)
+    monkeypatch.setattr(auth, "rate_limit_script", client.register_script(auth.RATE_LIMIT_LUA))
+    monkeypatch.setattr(auth, "session_touch_script", client.register_script(auth.SESSION_TOUCH_LUA))
+    return client
+
+
+class TestRateLimiter:
+    """Test the sliding-window rate limit script"""
+    
+    def test_allows_up_to_limit_then_blocks(self, fake_redis):
+        """Test that requests past the limit are rejected and not recorded"""
+        results = [RateLimiter.check_rate_limit("upload", limit=3, window=60) for _ in range(5)]
+        
+        assert [result["allowed"] for result in results] == [True, True, True, False, False]
+        assert [result["count"] for result in results] == [1, 2, 3, 3, 3]
+        assert fake_redis.zcard("rate_limit:default:upload") == 3
+        assert 0 < fake_redis.ttl("rate_limit:default:upload") <= 60
+    
+    def test_old_entries_leave_the_window(self, fake_redis, monkeypatch):
+        """Test that requests older than the window no longer count"""
+        start = time.time()
+        monkeypatch.setattr(auth.time, "time", lambda: start)
+        for _ in range(2):
+            RateLimiter.check_rate_limit("upload", limit=2, window=60)
+        assert not RateLimiter.check_rate_limit("upload", limit=2, window=60)["allowed"]
+        
+        monkeypatch.setattr(auth.time, "time", lambda: start + 61)
+        
+        assert RateLimiter.check_rate_limit("upload", limit=2, window=60)["allowed"]
+    
+    def test_identifiers_are_limited_separately(self, fake_redis):
+        """Test that each identifier has its own window"""
+        assert RateLimiter.check_rate_limit("upload", limit=1, window=60, identifier="a")["allowed"]
+        
+        assert RateLimiter.check_rate_limit("upload", limit=1, window=60, identifier="b")["allowed"]
+        assert not RateLimiter.check_rate_limit("upload", limit=1, window=60, identifier="a")["allowed"]
+    
+    def test_redis_failure_allows_request(self, fake_redis, monkeypatch):
+        """Test that the limiter fails open when Redis errors"""
+        def broken_script(*args, **kwargs):
+            raise redis.ConnectionError("down")
+        
+        monkeypatch.setattr(auth, "rate_limit_script", broken_script)
+        
+        assert RateLimiter.check_rate_limit("upload", limit=1, window=60)["allowed"]
+
+
+class TestVerifyTokenAndRatecheck:
+    """Test the pipelined token verification and rate check"""
+    
+    def test_valid_token_is_verified_and_counted(self, fake_redis):
+        """Test that a valid token returns its payload and consumes one request"""
+        token = AuthService.create_access_token({"sub": "7"})
+        
+        payload, rate = AuthService.verify_token_and_ratecheck(token, "api", limit=2, window=60)
+        
+        assert payload["sub"] == "7"
+        assert rate["allowed"] and rate["count"] == 1
+        assert fake_redis.zcard("rate_limit:default:api") == 1
+    
+    def test_rate_limit_is_reported(self, fake_redis):
+        """Test that requests past the limit are reported as not allowed"""
+        token = AuthService.create_access_token({"sub": "7"})
+        
+        AuthService.verify_token_and_ratecheck(token, "api", limit=1, window=60)
+        _, rate = AuthService.verify_token_and_ratecheck(token, "api", limit=1, window=60)
+        
+        assert not rate["allowed"]
+    
+    def test_blacklisted_token_is_rejected(self, fake_redis):
+        """Test that a revoked token fails even though its signature is valid"""
+        token = AuthService.create_access_token({"sub": "7"})
+        payload = AuthService.verify_token(token)
+        TokenBlacklist.blacklist_token(payload["jti"], payload["exp"])
+        
+        with pytest.raises(AuthenticationError, match="revoked"):
+            AuthService.verify_token_and_ratecheck(token, "api", limit=5, window=60)
+    
+    def test_invalid_token_is_rejected_without_redis(self, fake_redis):
+        """Test that a malformed token fails before any rate limit is recorded"""
+        with pytest.raises(AuthenticationError, match="Invalid token"):
+            AuthService.verify_token_and_ratecheck("not-a-jwt", "api", limit=5, window=60)
+        
+        assert fake_redis.zcard("rate_limit:default:api") == 0
+    
+    def test_pipeline_failure_falls_back(self, fake_redis, monkeypatch):
+        """Test that a failed pipeline falls back to separate checks"""
+        def broken_pipeline(*args, **kwargs):
+            raise redis.ConnectionError("down")
+        
+        monkeypatch.setattr(fake_redis, "pipeline", broken_pipeline)
+        token = AuthService.create_access_token({"sub": "7"})
+        
+        payload, rate = AuthService.verify_token_and_ratecheck(token, "api", limit=5, window=60)
+        
+        assert payload["sub"] == "7"
+        assert rate["allowed"]
+
+
+class TestSessionManager:
+    """Test pipelined session storage"""
+    
+    def test_create_and_get_session(self, fake_redis):
+        """Test that a created session is stored with a TTL and tracked for the user"""
+        session_id = SessionManager.create_session(5, {"ip": "127.0.0.1"})
+        
+        session = SessionManager.get_session(session_id)
+        
+        assert session["ip"] == "127.0.0.1"
+        assert session["user_id"] == "5"
+        assert fake_redis.sismember("user_sessions:5", session_id)
+        assert 0 < fake_redis.ttl(session_id) <= auth.SESSION_TTL_SECONDS
+    
+    def test_get_missing_session_does_not_create_it(self, fake_redis):
+        """Test that looking up an expired session returns None without recreating it"""
+        assert SessionManager.get_session("session:5:0") is None
+        
+        assert not fake_redis.exists("session:5:0")
+    
+    def test_invalidate_session(self, fake_redis):
+        """Test that invalidating removes the session and its tracking entry"""
+        session_id = SessionManager.create_session(5, {"ip": "127.0.0.1"})
+        
+        SessionManager.invalidate_session(session_id)
+        
+        assert SessionManager.get_session(session_id) is None
+        assert not fake_redis.sismember("user_sessions:5", session_id)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
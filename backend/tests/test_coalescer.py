@@ -0,0 +1,99 @@
+"""
+Tests for request coalescing
+"""
+import asyncio
+import pytest
+from app.services.document_generation.coalescer import BatchCoalescer
+
+
+class RecordingHandler:
+    """Batch handler that records each batch and doubles every item"""
+    
+    def __init__(self, fail_with=None):
+        self.batches = []
+        self.fail_with = fail_with
+    
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        if self.fail_with is not None:
+            raise self.fail_with
+        return [item * 2 for item in items]
+
+
+class TestBatchCoalescer:
+    """Test batching, latency and failure propagation"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_items_share_a_batch(self):
+        """Test that items submitted together are handled in one batch"""
+        handler = RecordingHandler()
+        coalescer = BatchCoalescer(handler, max_batch_size=8, max_wait=0.05)
+        
+        results = await asyncio.gather(*(coalescer.submit(i) for i in range(5)))
+        
+        assert results == [0, 2, 4, 6, 8]
+        assert handler.batches == [[0, 1, 2, 3, 4]]
+    
+    @pytest.mark.asyncio
+    async def test_batches_are_capped_at_max_size(self):
+        """Test that a burst larger than the batch size is split"""
+        handler = RecordingHandler()
+        coalescer = BatchCoalescer(handler, max_batch_size=3, max_wait=0.05)
+        
+        results = await asyncio.gather(*(coalescer.submit(i) for i in range(7)))
+        
+        assert results == [i * 2 for i in range(7)]
+        assert [len(batch) for batch in handler.batches] == [3, 3, 1]
+    
+    @pytest.mark.asyncio
+    async def test_lone_item_skips_the_wait_window(self):
+        """Test that a single item without concurrent load is not held for max_wait"""
+        handler = RecordingHandler()
+        coalescer = BatchCoalescer(handler, max_wait=5)
+        
+        result = await asyncio.wait_for(coalescer.submit(21), timeout=1)
+        
+        assert result == 42
+    
+    @pytest.mark.asyncio
+    async def test_handler_failure_reaches_every_waiter(self):
+        """Test that an exception from the handler is raised for each item in the batch"""
+        coalescer = BatchCoalescer(RecordingHandler(fail_with=RuntimeError("upstream down")), max_wait=0.05)
+        
+        results = await asyncio.gather(
+            *(coalescer.submit(i) for i in range(3)),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert all(str(result) == "upstream down" for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_per_item_exceptions_are_raised_individually(self):
+        """Test that exceptions returned in the results only affect their own item"""
+        async def handler(items):
+            return [ValueError(item) if item < 0 else item for item in items]
+        
+        coalescer = BatchCoalescer(handler, max_wait=0.05)
+        
+        results = await asyncio.gather(coalescer.submit(1), coalescer.submit(-1), return_exceptions=True)
+        
+        assert results[0] == 1
+        assert isinstance(results[1], ValueError)
+    
+    @pytest.mark.asyncio
+    async def test_wrong_result_count_fails_the_batch(self):
+        """Test that a handler returning too few results fails every waiter"""
+        async def handler(items):
+            return items[:1]
+        
+        coalescer = BatchCoalescer(handler, max_wait=0.05)
+        
+        results = await asyncio.gather(coalescer.submit(1), coalescer.submit(2), return_exceptions=True)
+        
+        assert all(isinstance(result, ValueError) for result in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,135 @@
+"""
+Tests for the document processor result cache
+"""
+import pytest
+from app.database.models import DocumentType
+from app.services.document_generation import document_processor
+from app.services.document_generation.document_processor import (
+    AdvancedDocumentProcessor,
+    DocumentGenerationRequest,
+    DocumentGenerationResult,
+    _RequestContext,
+)
+
+
+def _result():
+    return DocumentGenerationResult(
+        document_content="本文",
+        formatted_content="<p>本文</p>",
+        metadata={"generation_timestamp": "2026-01-01T00:00:00Z", "sections": ["概要"]},
+        quality_score=0.8,
+        suggestions=["セクションを追加してください"],
+        template_variables={"title": "会議", "attendees": ["田中"]}
+    )
+
+
+class TestResultCache:
+    """Test the in-process generated result cache"""
+    
+    def test_hit_returns_fresh_timestamp(self):
+        """Test that a cache hit carries the current request timestamp"""
+        processor = AdvancedDocumentProcessor(None)
+        processor._store_cached_result("key", _result())
+        context = _RequestContext(now_iso="2026-10-16T09:00:00Z", today_japanese="2026年10月16日")
+        
+        hit = processor._get_cached_result("key", context)
+        
+        assert hit.metadata["generation_timestamp"] == "2026-10-16T09:00:00Z"
+        assert hit.document_content == "本文"
+    
+    def test_mutating_a_hit_does_not_change_the_next_hit(self):
+        """Test that hits do not share mutable fields with the cached entry"""
+        processor = AdvancedDocumentProcessor(None)
+        processor._store_cached_result("key", _result())
+        context = _RequestContext.capture()
+        
+        first = processor._get_cached_result("key", context)
+        first.template_variables["title"] = "変更"
+        first.template_variables["attendees"].append("佐藤")
+        first.suggestions.append("追加")
+        first.metadata["sections"].append("詳細")
+        second = processor._get_cached_result("key", context)
+        
+        assert second.template_variables == {"title": "会議", "attendees": ["田中"]}
+        assert second.suggestions == ["セクションを追加してください"]
+        assert second.metadata["sections"] == ["概要"]
+    
+    def test_mutating_the_stored_result_does_not_change_the_cache(self):
+        """Test that the result returned on a miss is independent of the cached copy"""
+        processor = AdvancedDocumentProcessor(None)
+        result = _result()
+        processor._store_cached_result("key", result)
+        
+        result.template_variables["title"] = "変更"
+        hit = processor._get_cached_result("key", _RequestContext.capture())
+        
+        assert hit.template_variables["title"] == "会議"
+    
+    def test_miss_returns_none(self):
+        """Test that an unknown key is a miss"""
+        processor = AdvancedDocumentProcessor(None)
+        
+        assert processor._get_cached_result("missing", _RequestContext.capture()) is None
+
+
+
+@pytest.fixture
+def offline_processor(monkeypatch):
+    """Processor whose AI, Redis and templating steps are replaced with counters"""
+    processor = AdvancedDocumentProcessor(None)
+    processor.generated = []
+    processor.fallback = False
+    
+    async def no_cached_content(key):
+        return None
+    
+    async def analyze_and_generate(request, context):
+        processor.generated.append(request)
+        content = {"title": "会議", "sections": [], "template_variables": {}}
+        if processor.fallback:
+            content["is_fallback"] = True
+        return content
+    
+    async def apply_template(request, structured_content, user_id):
+        return "<p>本文</p>", "本文"
+    
+    async def post_process(structured_content, formatted_content, plain_content, request, context):
+        return _result()
+    
+    monkeypatch.setattr(document_processor.document_cache, "get", no_cached_content)
+    monkeypatch.setattr(processor, "_content_cache_key", lambda request: None)
+    monkeypatch.setattr(processor, "_analyze_and_generate", analyze_and_generate)
+    monkeypatch.setattr(processor, "_apply_template", apply_template)
+    monkeypatch.setattr(processor, "_post_process_document", post_process)
+    return processor
+
+
+class TestGenerateDocumentCaching:
+    """Test which generated documents are cached"""
+    
+    @pytest.mark.asyncio
+    async def test_ai_result_is_cached(self, offline_processor):
+        """Test that a repeated request is served from the result cache"""
+        request = DocumentGenerationRequest(transcription_text="会議の内容", document_type=DocumentType.MEETING_MINUTES)
+        
+        await offline_processor.generate_document(request)
+        await offline_processor.generate_document(request)
+        
+        assert len(offline_processor.generated) == 1
+    
+    @pytest.mark.asyncio
+    async def test_fallback_result_is_not_cached(self, offline_processor):
+        """Test that a degraded fallback document is regenerated on retry"""
+        offline_processor.fallback = True
+        request = DocumentGenerationRequest(transcription_text="会議の内容", document_type=DocumentType.MEETING_MINUTES)
+        
+        await offline_processor.generate_document(request)
+        offline_processor.fallback = False
+        await offline_processor.generate_document(request)
+        await offline_processor.generate_document(request)
+        
+        assert len(offline_processor.generated) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,127 @@
+"""
+Tests for encryption and hashing utilities
+"""
+import base64
+import hashlib
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from app.security import encryption
+from app.security.encryption import AsymmetricEncryption, EncryptionService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Encryption service with a throwaway Fernet key instead of the key file"""
+    monkeypatch.setattr(EncryptionService, "_get_or_create_fernet_key", lambda self: Fernet.generate_key())
+    return EncryptionService()
+
+
+class TestHashData:
+    """Test salted hashing"""
+    
+    def test_default_is_salted_sha256(self, service):
+        """Test that the default algorithm still produces the SHA-256 values stored before"""
+        salt = b"s" * 32
+        
+        hash_value, encoded_salt = service.hash_data("secret", salt=salt)
+        
+        assert base64.b64decode(hash_value) == hashlib.sha256(salt + b"secret").digest()
+        assert base64.b64decode(encoded_salt) == salt
+    
+    def test_blake3_on_request(self, service):
+        """Test that BLAKE3 hashes salt and data when asked for explicitly"""
+        blake3 = pytest.importorskip("blake3")
+        salt = b"s" * 32
+        
+        hash_value, _ = service.hash_data("secret", salt=salt, algorithm="blake3")
+        
+        assert base64.b64decode(hash_value) == blake3.blake3(salt + b"secret").digest()
+        assert hash_value != service.hash_data("secret", salt=salt)[0]
+    
+    def test_random_salt_when_omitted(self, service):
+        """Test that omitting the salt generates a new one each call"""
+        first = service.hash_data("secret")
+        second = service.hash_data("secret")
+        
+        assert len(base64.b64decode(first[1])) == 32
+        assert first != second
+    
+    def test_unknown_algorithm_raises(self, service):
+        """Test that an unsupported algorithm is rejected"""
+        with pytest.raises(ValueError):
+            service.hash_data("secret", algorithm="md5")
+    
+    def test_blake3_without_package_raises(self, service, monkeypatch):
+        """Test that requesting BLAKE3 without the package fails clearly"""
+        monkeypatch.setattr(encryption, "blake3", None)
+        
+        with pytest.raises(ValueError, match="blake3"):
+            service.hash_data("secret", algorithm="blake3")
+
+
+
+class TestSensitiveData:
+    """Test JSON encryption of sensitive values"""
+    
+    def test_round_trip(self, service):
+        """Test that a dict decrypts back to the same data"""
+        data = {"api_key": "sk-123", "scopes": ["drive"], "nested": {"ttl": 60}}
+        
+        assert service.decrypt_sensitive_data(service.encrypt_sensitive_data(data)) == data
+    
+    def test_non_str_keys_are_accepted(self, service):
+        """Test that keys json accepts but orjson rejects still encrypt, stringified like json"""
+        encrypted = service.encrypt_sensitive_data({1: "a", None: "b"})
+        
+        assert service.decrypt_sensitive_data(encrypted) == {"1": "a", "null": "b"}
+    
+    def test_unserializable_value_raises(self, service):
+        """Test that values neither serializer supports are rejected"""
+        with pytest.raises(TypeError):
+            service.encrypt_sensitive_data({"key": object()})
+
+
+class TestHybridEncryption:
+    """Test X25519 + HKDF + AES-GCM hybrid encryption"""
+    
+    @pytest.mark.parametrize("data", [b"", b"hello", "議事録".encode() * 5000])
+    def test_round_trip(self, data):
+        """Test that data of any size decrypts back to the original"""
+        private_pem, public_pem = AsymmetricEncryption.generate_x25519_key_pair()
+        
+        encrypted = AsymmetricEncryption.encrypt_hybrid(data, public_pem)
+        
+        assert AsymmetricEncryption.decrypt_hybrid(encrypted, private_pem) == data
+    
+    def test_ciphertext_is_randomized(self):
+        """Test that encrypting the same data twice uses fresh ephemeral keys and nonces"""
+        _, public_pem = AsymmetricEncryption.generate_x25519_key_pair()
+        
+        first = AsymmetricEncryption.encrypt_hybrid(b"same", public_pem)
+        second = AsymmetricEncryption.encrypt_hybrid(b"same", public_pem)
+        
+        assert first != second
+        assert len(first) == 32 + 12 + len(b"same") + 16
+    
+    def test_wrong_private_key_fails(self):
+        """Test that another key pair cannot decrypt the data"""
+        _, public_pem = AsymmetricEncryption.generate_x25519_key_pair()
+        other_private_pem, _ = AsymmetricEncryption.generate_x25519_key_pair()
+        encrypted = AsymmetricEncryption.encrypt_hybrid(b"secret", public_pem)
+        
+        with pytest.raises(InvalidTag):
+            AsymmetricEncryption.decrypt_hybrid(encrypted, other_private_pem)
+    
+    def test_tampered_ciphertext_fails(self):
+        """Test that modified ciphertext is rejected by the GCM tag"""
+        private_pem, public_pem = AsymmetricEncryption.generate_x25519_key_pair()
+        encrypted = bytearray(AsymmetricEncryption.encrypt_hybrid(b"secret", public_pem))
+        encrypted[-1] ^= 0x01
+        
+        with pytest.raises(InvalidTag):
+            AsymmetricEncryption.decrypt_hybrid(bytes(encrypted), private_pem)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
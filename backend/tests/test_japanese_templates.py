@@ -1,11 +1,14 @@
 """
 Tests for Japanese template system
 """
+from datetime import date
 import pytest
+from markupsafe import Markup
 from app.services.document_generation.japanese_templates import (
     JapaneseTemplateLibrary,
     TemplateStyle,
-    JapaneseTemplate
+    JapaneseTemplate,
+    get_library
 )
 from app.services.document_generation.template_engine import AdvancedTemplateEngine
 from app.database.models import DocumentType
@@ -34,6 +37,10 @@ class TestJapaneseTemplateLibrary:
         assert any(t.document_type == DocumentType.REPORT for t in template_library.templates)
         assert any(t.document_type == DocumentType.FLYER for t in template_library.templates)
     
+    def test_get_library_returns_shared_instance(self):
+        """Test that the library entry point is built once per process"""
+        assert get_library() is get_library()
+    
     def test_get_templates_by_type(self, template_library):
         """Test filtering templates by document type"""
         meeting_templates = template_library.get_templates_by_type(DocumentType.MEETING_MINUTES)
@@ -188,6 +195,70 @@ class TestTemplateRendering:
         assert '2024年7月12日' in rendered
         assert '拝啓' in rendered
     
+    def test_library_render_escapes_variables(self, template_library):
+        """Test that library rendering escapes HTML in variable values"""
+        rendered = template_library.render("letter_modern_ja", {
+            'subject': '<script>alert(1)</script>',
+            'body': '本文'
+        })
+        
+        assert '<script>' not in rendered
+        assert '&lt;script&gt;' in rendered
+    
+    @pytest.mark.parametrize("template_id", [t.id for t in JapaneseTemplateLibrary().templates])
+    def test_every_library_template_escapes_variables(self, template_library, template_id):
+        """Test that no library template emits variable values unescaped"""
+        payload = '<script>alert(1)</script>'
+        variables = {name: payload for name in template_library.get_template_by_id(template_id).variables}
+        
+        rendered = template_library.render(template_id, variables)
+        
+        assert '<script>' not in rendered
+    
+    def test_library_render_formats_markdown(self, template_library):
+        """Test that markdown filter output renders as HTML, not escaped text"""
+        rendered = template_library.render("letter_modern_ja", {
+            'subject': '件名',
+            'body': '**重要**なお知らせ\n\n<b>太字</b>'
+        })
+        
+        assert '<p><strong>重要</strong>なお知らせ</p>' in rendered
+        assert '&lt;p&gt;' not in rendered
+        assert '&lt;b&gt;太字&lt;/b&gt;' in rendered
+    
+    def test_cached_markup_render_is_not_served_for_plain_str(self, template_library):
+        """Test that a Markup value and the same text as str do not share a cached render"""
+        payload = '<script>alert(1)</script>'
+        template_library.render("letter_formal_ja", {'subject': '件名', 'body': Markup(payload)})
+        
+        rendered = template_library.render("letter_formal_ja", {'subject': '件名', 'body': payload})
+        
+        assert '<script>' not in rendered
+        assert rendered == template_library.get_template_by_id("letter_formal_ja").render(
+            {'subject': '件名', 'body': payload}
+        )
+    
+    def test_date_and_iso_string_do_not_share_a_cached_render(self, template_library, monkeypatch):
+        """Test that values only equal after serialization bypass the render cache"""
+        template = template_library.get_template_by_id("letter_formal_ja")
+        calls = []
+        monkeypatch.setattr(type(template), "render", lambda self, variables: calls.append(variables) or "")
+        
+        template_library.render("letter_formal_ja", {'date': date(2024, 7, 12)})
+        template_library.render("letter_formal_ja", {'date': '2024-07-12'})
+        template_library.render("letter_formal_ja", {'date': '2024-07-12'})
+        
+        assert len(calls) == 2
+    
+    def test_circular_variables_render_without_cache(self, template_library):
+        """Test that self-referencing variables are rendered instead of raising"""
+        items = ['項目']
+        items.append(items)
+        
+        rendered = template_library.render("letter_formal_ja", {'subject': '件名', 'body': '本文', 'extra': items})
+        
+        assert '件名' in rendered
+    
     def test_template_variable_extraction(self, template_library):
         """Test that template variables are properly defined"""
         meeting_template = template_library.get_template_by_id("meeting_professional_ja")
@@ -203,6 +274,64 @@ class TestTemplateRendering:
             assert var in letter_template.variables
 
 
+class TestPrerenderStatic:
+    """Test baking templates from fully resolved variables"""
+    
+    LETTER_VARIABLES = {
+        'sender_name': '山田太郎',
+        'sender_company': '株式会社テスト',
+        'recipient_name': '田中次郎',
+        'recipient_company': '株式会社サンプル',
+        'date': '2024-07-12',
+        'subject': 'お礼',
+        'body': '本文'
+    }
+    
+    def test_matches_regular_render(self, template_library):
+        """Test that prerendering produces the same HTML as rendering"""
+        baked = template_library.prerender_static("letter_modern_ja", self.LETTER_VARIABLES)
+        
+        assert baked == template_library.render("letter_modern_ja", self.LETTER_VARIABLES)
+        assert '2024年7月12日' in baked
+    
+    def test_repeat_is_served_from_render_cache(self, template_library):
+        """Test that baking the same variables twice reuses the cached output"""
+        first = template_library.prerender_static("letter_modern_ja", self.LETTER_VARIABLES)
+        second = template_library.prerender_static("letter_modern_ja", self.LETTER_VARIABLES)
+        
+        assert second is first
+    
+    def test_missing_variables_raise(self, template_library):
+        """Test that unresolved variables are reported by name"""
+        variables = dict(self.LETTER_VARIABLES)
+        del variables['subject']
+        del variables['date']
+        
+        with pytest.raises(ValueError, match="date, subject"):
+            template_library.prerender_static("letter_modern_ja", variables)
+    
+    def test_markup_bake_is_not_reused_for_plain_str(self, template_library):
+        """Test that baking Markup first does not leak unescaped HTML into a later plain-str bake"""
+        payload = '<script>alert(1)</script>'
+        template_library.prerender_static("letter_modern_ja", {**self.LETTER_VARIABLES, 'subject': Markup(payload)})
+        
+        baked = template_library.prerender_static("letter_modern_ja", {**self.LETTER_VARIABLES, 'subject': payload})
+        
+        assert '<script>' not in baked
+        assert '&lt;script&gt;' in baked
+    
+    def test_variables_set_to_none_count_as_provided(self, template_library):
+        """Test that the missing check looks at names, not values"""
+        baked = template_library.prerender_static("letter_modern_ja", {**self.LETTER_VARIABLES, 'sender_company': None})
+        
+        assert '山田太郎' in baked
+    
+    def test_unknown_template_raises(self, template_library):
+        """Test that an unknown template ID is rejected"""
+        with pytest.raises(ValueError, match="not found"):
+            template_library.prerender_static("missing_ja", {})
+
+
 class TestTemplateCategories:
     """Test template categorization"""
     
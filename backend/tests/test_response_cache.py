@@ -0,0 +1,98 @@
+"""
+Tests for the Redis-backed document content cache
+"""
+import fakeredis
+import pytest
+import redis.asyncio as redis
+from app.services.document_generation.response_cache import DocumentCache, normalize_transcription
+
+
+@pytest.fixture
+def cache():
+    """Document cache backed by an in-memory Redis"""
+    document_cache = DocumentCache(ttl=60)
+    document_cache.client = fakeredis.FakeAsyncRedis()
+    return document_cache
+
+
+class BrokenRedis:
+    """Redis client whose every call fails"""
+    
+    async def get(self, *args, **kwargs):
+        raise redis.ConnectionError("down")
+    
+    async def set(self, *args, **kwargs):
+        raise redis.ConnectionError("down")
+
+
+class TestNormalizeTranscription:
+    """Test transcription normalization used in cache keys"""
+    
+    def test_width_and_whitespace_variants_match(self):
+        """Test that full-width characters and extra whitespace normalize to the same text"""
+        assert normalize_transcription("ＡＢＣ　会議\n\n 議事録 ") == normalize_transcription("ABC 会議 議事録")
+
+
+class TestDocumentCache:
+    """Test cache reads, writes and failure handling"""
+    
+    @pytest.mark.asyncio
+    async def test_set_then_get_round_trip(self, cache):
+        """Test that stored content is returned with a TTL applied"""
+        key = DocumentCache.build_key("meeting", "short", "standard", "本文")
+        content = {"title": "会議", "sections": [{"heading": "概要"}]}
+        
+        await cache.set(key, content)
+        
+        assert await cache.get(key) == content
+        assert 0 < await cache.client.ttl(key) <= 60
+    
+    @pytest.mark.asyncio
+    async def test_miss_returns_none(self, cache):
+        """Test that an unknown key is a miss"""
+        assert await cache.get(DocumentCache.build_key("missing")) is None
+    
+    def test_keys_depend_on_every_part(self):
+        """Test that keys are stable and differ when any input differs"""
+        key = DocumentCache.build_key("meeting", "short", "本文")
+        
+        assert key == DocumentCache.build_key("meeting", "short", "本文")
+        assert key != DocumentCache.build_key("meeting", "long", "本文")
+        assert key.startswith("doc_cache:")
+    
+    @pytest.mark.asyncio
+    async def test_schedule_set_snapshots_value(self, cache):
+        """Test that mutating the value after scheduling does not change what is written"""
+        key = DocumentCache.build_key("meeting")
+        content = {"template_variables": {"title": "元"}}
+        
+        task = cache.schedule_set(key, content)
+        content["template_variables"]["title"] = "変更"
+        await task
+        
+        assert await cache.get(key) == {"template_variables": {"title": "元"}}
+    
+    @pytest.mark.asyncio
+    async def test_unserializable_value_is_skipped(self, cache):
+        """Test that values that cannot be serialized are not written"""
+        key = DocumentCache.build_key("meeting")
+        
+        await cache.set(key, {"bad": object()})
+        await cache.schedule_set(key, {"bad": object()})
+        
+        assert await cache.get(key) is None
+    
+    @pytest.mark.asyncio
+    async def test_redis_failures_are_ignored(self, cache):
+        """Test that Redis errors degrade to cache misses instead of raising"""
+        cache.client = BrokenRedis()
+        key = DocumentCache.build_key("meeting")
+        
+        await cache.set(key, {"title": "会議"})
+        await cache.schedule_set(key, {"title": "会議"})
+        
+        assert await cache.get(key) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
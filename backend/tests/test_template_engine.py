@@ -0,0 +1,343 @@
+"""
+Tests for the template engine helpers and rendering
+"""
+import os
+import stat
+import pytest
+from app.database.models import DocumentType
+from app.services.document_generation import template_engine
+from app.services.document_generation.template_engine import (
+    AdvancedTemplateEngine,
+    _markdown_inline,
+    create_bytecode_cache,
+    evict_environment,
+    markdown_to_html,
+)
+
+
+@pytest.fixture
+def stored_template(monkeypatch):
+    """Serve ``source`` for every stored template ID looked up by a fresh user"""
+    user_id = 9001
+    sources = {}
+    
+    class _Stored:
+        def __init__(self, content):
+            self.template_content = content
+    
+    def fake_lookup(self, template_id):
+        content = sources.get(template_id)
+        return _Stored(content) if content is not None else None
+    
+    monkeypatch.setattr(template_engine.DatabaseTemplateLoader, "_get_template_by_id", fake_lookup)
+    yield user_id, sources
+    for template_id in sources:
+        template_engine.invalidate_template(user_id, str(template_id))
+    evict_environment(user_id)
+
+
+class TestMarkdownFilter:
+    """Test markdown conversion used by the markdown filter"""
+    
+    def test_raw_html_is_escaped(self):
+        """Test that HTML in the input is escaped instead of passed through"""
+        html = markdown_to_html('**注意** <script>alert(1)</script>')
+        
+        assert '<strong>注意</strong>' in html
+        assert '<script>' not in html
+        assert '&lt;script&gt;' in html
+    
+    def test_fallback_wraps_paragraphs(self, monkeypatch):
+        """Test the built-in conversion used when mistune is not installed"""
+        monkeypatch.setattr(template_engine, "_markdown_renderer", None)
+        markdown_to_html.cache_clear()
+        
+        html = markdown_to_html('**注意** <b>\n\n次の段落')
+        markdown_to_html.cache_clear()
+        
+        assert html == '<p><strong>注意</strong> &lt;b&gt;</p><p>次の段落</p>'
+
+
+class TestMarkdownInline:
+    """Test the fallback inline markdown scanner"""
+    
+    @pytest.mark.parametrize("text, expected", [
+        ('**太字** と *斜体*', '<strong>太字</strong> と <em>斜体</em>'),
+        ('前\n\n後', '前</p><p>後'),
+        ('2*3*4', '2<em>3</em>4'),
+        ('', ''),
+    ])
+    def test_basic_markers(self, text, expected):
+        """Test bold, italic and paragraph breaks"""
+        assert _markdown_inline(text) == expected
+    
+    @pytest.mark.parametrize("text", ['**太字', '*斜体', '**', '****', '*a**', 'a * b'])
+    def test_unclosed_markers_are_kept(self, text):
+        """Test that unmatched or empty markers stay as literal text"""
+        assert _markdown_inline(text) == text
+    
+    def test_unclosed_bold_can_still_open_italic(self):
+        """Test that an unclosed ** leaves its first asterisk and italicizes the rest"""
+        assert _markdown_inline('**a*') == '*<em>a</em>'
+    
+    @pytest.mark.parametrize("text, expected", [
+        ('**太字 *斜体* 太字**', '<strong>太字 <em>斜体</em> 太字</strong>'),
+        ('*斜体 **太字** 斜体*', '<em>斜体 <strong>太字</strong> 斜体</em>'),
+        ('***両方***', '<strong><em>両方</em></strong>'),
+    ])
+    def test_nested_markers(self, text, expected):
+        """Test that emphasis inside emphasis is converted"""
+        assert _markdown_inline(text) == expected
+    
+    def test_emphasis_does_not_span_lines(self):
+        """Test that markers on different lines are not paired"""
+        assert _markdown_inline('*a\nb*') == '*a\nb*'
+        assert _markdown_inline('**a\n\nb**') == '**a</p><p>b**'
+
+
+class TestAutoescape:
+    """Test which templates get HTML escaping"""
+    
+    @pytest.mark.asyncio
+    async def test_inline_templates_escape_variables(self):
+        """Test that inline template content escapes variables but keeps filter HTML"""
+        rendered = await AdvancedTemplateEngine().render_template(
+            template_content='{{ name }} {{ body | markdown }} {{ items | bullets }}',
+            variables={'name': '<b>A&B</b>', 'body': '**b**', 'items': ['<i>x</i>']}
+        )
+        
+        assert '&lt;b&gt;A&amp;B&lt;/b&gt;' in rendered
+        assert '<p><strong>b</strong></p>' in rendered
+        assert '<ul><li>&lt;i&gt;x&lt;/i&gt;</li></ul>' in rendered
+    
+    @pytest.mark.asyncio
+    async def test_stored_templates_escape_variables(self, stored_template):
+        """Test that templates loaded by ID escape variables and keep their literal text"""
+        user_id, sources = stored_template
+        sources[41] = '<h1>Q&A</h1>{{ topic }} {{ body | markdown }}'
+        
+        rendered = await AdvancedTemplateEngine(user_id).render_template(
+            template_id=41,
+            variables={'topic': '<script>alert(1)</script>', 'body': '**b**'}
+        )
+        
+        assert rendered == '<h1>Q&A</h1>&lt;script&gt;alert(1)&lt;/script&gt; <p><strong>b</strong></p>'
+    
+    @pytest.mark.asyncio
+    async def test_stored_templates_by_type_escape_variables(self, monkeypatch):
+        """Test that default templates looked up by document type escape variables too"""
+        class _Stored:
+            template_content = '{{ title }}'
+        
+        monkeypatch.setattr(
+            template_engine.DatabaseTemplateLoader, "_get_template_by_type_and_name",
+            lambda self, doc_type, name: _Stored()
+        )
+        user_id = 9002
+        try:
+            rendered = await AdvancedTemplateEngine(user_id).render_template(
+                document_type=DocumentType.LETTER,
+                variables={'title': '<b>x</b>'}
+            )
+        finally:
+            template_engine.invalidate_template(user_id, f"{DocumentType.LETTER.value}:default")
+            evict_environment(user_id)
+        
+        assert rendered == '&lt;b&gt;x&lt;/b&gt;'
+
+
+
+class TestRenderTemplateStream:
+    """Test incremental rendering"""
+    
+    @pytest.mark.asyncio
+    async def test_chunks_join_to_full_render(self):
+        """Test that streamed chunks add up to the same output as render_template"""
+        engine = AdvancedTemplateEngine()
+        source = '<h1>{{ title }}</h1>{% for item in items %}<p>{{ item }}</p>{% endfor %}'
+        variables = {'title': '議事録', 'items': ['a', '<b>']}
+        
+        chunks = [chunk async for chunk in engine.render_template_stream(template_content=source, variables=variables)]
+        
+        assert len(chunks) > 1
+        assert ''.join(chunks) == await engine.render_template(template_content=source, variables=variables)
+        assert '<p>&lt;b&gt;</p>' in ''.join(chunks)
+    
+    @pytest.mark.asyncio
+    async def test_stored_template_by_id(self, stored_template):
+        """Test streaming a stored template looked up by ID"""
+        user_id, sources = stored_template
+        sources[42] = '{{ greeting }}, {{ name }}'
+        
+        chunks = [
+            chunk async for chunk in AdvancedTemplateEngine(user_id).render_template_stream(
+                template_id=42,
+                variables={'greeting': 'こんにちは', 'name': '田中'}
+            )
+        ]
+        
+        assert ''.join(chunks) == 'こんにちは, 田中'
+    
+    @pytest.mark.asyncio
+    async def test_missing_source_raises(self):
+        """Test that streaming without any template source fails"""
+        with pytest.raises(ValueError):
+            async for _ in AdvancedTemplateEngine().render_template_stream(variables={}):
+                pass
+    
+    @pytest.mark.asyncio
+    async def test_render_error_propagates(self):
+        """Test that errors raised while rendering reach the consumer"""
+        stream = AdvancedTemplateEngine().render_template_stream(
+            template_content='before {{ value // 0 }}',
+            variables={'value': 1}
+        )
+        
+        with pytest.raises(ZeroDivisionError):
+            async for _ in stream:
+                pass
+
+
+
+class TestCompiledSample:
+    """Test precompiled suggested templates"""
+    
+    def test_sample_is_compiled_once(self):
+        """Test that repeated lookups return the same compiled template"""
+        engine = AdvancedTemplateEngine()
+        
+        first = engine.get_compiled_sample(DocumentType.MEETING_MINUTES)
+        
+        assert engine.get_compiled_sample(DocumentType.MEETING_MINUTES) is first
+        assert AdvancedTemplateEngine().get_compiled_sample(DocumentType.MEETING_MINUTES) is first
+    
+    @pytest.mark.asyncio
+    async def test_matches_suggested_sample_template(self):
+        """Test that the compiled sample renders like the suggestion's source"""
+        engine = AdvancedTemplateEngine()
+        variables = {
+            'meeting_title': '定例会議',
+            'meeting_date': '2024-07-12',
+            'attendees': ['田中'],
+            'agenda_items': ['予算'],
+            'discussion_points': '**決定**',
+            'action_items': [],
+            'meeting_organizer': '<山田>'
+        }
+        suggestion = await engine.get_template_suggestions(
+            DocumentType.MEETING_MINUTES, style_preference="japanese_modern"
+        )
+        
+        rendered = engine.get_compiled_sample(DocumentType.MEETING_MINUTES, "japanese_modern").render(**variables)
+        expected = await engine.render_template(template_content=suggestion['sample_template'], variables=variables)
+        
+        assert rendered == expected
+        assert '2024年7月12日' in rendered
+        assert '<strong>決定</strong>' in rendered
+        assert '&lt;山田&gt;' in rendered
+    
+    def test_styles_compile_separately(self):
+        """Test that each style has its own compiled sample"""
+        engine = AdvancedTemplateEngine()
+        
+        formal = engine.get_compiled_sample(DocumentType.LETTER, "japanese_formal")
+        
+        assert formal is not engine.get_compiled_sample(DocumentType.LETTER, "japanese_modern")
+    
+    def test_unknown_style_uses_default(self):
+        """Test that an unknown style falls back to the default sample"""
+        engine = AdvancedTemplateEngine()
+        
+        assert engine.get_compiled_sample(DocumentType.REPORT, "neon") is engine.get_compiled_sample(DocumentType.REPORT)
+
+
+
+class TestValidateTemplate:
+    """Test template validation"""
+    
+    @pytest.mark.asyncio
+    async def test_common_variables_are_not_required(self):
+        """Test that variables supplied on every render are not reported as required"""
+        result = await AdvancedTemplateEngine().validate_template(
+            '{{ title }} {{ current_year }} {{ current_time }} {{ current_date }}'
+        )
+        
+        assert result['valid']
+        assert result['required_variables'] == ['title']
+    
+    def test_common_variables_match_render_variables(self):
+        """Test that the names excluded from validation are the ones every render supplies"""
+        common = AdvancedTemplateEngine._render_variables({})
+        
+        assert common.keys() == template_engine._COMMON_VARIABLES
+    
+    @pytest.mark.asyncio
+    async def test_syntax_error_is_reported(self):
+        """Test that invalid syntax is reported instead of raised"""
+        result = await AdvancedTemplateEngine().validate_template('{% for x in %}')
+        
+        assert not result['valid']
+        assert result['syntax_errors']
+
+
+class TestBytecodeCache:
+    """Test where compiled template bytecode is stored"""
+    
+    def test_default_uses_private_per_user_directory(self, monkeypatch):
+        """Test that without a configured directory the cache lives in an owner-only directory"""
+        monkeypatch.setattr(template_engine.settings, "JINJA_BYTECODE_CACHE_DIR", "")
+        
+        cache = create_bytecode_cache("test")
+        
+        info = os.lstat(cache.directory)
+        assert info.st_uid == os.getuid()
+        assert stat.S_IMODE(info.st_mode) & 0o077 == 0
+        assert cache.pattern == "__ai_printer_test_%s.cache"
+    
+    def test_configured_directory_is_created_private(self, monkeypatch, tmp_path):
+        """Test that a configured directory is created owner-only"""
+        directory = tmp_path / "jinja"
+        monkeypatch.setattr(template_engine.settings, "JINJA_BYTECODE_CACHE_DIR", str(directory))
+        
+        cache = create_bytecode_cache("test")
+        
+        assert cache.directory == str(directory)
+        assert stat.S_IMODE(os.lstat(directory).st_mode) & 0o077 == 0
+    
+    def test_shared_writable_directory_is_refused(self, monkeypatch, tmp_path):
+        """Test that a directory other users can write to disables the cache"""
+        directory = tmp_path / "jinja"
+        directory.mkdir()
+        directory.chmod(0o777)
+        monkeypatch.setattr(template_engine.settings, "JINJA_BYTECODE_CACHE_DIR", str(directory))
+        
+        assert create_bytecode_cache("test") is None
+    
+    def test_symlinked_directory_is_refused(self, monkeypatch, tmp_path):
+        """Test that a symlink planted at the configured path is not followed"""
+        target = tmp_path / "target"
+        target.mkdir(mode=0o700)
+        link = tmp_path / "jinja"
+        link.symlink_to(target)
+        monkeypatch.setattr(template_engine.settings, "JINJA_BYTECODE_CACHE_DIR", str(link))
+        
+        assert create_bytecode_cache("test") is None
+    
+    def test_foreign_owner_is_refused(self, monkeypatch, tmp_path):
+        """Test that a directory owned by another user disables the cache"""
+        directory = tmp_path / "jinja"
+        directory.mkdir(mode=0o700)
+        monkeypatch.setattr(template_engine.settings, "JINJA_BYTECODE_CACHE_DIR", str(directory))
+        monkeypatch.setattr(template_engine.os, "getuid", lambda: os.lstat(directory).st_uid + 1)
+        
+        assert create_bytecode_cache("test") is None
+    
+    def test_disabled_returns_none(self, monkeypatch):
+        """Test that the cache can be switched off"""
+        monkeypatch.setattr(template_engine.settings, "JINJA_BYTECODE_CACHE_ENABLED", False)
+        
+        assert create_bytecode_cache("test") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,107 @@
+"""
+Tests for client-side OpenAI throttling
+"""
+import asyncio
+import pytest
+from app.services.document_generation import throttling
+from app.services.document_generation.throttling import TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock moved by the test; sleeps are recorded without advancing it"""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Patch the clock and sleep used by the throttling module"""
+    fake = FakeClock()
+    monkeypatch.setattr(throttling.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(throttling.asyncio, "sleep", fake.sleep)
+    return fake
+
+
+class TestTokenBucket:
+    """Test token bucket timing"""
+    
+    @pytest.mark.asyncio
+    async def test_full_bucket_does_not_wait(self, clock):
+        """Test that requests within capacity are granted immediately"""
+        bucket = TokenBucket(60)
+        
+        for _ in range(60):
+            await bucket.acquire()
+        
+        assert clock.sleeps == []
+    
+    @pytest.mark.asyncio
+    async def test_empty_bucket_waits_for_refill(self, clock):
+        """Test that a request on an empty bucket waits for its tokens to refill"""
+        bucket = TokenBucket(60)
+        await bucket.acquire(60)
+        
+        await bucket.acquire(2)
+        
+        assert clock.sleeps == [pytest.approx(2.0)]
+    
+    @pytest.mark.asyncio
+    async def test_waiters_are_spaced_by_refill_rate(self, clock):
+        """Test that queued waiters reserve in order and each waits for its own share"""
+        bucket = TokenBucket(60)
+        await bucket.acquire(60)
+        
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        
+        assert clock.sleeps == [pytest.approx(1.0), pytest.approx(2.0), pytest.approx(3.0)]
+    
+    @pytest.mark.asyncio
+    async def test_refill_is_capped_at_capacity(self, clock):
+        """Test that idle time does not accumulate more than one bucket of tokens"""
+        bucket = TokenBucket(60)
+        clock.now += 600
+        
+        await bucket.acquire(60)
+        await bucket.acquire(1)
+        
+        assert clock.sleeps == [pytest.approx(1.0)]
+    
+    @pytest.mark.asyncio
+    async def test_oversized_request_is_clamped(self, clock):
+        """Test that a request larger than capacity waits at most one full refill"""
+        bucket = TokenBucket(60)
+        await bucket.acquire(60)
+        
+        await bucket.acquire(1000)
+        
+        assert clock.sleeps == [pytest.approx(60.0)]
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_returns_its_tokens(self, clock, monkeypatch):
+        """Test that cancelling a waiting caller does not delay the next one"""
+        bucket = TokenBucket(60)
+        await bucket.acquire(60)
+        
+        async def cancelled_sleep(seconds):
+            raise asyncio.CancelledError
+        
+        monkeypatch.setattr(throttling.asyncio, "sleep", cancelled_sleep)
+        with pytest.raises(asyncio.CancelledError):
+            await bucket.acquire(30)
+        monkeypatch.setattr(throttling.asyncio, "sleep", clock.sleep)
+        
+        await bucket.acquire(1)
+        
+        assert clock.sleeps == [pytest.approx(1.0)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])